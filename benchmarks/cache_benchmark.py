@@ -0,0 +1,99 @@
+"""
+Per-file vs packed segment cache benchmark.
+
+Times the cache operations of a job for both "cache_layout" values:
+create (store every segment), resume (reopen the cache and check which
+segments exist), merge, and clear. Small segments in large numbers are
+where the per-file layout hurts:
+
+    python benchmarks/cache_benchmark.py --dir /mnt/data/bench --segments 100000 --size 16
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.core.merger import Merger
+from src.core.segment_manager import SegmentManager
+from src.core.types import Job, Segment
+
+
+def create(manager: SegmentManager, job: Job, data: bytes):
+    manager.initialize_job_cache(job)
+    pack = manager.get_pack(job)
+    for segment in job.segments:
+        if pack is None:
+            with open(manager.get_segment_path(job, segment), 'wb') as f:
+                f.write(data)
+        else:
+            offset = pack.reserve(len(data))
+            _write_at(pack.fd, data, offset)
+            pack.add(segment.index, offset, len(data))
+    manager.close_job(job)
+
+
+def _write_at(fd: int, data: bytes, offset: int):
+    if hasattr(os, "pwrite"):
+        os.pwrite(fd, data, offset)
+    else:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def resume(layout: str, folder: str, job: Job):
+    manager = SegmentManager(folder, layout=layout)
+    manager.initialize_job_cache(job)
+    missing = sum(1 for s in job.segments if not manager.check_segment_exists(job, s))
+    manager.close_job(job)
+    if missing:
+        raise RuntimeError(f"{missing} segments not found on resume")
+
+
+def merge(manager: SegmentManager, job: Job, output: str):
+    merger = Merger()
+    merged, valid, _ = merger.merge_segments(manager.get_all_segment_files(job), output, None, "none")
+    merger.shutdown()
+    if not (merged and valid):
+        raise RuntimeError("merge failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default="cache_bench", help="Scratch directory on the disk under test")
+    parser.add_argument("--segments", type=int, default=20000)
+    parser.add_argument("--size", type=float, default=64, help="Segment size in KB")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    args = parser.parse_args()
+
+    data = os.urandom(int(args.size * 1024))
+    output = os.path.join(args.dir, "merged.ts")
+    print(f"{args.segments} x {args.size} KB segments in {args.dir}")
+    print(f"{'layout':>7} {'create s':>9} {'resume s':>9} {'merge s':>8} {'clear s':>8}")
+    try:
+        for layout in ("files", "pack"):
+            folder = os.path.join(args.dir, layout)
+            manager = SegmentManager(folder, layout=layout)
+            job = Job(f"bench_{layout}", "http://localhost/seg_[index].ts", 0, args.segments - 1, "merged.ts")
+            job.segments = [Segment(i, "") for i in range(args.segments)]
+
+            timings = []
+            for step in (lambda: create(manager, job, data),
+                         lambda: resume(layout, folder, job),
+                         lambda: merge(manager, job, output),
+                         lambda: manager.clear_job_cache(job)):
+                start = time.perf_counter()
+                step()
+                timings.append(time.perf_counter() - start)
+            print(f"{layout:>7} " + " ".join(f"{t:>8.2f}" for t in timings))
+    finally:
+        if not args.keep:
+            shutil.rmtree(args.dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
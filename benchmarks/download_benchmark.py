@@ -0,0 +1,210 @@
+"""
+End-to-end download benchmark against a local segment server.
+
+Starts benchmarks/segment_server.py in its own process, downloads a job
+from it with Downloader.start_job and merges it with merge_job, all
+headless, once per --concurrency value. Reports segments/s, MB/s, p50/p99
+segment latency (request start to segment committed), peak RSS of the
+engine process and merge MB/s:
+
+    python benchmarks/download_benchmark.py --segments 500 --size 1024 --concurrency 4,16,64
+    python benchmarks/download_benchmark.py --latency 0.08 --bandwidth 2 --errors 0.02 --stragglers 0.01
+    python benchmarks/download_benchmark.py --max-connections 12 --concurrency 64   # a throttling host
+
+Failed segments are fetched again in further passes (--passes), like a
+user resuming the job. --json saves the results, e.g. to compare runs
+before and after a change.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.segment_server import ServerOptions, serve
+from src.config import ConfigManager
+from src.core.downloader import Downloader
+from src.core.jobs import build_job, merge_job
+from src.core.merger import Merger
+from src.core.segment_manager import SegmentManager
+from src.core.types import SegmentStatus
+
+# Interval of the RSS sampler
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def start_server(port: int, options: ServerOptions) -> multiprocessing.Process:
+    # A server left over on the port would answer instead, with other options
+    try:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", port))
+    except OSError as e:
+        raise RuntimeError(f"Port {port} is not free ({e}); pick another with --port")
+    process = multiprocessing.get_context("spawn").Process(target=serve, args=(port, options), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise RuntimeError(f"Segment server exited on start (code {process.exitcode})")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"Segment server did not start on port {port}")
+
+
+def current_rss() -> int:
+    """Resident set size in bytes (Linux); elsewhere the peak so far, 0 where unknown (Windows)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        try:
+            import resource
+        except ImportError:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def sample_rss(peak: list):
+    while True:
+        peak[0] = max(peak[0], current_rss())
+        await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def run(args, concurrency: int, folder: str) -> dict:
+    segment_manager = SegmentManager(folder)
+    downloader = Downloader(segment_manager, max_concurrent=concurrency)
+    merger = Merger()
+    job = build_job(f"http://127.0.0.1:{args.port}/seg_[index].ts", 0, args.segments - 1, "bench.ts")
+
+    started = {}
+    latencies = []
+
+    def on_status(name, index, status):
+        if status == "Downloading":
+            started[index] = time.perf_counter()
+        elif status == "Completed" and index in started:
+            latencies.append(time.perf_counter() - started.pop(index))
+
+    downloader.events.segment_status_changed.connect(on_status)
+    peak = [current_rss()]
+    sampler = asyncio.create_task(sample_rss(peak))
+    try:
+        start = time.perf_counter()
+        passes = 0
+        while passes < args.passes:
+            passes += 1
+            await downloader.start_job(job)
+            if all(s.status == SegmentStatus.COMPLETED for s in job.segments):
+                break
+        download_time = time.perf_counter() - start
+        completed = sum(1 for s in job.segments if s.status == SegmentStatus.COMPLETED)
+        downloaded_bytes = sum(s.size for s in job.segments)
+
+        merge_time = merged_bytes = 0
+        if completed == len(job.segments):
+            start = time.perf_counter()
+            merged, valid, output_path = await merge_job(segment_manager, merger, job, folder)
+            merge_time = time.perf_counter() - start
+            if not (merged and valid):
+                raise RuntimeError("merge failed")
+            merged_bytes = os.path.getsize(output_path)
+    finally:
+        sampler.cancel()
+        await downloader.close()
+        merger.shutdown()
+
+    return {
+        "concurrency": concurrency,
+        "segments": len(job.segments),
+        "failed": len(job.segments) - completed,
+        "passes": passes,
+        "seconds": round(download_time, 3),
+        "segments_per_s": round(completed / download_time, 1),
+        "mb_per_s": round(downloaded_bytes / download_time / 1024 / 1024, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "peak_rss_mb": round(peak[0] / 1024 / 1024, 1),
+        "merge_mb_per_s": round(merged_bytes / merge_time / 1024 / 1024, 1) if merge_time else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default="download_bench", help="Scratch download folder")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--segments", type=int, default=300)
+    parser.add_argument("--size", type=float, default=1024, help="Segment size in KB")
+    parser.add_argument("--latency", type=float, default=0.0, help="Server seconds before each response")
+    parser.add_argument("--bandwidth", type=float, default=0, help="Server MB/s per connection (0 = unlimited)")
+    parser.add_argument("--errors", type=float, default=0.0, help="Share of requests failing with 503")
+    parser.add_argument("--stragglers", type=float, default=0.0, help="Share of requests delayed by --straggler-delay")
+    parser.add_argument("--straggler-delay", type=float, default=2.0)
+    parser.add_argument("--max-connections", type=int, default=0,
+                        help="Server answers 503 beyond this many requests at once (0 = no cap)")
+    parser.add_argument("--concurrency", default="4,16,64", help="Comma-separated connection counts")
+    parser.add_argument("--passes", type=int, default=3, help="Download passes before failed segments count")
+    parser.add_argument("--layout", choices=("files", "pack"), help="Cache layout (default: from config)")
+    parser.add_argument("--memory-budget", type=int, help="memory_budget_mb (default: from config)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch folder")
+    args = parser.parse_args()
+
+    config = ConfigManager().get_config()
+    # Measure the engine alone: no shared cache answering for the server
+    config.shared_cache_mb = 0
+    config.merge_mode = "keep"
+    if args.layout:
+        config.cache_layout = args.layout
+    if args.memory_budget is not None:
+        config.memory_budget_mb = args.memory_budget
+
+    options = ServerOptions(int(args.size * 1024), args.latency, int(args.bandwidth * 1024 * 1024),
+                            args.errors, args.stragglers, args.straggler_delay, args.max_connections)
+    server = start_server(args.port, options)
+    results = []
+    try:
+        print(f"{args.segments} x {args.size:g} KB segments, latency {args.latency:g}s, "
+              f"errors {args.errors:g}, stragglers {args.stragglers:g}")
+        print(f"{'conns':>6} {'seg/s':>8} {'MB/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8} "
+              f"{'merge MB/s':>11} {'failed':>7}")
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            folder = os.path.join(args.dir, f"c{concurrency}")
+            shutil.rmtree(folder, ignore_errors=True)
+            result = asyncio.run(run(args, concurrency, folder))
+            results.append(result)
+            merge = f"{result['merge_mb_per_s']:>11.0f}" if result["merge_mb_per_s"] else f"{'-':>11}"
+            print(f"{concurrency:>6} {result['segments_per_s']:>8.1f} {result['mb_per_s']:>8.1f} "
+                  f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['peak_rss_mb']:>8.0f} "
+                  f"{merge} {result['failed']:>7}")
+    finally:
+        server.terminate()
+        if not args.keep:
+            shutil.rmtree(args.dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"options": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Sequential vs parallel merge benchmark.
+
+Creates synthetic segments in --dir and merges them with 1 (sequential)
+and N copy threads. Point --dir at the disk you want to measure:
+
+    python benchmarks/merge_benchmark.py --dir /mnt/nvme/bench
+    python benchmarks/merge_benchmark.py --dir /mnt/hdd/bench --threads 1,2,4 --cold
+
+--cold evicts the segments from the page cache before every run
+(posix_fadvise DONTNEED, no root needed), so reads really hit the disk.
+Spinning disks usually lose with many threads because parallel reads
+turn into seeks; set "merge_threads": 1 in config.json there.
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.core.merger import Merger
+
+
+def create_segments(folder: str, count: int, size: int) -> list:
+    os.makedirs(folder, exist_ok=True)
+    block = os.urandom(min(size, 1024 * 1024))
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"{i:05d}.ts")
+        with open(path, 'wb') as f:
+            remaining = size
+            while remaining:
+                n = min(remaining, len(block))
+                f.write(block[:n])
+                remaining -= n
+        paths.append(path)
+    return paths
+
+
+def evict(paths: list):
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def run(paths: list, output: str, threads: int, algorithm: str, cold: bool) -> float:
+    if os.path.exists(output):
+        os.remove(output)
+    if cold:
+        evict(paths)
+    merger = Merger(threads=threads)
+    start = time.perf_counter()
+    merged, valid, _ = merger.merge_segments(paths, output, None, algorithm)
+    # Include writeback, otherwise we only measure copying into the page cache
+    fd = os.open(output, os.O_RDONLY)
+    os.fsync(fd)
+    os.close(fd)
+    elapsed = time.perf_counter() - start
+    merger.shutdown()
+    if not (merged and valid):
+        raise RuntimeError("merge failed")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default="merge_bench", help="Scratch directory on the disk under test")
+    parser.add_argument("--segments", type=int, default=500)
+    parser.add_argument("--size", type=float, default=2.0, help="Segment size in MB")
+    parser.add_argument("--threads", default="1,2,4,8", help="Comma-separated thread counts (1 = sequential)")
+    parser.add_argument("--hash", default="crc32", help="crc32, none (copy_file_range) or sha256 (sequential only)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cold", action="store_true", help="Evict segments from the page cache before each run")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    args = parser.parse_args()
+
+    seg_dir = os.path.join(args.dir, "segments")
+    output = os.path.join(args.dir, "merged.ts")
+    size = int(args.size * 1024 * 1024)
+    total_mb = args.segments * size / 1024 / 1024
+    print(f"Creating {args.segments} x {args.size} MB segments in {seg_dir} ...")
+    paths = create_segments(seg_dir, args.segments, size)
+
+    try:
+        print(f"{'threads':>8} {'mode':>11} {'best s':>8} {'MB/s':>8}")
+        for threads in (int(t) for t in args.threads.split(",")):
+            probe = Merger(threads=threads)
+            mode = "parallel" if probe.can_merge_parallel(paths, args.hash) else "sequential"
+            probe.shutdown()
+            best = min(run(paths, output, threads, args.hash, args.cold) for _ in range(args.repeat))
+            print(f"{threads:>8} {mode:>11} {best:>8.2f} {total_mb / best:>8.0f}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(args.dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
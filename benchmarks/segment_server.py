@@ -0,0 +1,132 @@
+"""
+Local stand-in for a segment host, for benchmarks and manual testing.
+
+Serves /seg_<index>.ts bodies of a fixed size (valid MPEG-TS, so segment
+validation passes) and can imitate a real CDN: per-request latency, a
+per-connection bandwidth cap, a share of failing requests and stragglers
+that answer much later than the rest, and a cap on concurrent requests
+beyond which it answers 503 (--max-connections), like a throttling CDN.
+
+    python benchmarks/segment_server.py --port 8089 --size 1024 --latency 0.05 --errors 0.01
+
+download_benchmark.py starts one in a separate process itself.
+"""
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+from aiohttp import web
+
+TS_PACKET_SIZE = 188
+PMT_PID = 0x1000
+VIDEO_PID = 0x100
+# Body slices between bandwidth sleeps
+SEND_CHUNK = 64 * 1024
+
+
+@dataclass
+class ServerOptions:
+    segment_size: int = 1024 * 1024  # Bytes, rounded down to whole TS packets
+    latency: float = 0.0          # Seconds before every response
+    bandwidth: int = 0            # Bytes/s per connection; 0 = unlimited
+    error_rate: float = 0.0       # Share of requests answered with a 503
+    straggler_rate: float = 0.0   # Share of requests delayed by straggler_delay
+    straggler_delay: float = 2.0
+    max_connections: int = 0      # Requests beyond this many at once get a 503; 0 = no cap
+    seed: int = 1
+
+
+def _packet(pid: int, counter: int, payload: bytes, unit_start: bool = False) -> bytes:
+    header = bytes((0x47, (0x40 if unit_start else 0) | (pid >> 8), pid & 0xFF, 0x10 | (counter & 0x0F)))
+    return header + payload.ljust(TS_PACKET_SIZE - 4, b"\xff")
+
+
+def ts_body(size: int) -> bytes:
+    """A PAT, a PMT and as many video packets (continuity counters in order) as fit in size."""
+    pat = bytes((0, 0x00, 0xB0, 13, 0, 1, 0xC1, 0, 0, 0, 1, 0xE0 | (PMT_PID >> 8), PMT_PID & 0xFF, 0, 0, 0, 0))
+    pmt = bytes((0, 0x02, 0xB0, 18, 0, 1, 0xC1, 0, 0, 0xE0 | (VIDEO_PID >> 8), VIDEO_PID & 0xFF, 0xF0, 0,
+                 0x1B, 0xE0 | (VIDEO_PID >> 8), VIDEO_PID & 0xFF, 0xF0, 0, 0, 0, 0, 0))
+    packets = [_packet(0, 0, pat, True), _packet(PMT_PID, 0, pmt, True)]
+    fill = bytes(range(256)) * 4
+    for i in range(max(size // TS_PACKET_SIZE - 2, 1)):
+        packets.append(_packet(VIDEO_PID, i, fill[i % 64:i % 64 + TS_PACKET_SIZE - 4], i == 0))
+    return b"".join(packets)
+
+
+class SegmentServer:
+    def __init__(self, options: ServerOptions):
+        self.options = options
+        self.body = ts_body(options.segment_size)
+        self.random = random.Random(options.seed)
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/seg_{index}.ts", self.handle_segment)
+        return app
+
+    async def handle_segment(self, request: web.Request) -> web.StreamResponse:
+        options = self.options
+        self.requests += 1
+        if options.max_connections and self.active >= options.max_connections:
+            self.errors += 1
+            return web.Response(status=503)
+        self.active += 1
+        try:
+            return await self._send_segment(request)
+        finally:
+            self.active -= 1
+
+    async def _send_segment(self, request: web.Request) -> web.StreamResponse:
+        options = self.options
+        delay = options.latency
+        if self.random.random() < options.straggler_rate:
+            delay += options.straggler_delay
+        if delay:
+            await asyncio.sleep(delay)
+        if self.random.random() < options.error_rate:
+            self.errors += 1
+            return web.Response(status=503)
+
+        response = web.StreamResponse(headers={"Content-Type": "video/mp2t"})
+        response.content_length = len(self.body)
+        await response.prepare(request)
+        if not options.bandwidth:
+            await response.write(self.body)
+        else:
+            for start in range(0, len(self.body), SEND_CHUNK):
+                chunk = self.body[start:start + SEND_CHUNK]
+                await response.write(chunk)
+                await asyncio.sleep(len(chunk) / options.bandwidth)
+        await response.write_eof()
+        return response
+
+
+def serve(port: int, options: ServerOptions):
+    """Blocking; the benchmark runs this in its own process."""
+    web.run_app(SegmentServer(options).create_app(), host="127.0.0.1", port=port, print=None,
+                access_log=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--size", type=float, default=1024, help="Segment size in KB")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each response")
+    parser.add_argument("--bandwidth", type=float, default=0, help="MB/s per connection (0 = unlimited)")
+    parser.add_argument("--errors", type=float, default=0.0, help="Share of requests failing with 503")
+    parser.add_argument("--stragglers", type=float, default=0.0, help="Share of requests delayed by --straggler-delay")
+    parser.add_argument("--straggler-delay", type=float, default=2.0)
+    parser.add_argument("--max-connections", type=int, default=0, help="503 beyond this many requests at once")
+    args = parser.parse_args()
+
+    options = ServerOptions(int(args.size * 1024), args.latency, int(args.bandwidth * 1024 * 1024),
+                            args.errors, args.stragglers, args.straggler_delay, args.max_connections)
+    print(f"Serving http://127.0.0.1:{args.port}/seg_[index].ts")
+    serve(args.port, options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Cold start benchmark: time from process start to the first painted window.
+
+Launches the GUI's startup sequence (as in src/main.py) in a fresh
+interpreter with -X importtime, once per --runs, and reports the median
+time to window, the time to create the download engine afterwards and the
+slowest imports before the window appeared:
+
+    python benchmarks/startup_benchmark.py --runs 5 --target-ms 800
+
+Exits with status 1 if the median exceeds --target-ms or if one of the
+modules that should load after the window (DEFERRED_MODULES: aiohttp,
+NumPy, the engine) was imported before it, so it can guard startup in CI.
+Runs headless with the offscreen Qt platform unless --platform is given.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Must not be imported before the window is shown
+DEFERRED_MODULES = ("aiohttp", "numpy", "src.core.downloader", "src.core.merger", "src.core.hls")
+# Written to stderr between the imports before and after the window
+WINDOW_MARKER = "-- window shown --"
+
+
+def child():
+    """The startup of src/main.py, reporting on stdout as it goes."""
+    import asyncio
+    from PyQt6.QtWidgets import QApplication
+    from qasync import QEventLoop
+    from src.ui.main_window import MainWindow
+
+    app = QApplication(sys.argv[:1])
+    asyncio.set_event_loop(QEventLoop(app))
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+    print(WINDOW_MARKER, file=sys.stderr, flush=True)
+    early = [name for name in DEFERRED_MODULES if name in sys.modules]
+    print(json.dumps({"window": True, "early": early}), flush=True)
+
+    start = time.perf_counter()
+    window.start_engine()
+    print(json.dumps({"engine_ms": (time.perf_counter() - start) * 1000}), flush=True)
+
+
+def parse_importtime(stderr: str):
+    """(self µs, module) of the imports logged before the window was shown."""
+    imports = []
+    for line in stderr.splitlines():
+        if line.startswith(WINDOW_MARKER):
+            break
+        if line.startswith("import time:") and "|" in line:
+            own, _, name = line[len("import time:"):].split("|")
+            if own.strip().isdigit():
+                imports.append((int(own), name.strip()))
+    return imports
+
+
+def run_once(env: dict) -> dict:
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child"],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    first = process.stdout.readline()
+    window_ms = (time.perf_counter() - start) * 1000
+    rest, stderr = process.communicate()
+    if process.returncode or not first:
+        raise RuntimeError(f"Startup failed:\n{stderr[-2000:]}")
+    shown = json.loads(first)
+    engine = json.loads(rest.splitlines()[-1])
+    return {"window_ms": window_ms, "engine_ms": engine["engine_ms"], "early": shown["early"],
+            "imports": parse_importtime(stderr)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=800, help="Fail above this median time to window")
+    parser.add_argument("--platform", default="offscreen", help="QT_QPA_PLATFORM for the runs")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return 0
+
+    env = dict(os.environ, QT_QPA_PLATFORM=args.platform)
+    runs = [run_once(env) for _ in range(args.runs)]
+    window_ms = statistics.median(r["window_ms"] for r in runs)
+    engine_ms = statistics.median(r["engine_ms"] for r in runs)
+    early = sorted({name for r in runs for name in r["early"]})
+
+    print(f"time to window: {window_ms:.0f} ms median "
+          f"({min(r['window_ms'] for r in runs):.0f}-{max(r['window_ms'] for r in runs):.0f} ms, {args.runs} runs)")
+    print(f"engine startup after the window: {engine_ms:.0f} ms")
+    print(f"slowest imports before the window (self time, last run):")
+    for own, name in sorted(runs[-1]["imports"], reverse=True)[:args.top]:
+        print(f"  {own / 1000:7.1f} ms  {name}")
+
+    failed = False
+    if early:
+        print(f"FAIL: imported before the window: {', '.join(early)}")
+        failed = True
+    if window_ms > args.target_ms:
+        print(f"FAIL: time to window {window_ms:.0f} ms > target {args.target_ms:.0f} ms")
+        failed = True
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"window_ms": window_ms, "engine_ms": engine_ms, "early": early,
+                       "runs": [{k: r[k] for k in ("window_ms", "engine_ms")} for r in runs]}, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+"""
+fastflux - headless command line front-end for the Fast-Flux engine.
+
+Runs without PyQt so it can be used on display-less servers:
+
+    python src/cli.py download "https://example.com/seg_[index].ts" 1 500 -o video.mp4
+    python src/cli.py download -j URL1 1 100 a.mp4 -j URL2 1 250 b.mp4
+    python src/cli.py download "https://example.com/master.m3u8" -o video.mp4
+    python src/cli.py download "https://example.com/live.m3u8" --follow -o rec.ts   # Ctrl+C ends the recording
+    python src/cli.py daemon                 # long-running job queue + control API
+    python src/cli.py submit URL 1 500 -o video.mp4
+    python src/cli.py import batch.csv       # queue many jobs (CSV or JSON Lines manifest)
+    python src/cli.py rate 2M                # change the daemon's bandwidth cap live
+    python src/cli.py hosts                  # concurrency learned per host
+    python src/cli.py merge Cache_a Cache_b  # merge segment folders into a.mp4 and b.mp4
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add project root to sys.path to allow running as script
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.config import ConfigManager
+from src.core.types import SegmentStatus
+
+
+def _parse_index(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid index: {value!r}")
+
+
+def _parse_rate(value: str) -> int:
+    from src.utils.helpers import parse_rate
+    try:
+        return parse_rate(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate: {value!r} (e.g. 500K, 2M, 0 = unlimited)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="fastflux", description="Fast-Flux turbo segment downloader (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dl = sub.add_parser("download", help="Download (and merge) one or more segment jobs")
+    dl.add_argument("url", nargs="?", help="Base URL with [index] placeholder, or an .m3u8 playlist")
+    dl.add_argument("start", nargs="?", type=_parse_index, help="First segment index")
+    dl.add_argument("end", nargs="?", type=_parse_index, help="Last segment index")
+    dl.add_argument("-o", "--output", default="", help="Output filename (default: output.mp4)")
+    dl.add_argument("-j", "--job", nargs=4, action="append", default=[],
+                    metavar=("URL", "START", "END", "OUTPUT"),
+                    help="Additional job; may be given multiple times (START/END ignored for playlists)")
+    dl.add_argument("-p", "--padding", default=None,
+                    help="Index padding, e.g. 000 (default: from config)")
+    dl.add_argument("-c", "--concurrency", type=int, default=None,
+                    help="Max concurrent downloads (default: from config)")
+    dl.add_argument("-d", "--folder", default=None,
+                    help="Download folder (default: from config)")
+    dl.add_argument("-P", "--processes", type=int, default=None,
+                    help="Shard downloads across N worker processes (default: from config)")
+    dl.add_argument("--limit-rate", type=_parse_rate, default=None, metavar="RATE",
+                    help="Total bandwidth cap, e.g. 500K or 2M bytes/s (default: from config)")
+    dl.add_argument("--job-limit", type=_parse_rate, default=0, metavar="RATE",
+                    help="Bandwidth cap for each job (default: unlimited)")
+    dl.add_argument("--max-bandwidth", type=int, default=None, metavar="BPS",
+                    help="HLS master playlists: best variant up to this many bits/s (default: from config)")
+    dl.add_argument("--follow", action="store_true",
+                    help="Live stream: keep fetching new segments (END optional) until it ends or Ctrl+C")
+    dl.add_argument("--watch", action="store_true",
+                    help="Download in playback order and serve the progress to a player (see --watch-port)")
+    dl.add_argument("--watch-port", type=int, default=None,
+                    help="Local port of the --watch stream (default: from config)")
+    dl.add_argument("--no-merge", action="store_true", help="Only download segments, do not merge")
+    dl.add_argument("-q", "--quiet", action="store_true", help="Only print final results")
+
+    dm = sub.add_parser("daemon", help="Run the job-queue daemon with its local control API")
+    dm.add_argument("-a", "--address", default=None,
+                    help="host:port or unix:/path.sock (default: from config)")
+    dm.add_argument("-c", "--concurrency", type=int, default=None,
+                    help="Max concurrent downloads (default: from config)")
+    dm.add_argument("-d", "--folder", default=None,
+                    help="Download folder (default: from config)")
+    dm.add_argument("-P", "--processes", type=int, default=None,
+                    help="Shard downloads across N worker processes (default: from config)")
+    dm.add_argument("--limit-rate", type=_parse_rate, default=None, metavar="RATE",
+                    help="Total bandwidth cap, e.g. 2M bytes/s (default: from config)")
+    dm.add_argument("--max-jobs", type=int, default=None,
+                    help="Jobs downloading at once; the rest wait queued, 0 = no limit (default: from config)")
+
+    sm = sub.add_parser("submit", help="Submit a job to a running daemon")
+    sm.add_argument("url", help="Base URL with [index] placeholder, or an .m3u8 playlist")
+    sm.add_argument("start", nargs="?", type=_parse_index, help="First segment index")
+    sm.add_argument("end", nargs="?", type=_parse_index, help="Last segment index")
+    sm.add_argument("-o", "--output", default="", help="Output filename (default: output.mp4)")
+    sm.add_argument("-p", "--padding", default=None,
+                    help="Index padding, e.g. 000 (default: from config)")
+    sm.add_argument("--limit-rate", type=_parse_rate, default=0, metavar="RATE",
+                    help="Bandwidth cap for this job (default: unlimited)")
+    sm.add_argument("--follow", action="store_true",
+                    help="Live stream: keep fetching new segments until it ends or 'stop NAME'")
+    sm.add_argument("--watch", action="store_true",
+                    help="Download in playback order; the daemon serves the progress to a player")
+    sm.add_argument("--priority", type=int, default=0, help="Queue priority; higher starts first (default: 0)")
+
+    im = sub.add_parser("import", help="Queue a batch of jobs on a running daemon from a manifest file")
+    im.add_argument("manifest", help=".csv with a header row or .jsonl, one job per line: "
+                                     "base_url,start,end,filename[,priority,padding,rate_limit,follow]")
+    im.add_argument("-p", "--padding", default=None,
+                    help="Index padding for entries without one (default: from config)")
+
+    sub.add_parser("jobs", help="List the daemon's jobs")
+    for action in ("cancel", "pause", "resume"):
+        ap = sub.add_parser(action, help=f"{action.capitalize()} a daemon job")
+        ap.add_argument("name", help="Job name as shown by 'jobs'")
+    st = sub.add_parser("stop", help="End a daemon job's live recording; it is then merged")
+    st.add_argument("name", help="Job name as shown by 'jobs'")
+    sub.add_parser("watch", help="Stream progress events from the daemon")
+    rt = sub.add_parser("rate", help="Show or change a running daemon's bandwidth cap")
+    rt.add_argument("rate", nargs="?", type=_parse_rate, help="New cap, e.g. 2M (0 = unlimited)")
+    rt.add_argument("-j", "--job", default=None, help="Change this job's cap instead of the global one")
+
+    mg = sub.add_parser("merge", help="Merge folders of segment files (e.g. Cache_* folders) into videos")
+    mg.add_argument("folders", nargs="+", metavar="FOLDER", help="Folder of .ts segments, merged in natural order")
+    mg.add_argument("-o", "--output", default=None,
+                    help="Output file (one FOLDER only; default: folder name without Cache_ + --ext)")
+    mg.add_argument("-e", "--ext", default="mp4", help="Extension of default output names (default: mp4)")
+    mg.add_argument("-d", "--folder", default=None,
+                    help="Folder for default output names (default: download folder from config)")
+    mg.add_argument("--parallel", type=int, default=2, help="Folders merged at once (default: 2)")
+    mg.add_argument("--allow-gaps", action="store_true",
+                    help="Merge folders with missing segment numbers instead of skipping them")
+    mg.add_argument("--no-hash", action="store_true",
+                    help="Skip the output checksum, so the kernel copies the data (fastest)")
+
+    hs = sub.add_parser("hosts", help="List the concurrency, speed and error rate learned per host")
+    hs.add_argument("-d", "--folder", default=None, help="Download folder (default: from config)")
+    hs.add_argument("--forget", metavar="HOST", default=None,
+                    help="Drop a host's profile; its next job starts at the global budget")
+
+    for name, sp in sub.choices.items():
+        if name not in ("download", "daemon", "hosts", "merge"):
+            sp.add_argument("-a", "--address", default=None,
+                            help="Daemon address (default: from config)")
+    return parser
+
+
+class ProgressPrinter:
+    """Prints at most one progress line per job per interval."""
+
+    def __init__(self, interval: float = 1.0, quiet: bool = False):
+        self.interval = interval
+        self.quiet = quiet
+        self.last_print = {}
+
+    def on_progress(self, job_name: str, progress: float, speed: str, eta: str):
+        if self.quiet:
+            return
+        now = time.monotonic()
+        if now - self.last_print.get(job_name, 0) >= self.interval:
+            self.last_print[job_name] = now
+            print(f"[{job_name}] {progress:5.1f}% | {speed} | ETA {eta}", file=sys.stderr)
+
+    def on_failed(self, job_name: str, error: str):
+        print(f"[{job_name}] Failed: {error}", file=sys.stderr)
+
+
+async def create_jobs(args, padding):
+    from src.core.jobs import build_job, resolve_playlist_job
+    from src.core.hls import is_playlist_url
+
+    specs = []
+    if args.url is not None:
+        if is_playlist_url(args.url):
+            specs.append((args.url, None, None, args.output))
+        elif args.start is None or (args.end is None and not args.follow):
+            raise ValueError("download needs URL START END (or --job)")
+        else:
+            # A followed template without END starts at START and grows from there
+            end = args.end if args.end is not None else args.start - 1
+            specs.append((args.url, args.start, end, args.output))
+    for url, start, end, output in args.job:
+        if is_playlist_url(url):
+            specs.append((url, None, None, output))
+        else:
+            specs.append((url, _parse_index(start), _parse_index(end), output))
+    if not specs:
+        raise ValueError("no jobs given")
+
+    jobs = []
+    for url, start, end, output in specs:
+        if start is None:
+            job = await resolve_playlist_job(url, output, args.max_bandwidth, args.follow)
+            if not args.quiet:
+                print(f"[{job.name}] Playlist: {job.total_segments} segments"
+                      + (" (live, following)" if job.follow else ""), file=sys.stderr)
+        else:
+            job = build_job(url, start, end, output, padding, args.follow)
+        job.rate_limit = args.job_limit
+        if any(j.name == job.name for j in jobs):
+            raise ValueError(f"duplicate output filename: {job.output_filename}")
+        jobs.append(job)
+    return jobs
+
+
+async def run_download(args) -> int:
+    import aiohttp
+    from src.core.sharding import create_downloader
+    from src.core.segment_manager import SegmentManager
+    from src.core.merger import Merger
+    from src.core.jobs import merge_job
+
+    config = ConfigManager().get_config()
+    folder = args.folder or config.download_folder
+    padding = args.padding if args.padding is not None else config.global_padding
+
+    try:
+        jobs = await create_jobs(args, padding)
+    except (ValueError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"fastflux: error: {e}", file=sys.stderr)
+        return 2
+
+    os.makedirs(folder, exist_ok=True)
+    segment_manager = SegmentManager(folder)
+    downloader = create_downloader(segment_manager, args.concurrency, args.processes, args.limit_rate)
+    if args.no_merge:
+        downloader.memory_budget = None  # Keep every segment in the cache, live jobs included
+    merger = Merger()
+
+    printer = ProgressPrinter(quiet=args.quiet)
+    downloader.events.job_progress_updated.connect(printer.on_progress)
+    downloader.events.job_failed.connect(printer.on_failed)
+
+    async def run_one(job) -> bool:
+        await downloader.start_job(job)
+        done = sum(1 for s in job.segments if s.status == SegmentStatus.COMPLETED)
+        if done != job.total_segments:
+            print(f"[{job.name}] {job.total_segments - done} of {job.total_segments} segments missing", file=sys.stderr)
+            return False
+        if args.no_merge:
+            print(f"[{job.name}] Downloaded to {segment_manager.get_job_cache_path(job.name)}")
+            return True
+
+        merged, valid, output_path = await merge_job(segment_manager, merger, job, folder)
+        if not merged:
+            print(f"[{job.name}] Merge failed", file=sys.stderr)
+            return False
+        if not valid:
+            print(f"[{job.name}] Merge finished but integrity check failed: {output_path}", file=sys.stderr)
+            return False
+        print(f"[{job.name}] Done! Saved to {output_path}")
+        return True
+
+    if any(job.follow for job in jobs):
+        _stop_following_on_interrupt(downloader, jobs)
+
+    playback = None
+    if args.watch:
+        from src.core.daemon_client import job_path
+        from src.core.playback import PlaybackServer
+        port = args.watch_port or config.playback_port
+        playback = PlaybackServer(downloader, {job.name: job for job in jobs})
+        await playback.start("127.0.0.1", port)
+        for job in jobs:
+            job.playback = True
+            print(f"[{job.name}] Watch: http://127.0.0.1:{port}{job_path(job.name)}/stream", file=sys.stderr)
+
+    try:
+        results = await asyncio.gather(*(run_one(job) for job in jobs))
+        if playback is not None:
+            print("Downloads finished; still serving the stream (Ctrl+C to exit)", file=sys.stderr)
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                pass
+    finally:
+        await downloader.close()
+        merger.shutdown()
+        if playback is not None:
+            await playback.stop()
+
+    return 0 if all(results) else 1
+
+
+def _stop_following_on_interrupt(downloader, jobs):
+    """The first Ctrl+C ends live recordings normally (they are then merged); a second one aborts."""
+    import signal
+    loop = asyncio.get_running_loop()
+
+    def stop():
+        print("Stopping live recording - finishing downloaded segments (Ctrl+C again to abort)", file=sys.stderr)
+        loop.remove_signal_handler(signal.SIGINT)
+        for job in jobs:
+            downloader.stop_following(job.name)
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, stop)
+    except (NotImplementedError, RuntimeError):
+        pass  # Windows: Ctrl+C interrupts as usual; cached segments are kept
+
+
+async def run_daemon(args) -> int:
+    from src.core.daemon import JobDaemon
+
+    config = ConfigManager().get_config()
+    address = args.address or config.daemon_address
+    daemon = JobDaemon(args.folder or config.download_folder, max_concurrent=args.concurrency,
+                       processes=args.processes, max_rate=args.limit_rate, max_active_jobs=args.max_jobs)
+    print(f"fastflux daemon listening on {address}", file=sys.stderr)
+    await daemon.serve_forever(address)
+    return 0
+
+
+async def run_merge(args) -> int:
+    from src.core.folder_merge import format_gaps, merge_folders, scan_folder, suggested_name
+    from src.core.merger import Merger
+
+    if args.output and len(args.folders) > 1:
+        print("fastflux: error: -o needs a single FOLDER", file=sys.stderr)
+        return 2
+    config = ConfigManager().get_config()
+    algorithm = "none" if args.no_hash else config.checksum_algorithm
+    plans = []
+    failed = False
+    for folder in args.folders:
+        try:
+            scan = scan_folder(folder)
+        except OSError as e:
+            print(f"fastflux: error: {e}", file=sys.stderr)
+            failed = True
+            continue
+        if not scan.segments:
+            print(f"{folder}: no segment files", file=sys.stderr)
+            failed = True
+            continue
+        if scan.gaps:
+            print(f"{folder}: {scan.missing} segment(s) missing: {format_gaps(scan.gaps)}"
+                  + ("" if args.allow_gaps else " - skipped (--allow-gaps merges it anyway)"), file=sys.stderr)
+            if not args.allow_gaps:
+                failed = True
+                continue
+        output = args.output or os.path.join(args.folder or config.download_folder,
+                                             f"{suggested_name(folder)}.{args.ext.lstrip('.')}")
+        plans.append((scan, output))
+
+    merger = Merger()
+    try:
+        start = time.perf_counter()
+        results = await merge_folders(merger, plans, algorithm, args.parallel)
+        elapsed = time.perf_counter() - start
+    finally:
+        merger.shutdown()
+    for (scan, output), (merged, valid, checksum) in zip(plans, results):
+        if merged and valid:
+            hash_text = f", {algorithm.upper()}: {checksum}" if checksum else ""
+            print(f"Merged {len(scan.segments)} segments into {output} "
+                  f"({scan.total_size / 1024 / 1024:.1f} MB{hash_text})")
+        else:
+            print(f"Merge failed: {output}", file=sys.stderr)
+            failed = True
+    if plans:
+        total = sum(scan.total_size for scan, _ in plans)
+        print(f"{total / 1024 / 1024:.1f} MB in {elapsed:.2f}s ({total / 1024 / 1024 / max(elapsed, 1e-6):.0f} MB/s)",
+              file=sys.stderr)
+    return 1 if failed else 0
+
+
+def run_hosts(args) -> int:
+    from src.core.host_profiles import PROFILES_FILENAME, ProfileStore
+    from src.utils.helpers import format_rate
+
+    store = ProfileStore(os.path.join(args.folder or ConfigManager().get_config().download_folder,
+                                      PROFILES_FILENAME))
+    if args.forget is not None:
+        if not store.forget(args.forget.lower()):
+            print(f"fastflux: error: no profile for {args.forget}", file=sys.stderr)
+            return 1
+        store.save()
+        print(f"Forgot {args.forget}")
+        return 0
+    for p in sorted(store.profiles.values(), key=lambda p: p.host):
+        print(f"{p.host:<40} {p.concurrency:>4} conns {(format_rate(int(p.throughput)) if p.throughput else '-'):>12} "
+              f"{p.error_rate * 100:5.1f}% errors {p.segment_size // 1024:>7} KB/segment {p.samples:>8} requests")
+    return 0
+
+
+async def run_client_command(args) -> int:
+    from src.core.daemon_client import DaemonClient, DaemonError, job_path
+
+    config = ConfigManager().get_config()
+    client = DaemonClient(args.address or config.daemon_address)
+    try:
+        if args.command == "submit":
+            from src.core.hls import is_playlist_url
+            if ((args.start is None or (args.end is None and not args.follow))
+                    and not is_playlist_url(args.url)):
+                print("fastflux: error: submit needs URL START END (or an .m3u8 playlist)", file=sys.stderr)
+                return 2
+            padding = args.padding if args.padding is not None else config.global_padding
+            job = await client.submit(args.url, args.start, args.end, args.output, padding, args.limit_rate,
+                                      follow=args.follow, playback=args.watch, priority=args.priority)
+            print(f"Submitted {job['name']} ({job['total_segments']} segments)")
+            if args.watch and client.base_url != "http://localhost":
+                print(f"Watch: {client.base_url}{job_path(job['name'])}/stream")
+        elif args.command == "import":
+            from src.core.batch import read_manifest
+            try:
+                entries = read_manifest(args.manifest)
+            except (OSError, ValueError) as e:
+                print(f"fastflux: error: {e}", file=sys.stderr)
+                return 2
+            padding = args.padding if args.padding is not None else config.global_padding
+            for entry in entries:
+                entry["padding"] = entry["padding"] or padding
+            result = await client.submit_batch(entries)
+            for error in result["errors"]:
+                entry = entries[error["index"]]
+                print(f"Skipped {entry['filename'] or entry['base_url']}: {error['error']}", file=sys.stderr)
+            print(f"Queued {len(result['submitted'])} of {len(entries)} jobs")
+            if result["errors"]:
+                return 1
+        elif args.command == "jobs":
+            for job in await client.list_jobs():
+                print(f"{job['name']:<30} {job['status']:<12} "
+                      f"{job['completed_segments']}/{job['total_segments']} done, {job['failed_segments']} failed")
+        elif args.command == "rate":
+            from src.utils.helpers import format_rate
+            if args.job is not None:
+                if args.rate is None:
+                    rate = (await client.get_job(args.job))["rate_limit"]
+                else:
+                    rate = (await client.set_job_rate(args.job, args.rate))["rate_limit"]
+                print(f"{args.job}: {format_rate(rate)}")
+            else:
+                if args.rate is None:
+                    rate = await client.get_global_rate()
+                else:
+                    rate = await client.set_global_rate(args.rate)
+                print(f"Global: {format_rate(rate)}")
+        elif args.command == "watch":
+            async for event in client.events():
+                print(json.dumps(event), flush=True)
+        else:
+            method = getattr(client, args.command)
+            job = await method(args.name)
+            print(f"{job['name']}: {job['status']}")
+    except DaemonError as e:
+        print(f"fastflux: error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        await client.close()
+    return 0
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "download":
+            return asyncio.run(run_download(args))
+        if args.command == "daemon":
+            return asyncio.run(run_daemon(args))
+        if args.command == "hosts":
+            return run_hosts(args)
+        if args.command == "merge":
+            return asyncio.run(run_merge(args))
+        return asyncio.run(run_client_command(args))
+    except KeyboardInterrupt:
+        print("Interrupted - cached segments are kept for resume.", file=sys.stderr)
+        return 130
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,52 @@ import os
 from dataclasses import dataclass, asdict
 from typing import Optional
 
-CONFIG_FILE = "config.json"
+# Next to src/, not in the current directory, so the CLI and GUI find it from anywhere;
+# FASTFLUX_CONFIG points elsewhere
+CONFIG_FILE = os.environ.get("FASTFLUX_CONFIG") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
 
 @dataclass
 class AppConfig:
     download_folder: str = ""
     max_concurrent_downloads: int = 20
     global_padding: Optional[str] = None  # "00", "000", etc. or None
+    write_buffer_mb: int = 64  # Write-behind budget; downloads stall when the disk lags this far
+    io_threads: int = 4  # Dedicated disk I/O threads
+    worker_processes: int = 1  # >1 shards downloads across that many processes
+    daemon_address: str = "127.0.0.1:8765"  # "host:port" or "unix:/path/to.sock"
+    use_daemon: bool = False  # GUI attaches to a running daemon instead of embedding the engine
+    max_active_jobs: int = 4  # Daemon: jobs downloading at once, the rest wait queued; 0 = no limit
+    max_download_rate: int = 0  # Global bandwidth cap in bytes/s; 0 = unlimited
+    # Learn each host's best concurrency (capped by max_concurrent_downloads) and start
+    # its next jobs there; profiles are kept in .fastflux_hosts.json in the download folder
+    host_tuning: bool = True
+    # Segment durability: "none" (atomic rename only; survives app crashes),
+    # "file" (fsync each segment before the rename; survives power loss) or
+    # "full" (also fsync the cache directory after the rename)
+    durability: str = "none"
+    checksum_algorithm: str = "crc32"  # Segment/output hashes: "crc32" (fast) or e.g. "sha256"
+    validate_segments: bool = True  # Check .ts segments' packet structure before a job completes
+    validation_processes: int = 0  # Process pool size for validating large jobs; 0 = CPU count
+    merge_threads: int = 4  # Parallel positional merge; 1 = sequential copy (better on spinning disks)
+    # "keep" segments until Clear Cache, "consume" (delete each segment once merged)
+    # or "auto" (consume only when the volume cannot hold the cache and the output)
+    merge_mode: str = "auto"
+    # "concat" joins segments as they are; "remux" writes the .mp4 output of a TS job
+    # as a real fragmented MP4 (H.264/AAC) in the same pass
+    merge_backend: str = "concat"
+    # "files" (one NNNNN.ts per segment) or "pack" (one segments.pack + index per job)
+    cache_layout: str = "files"
+    # Keep finished segments in RAM (up to this many MB) and write the output while
+    # downloading; out-of-order overflow spills to the cache. 0 = off
+    memory_budget_mb: int = 0
+    # Cache shared by all jobs, keyed by segment URL, LRU-evicted beyond this size. 0 = off
+    shared_cache_mb: int = 0
+    shared_cache_dir: str = ""  # Default: SharedCache inside the download folder
+    max_bandwidth: int = 0  # HLS master playlists: best variant within this many bits/s; 0 = best
+    live_poll_interval: float = 2.0  # Follow mode: seconds between probes of an [index] template
+    live_timeout: int = 60  # Follow mode: the stream is over after this many seconds without a new segment
+    playback_port: int = 8766  # download --watch: local port players stream in-progress jobs from
 
 class ConfigManager:
     _instance = None
@@ -57,3 +96,7 @@ class ConfigManager:
     def set_global_padding(self, value: Optional[str]):
         self.config.global_padding = value
         self.save_config()
+
+    def set_max_download_rate(self, value: int):
+        self.config.max_download_rate = value
+        self.save_config()
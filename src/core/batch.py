@@ -0,0 +1,99 @@
+import csv
+import json
+from typing import List, Optional
+from src.core.hls import is_playlist_url
+from src.utils.helpers import parse_rate
+
+# Manifest columns / keys, as in the daemon's POST /jobs body
+MANIFEST_FIELDS = ("base_url", "start", "end", "filename", "priority", "padding", "rate_limit", "follow")
+# Accepted alternative names
+_ALIASES = {"url": "base_url", "output": "filename"}
+_TRUE = ("1", "true", "yes", "y")
+
+
+def read_manifest(path: str) -> List[dict]:
+    """
+    Reads a batch of job definitions, one job per line: JSON Lines (.jsonl,
+    one object per line) or CSV with a header row. Keys are those of the
+    daemon's POST /jobs body (MANIFEST_FIELDS); only base_url is required,
+    start/end may be left out for playlists. Blank lines and lines starting
+    with "#" are skipped. Raises ValueError naming the offending line.
+    """
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        text = f.read()
+    if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+        rows = _jsonl_rows(text)
+    else:
+        rows = _csv_rows(text)
+
+    entries = []
+    for line, row in rows:
+        try:
+            entries.append(manifest_entry(row))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path}:{line}: {e}")
+    return entries
+
+
+def _jsonl_rows(text: str):
+    for line, raw in enumerate(text.splitlines(), 1):
+        raw = raw.strip()
+        if not raw or raw.startswith("#"):
+            continue
+        try:
+            row = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {line}: invalid JSON ({e.msg})")
+        if not isinstance(row, dict):
+            raise ValueError(f"line {line}: expected a JSON object")
+        yield line, row
+
+
+def _csv_rows(text: str):
+    lines = [(n, raw) for n, raw in enumerate(text.splitlines(), 1) if raw.strip() and not raw.startswith("#")]
+    if not lines:
+        return
+    reader = csv.DictReader((raw for _, raw in lines), skipinitialspace=True)
+    for (line, _), row in zip(lines[1:], reader):
+        if None in row:
+            raise ValueError(f"line {line}: more values than header columns")
+        yield line, {k.strip().lower(): v for k, v in row.items() if k}
+
+
+def _optional_int(value) -> Optional[int]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return int(value)
+
+
+def manifest_entry(row: dict) -> dict:
+    """Normalizes one manifest row into a POST /jobs body."""
+    row = {_ALIASES.get(k, k): v for k, v in row.items()}
+    unknown = set(row) - set(MANIFEST_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown field(s) {', '.join(sorted(unknown))}")
+    base_url = (row.get("base_url") or "").strip()
+    if not base_url:
+        raise ValueError("base_url is missing")
+
+    follow = row.get("follow")
+    follow = follow.strip().lower() in _TRUE if isinstance(follow, str) else bool(follow)
+    start, end = _optional_int(row.get("start")), _optional_int(row.get("end"))
+    if not is_playlist_url(base_url):
+        if start is None or (end is None and not follow):
+            raise ValueError("start and end are required unless base_url is an .m3u8 playlist")
+        if end is not None and start > end:
+            raise ValueError("start must be <= end")
+
+    rate_limit = row.get("rate_limit") or 0
+    padding = str(row.get("padding") or "").strip()
+    return {
+        "base_url": base_url,
+        "start": start,
+        "end": end,
+        "filename": (row.get("filename") or "").strip(),
+        "padding": padding or None,
+        "rate_limit": parse_rate(rate_limit) if isinstance(rate_limit, str) else int(rate_limit),
+        "priority": _optional_int(row.get("priority")) or 0,
+        "follow": follow,
+    }
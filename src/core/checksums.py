@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_ALGORITHM = "crc32"
+MANIFEST_FILENAME = "manifest.json"
+# Minimum seconds between manifest writes while a job is downloading
+SAVE_INTERVAL = 1.0
+
+
+class Crc32:
+    """hashlib-style wrapper around zlib.crc32 (fast, non-cryptographic)."""
+    name = "crc32"
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self) -> str:
+        return f"{self.value:08x}"
+
+
+def new_hasher(algorithm: Optional[str] = DEFAULT_ALGORITHM):
+    """
+    Returns a fresh hasher: "crc32" or any hashlib algorithm name (e.g.
+    "sha256"). "none" (or None) disables hashing and returns None.
+    """
+    if not algorithm or algorithm == "none":
+        return None
+    if algorithm == "crc32":
+        return Crc32()
+    return hashlib.new(algorithm)
+
+
+def hash_file(path: str, algorithm: Optional[str] = DEFAULT_ALGORITHM) -> Optional[str]:
+    """Hex digest of a whole file (None when hashing is off). Blocking."""
+    hasher = new_hasher(algorithm)
+    if hasher is None:
+        return None
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _gf2_times(matrix: List[int], vector: int) -> int:
+    result = 0
+    i = 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[i]
+        vector >>= 1
+        i += 1
+    return result
+
+
+def _gf2_square(matrix: List[int]) -> List[int]:
+    return [_gf2_times(matrix, row) for row in matrix]
+
+
+def _zero_byte_operators() -> List[List[int]]:
+    """Operators that advance a CRC-32 over 2**k zero bytes, k = 0..63 (as in zlib)."""
+    one_bit = [0xEDB88320] + [1 << n for n in range(31)]
+    op = _gf2_square(_gf2_square(_gf2_square(one_bit)))  # 8 bits = 1 byte
+    operators = [op]
+    for _ in range(63):
+        op = _gf2_square(op)
+        operators.append(op)
+    return operators
+
+
+_ZERO_OPERATORS = None
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """
+    CRC-32 of A+B from crc(A), crc(B) and len(B), without touching the
+    data. Lets segments be hashed in parallel and still yield the hash of
+    the whole output.
+    """
+    global _ZERO_OPERATORS
+    if _ZERO_OPERATORS is None:
+        _ZERO_OPERATORS = _zero_byte_operators()
+    k = 0
+    while len2:
+        if len2 & 1:
+            crc1 = _gf2_times(_ZERO_OPERATORS[k], crc1)
+        len2 >>= 1
+        k += 1
+    return crc1 ^ crc2
+
+
+class Manifest:
+    """
+    Per-job record of segment sizes and hashes, stored as manifest.json in
+    the job's cache folder. Hashes are taken while the bytes stream in, so
+    the merge can verify every segment while copying it, without a
+    separate read pass. The merged file's hash is kept under "output".
+    """
+    def __init__(self, path: str, algorithm: str = DEFAULT_ALGORITHM):
+        self.path = path
+        self.algorithm = algorithm
+        self.segments: Dict[int, Tuple[int, str]] = {}  # index -> (size, hash)
+        self.output: Optional[dict] = None
+        self.dirty = False
+        self.last_save = 0.0
+        self.saving = False  # A background save is queued or running
+        self.version = 0     # Snapshots taken
+        self.written = 0     # Newest snapshot on disk
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, cache_dir: str, algorithm: str = DEFAULT_ALGORITHM) -> "Manifest":
+        manifest = cls(os.path.join(cache_dir, MANIFEST_FILENAME), algorithm)
+        if not os.path.exists(manifest.path):
+            return manifest
+        try:
+            with open(manifest.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading manifest: {e}")
+            return manifest
+        # Hashes of another algorithm cannot be compared; start over
+        if data.get("algorithm") == algorithm:
+            manifest.segments = {int(i): (entry["size"], entry["hash"])
+                                 for i, entry in data.get("segments", {}).items()}
+            manifest.output = data.get("output")
+        return manifest
+
+    def record(self, index: int, size: int, digest: str):
+        self.segments[index] = (size, digest)
+        self.dirty = True
+
+    def due(self) -> bool:
+        """True when unsaved entries are older than SAVE_INTERVAL and no save is under way."""
+        return self.dirty and not self.saving and time.monotonic() - self.last_save >= SAVE_INTERVAL
+
+    def save_in(self, executor):
+        """
+        Periodic save that keeps the event loop free: only the entries are
+        copied here; serializing and writing run on an executor thread.
+        """
+        if self.saving or not self.dirty:
+            return
+        self.saving = True
+        executor.submit(self._write_in_background, self.snapshot())
+
+    def _write_in_background(self, snapshot):
+        try:
+            self.write(snapshot)
+        finally:
+            self.saving = False
+
+    def get(self, index: int) -> Optional[str]:
+        entry = self.segments.get(index)
+        return entry[1] if entry else None
+
+    def set_output(self, filename: str, size: int, digest: str):
+        self.output = {"filename": filename, "size": size, "hash": digest}
+        self.dirty = True
+
+    def snapshot(self) -> tuple:
+        self.dirty = False
+        self.last_save = time.monotonic()
+        self.version += 1
+        return self.version, dict(self.segments), self.output
+
+    def write(self, snapshot: tuple):
+        """Writes a snapshot (blocking); one older than the file's content is dropped."""
+        version, segments, output = snapshot
+        data = {
+            "algorithm": self.algorithm,
+            "segments": {str(i): {"size": size, "hash": digest}
+                         for i, (size, digest) in sorted(segments.items())},
+            "output": output,
+        }
+        tmp_path = self.path + ".tmp"
+        with self.lock:
+            if version <= self.written:
+                return
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+                self.written = version
+            except Exception as e:
+                print(f"Error saving manifest: {e}")
+                self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            self.write(self.snapshot())
@@ -0,0 +1,389 @@
+import asyncio
+import json
+import os
+from typing import Dict, Optional, Set
+import aiohttp
+from aiohttp import web
+from src.config import ConfigManager
+from src.core.types import Job, JobStatus, SegmentStatus
+from src.core.segment_manager import SegmentManager
+from src.core.sharding import create_downloader
+from src.core.merger import Merger
+from src.core.jobs import build_job, build_playlist_job, merge_job, resolve_playlist_job
+from src.core.hls import is_playlist_url
+from src.core.job_queue import JobQueue, job_to_dict, status_value
+from src.core.playback import PlaybackServer
+from src.utils.helpers import parse_address
+
+QUEUE_FILENAME = ".fastflux_queue.json"
+# Playlists of a batch resolved at once
+BATCH_RESOLVE_CONCURRENCY = 8
+
+
+class JobDaemon:
+    """
+    Long-running engine host. Owns the persistent job queue and the shared
+    Downloader, and exposes a small JSON control API on a local socket:
+
+        POST /jobs                  submit {base_url, start, end, filename, padding, rate_limit, follow,
+                                    playback, priority}; an HLS playlist URL needs no start/end (or pass its {urls})
+        POST /jobs/batch            submit {jobs: [...]} (bodies as above); returns {submitted, errors}
+        GET  /jobs                  list jobs
+        GET  /jobs/{name}           job detail incl. per-segment status string
+        GET  /jobs/{name}/stream    the output downloaded so far, for a player (see playback.py)
+        POST /jobs/{name}/cancel    cancel
+        POST /jobs/{name}/pause     pause (completed segments stay cached)
+        POST /jobs/{name}/resume    resume a paused job
+        POST /jobs/{name}/stop      stop following a live job; it is then completed and merged
+        POST /jobs/{name}/rate      set the job's bandwidth cap {rate} (bytes/s, 0 = unlimited)
+        GET  /rate, POST /rate      read / set the global bandwidth cap {rate}
+        GET  /events                newline-delimited JSON progress stream
+
+    At most max_active_jobs jobs download at once; the others wait queued and
+    start by priority as slots free up. Live (follow) and watched (playback)
+    jobs start right away and do not take a slot.
+    """
+    def __init__(self, download_folder: str, max_concurrent: Optional[int] = None,
+                 processes: Optional[int] = None, max_rate: Optional[int] = None,
+                 max_active_jobs: Optional[int] = None):
+        self.download_folder = download_folder
+        self.segment_manager = SegmentManager(download_folder)
+        self.downloader = create_downloader(self.segment_manager, max_concurrent, processes, max_rate)
+        self.merger = Merger()
+        self.queue = JobQueue(os.path.join(download_folder, QUEUE_FILENAME))
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.max_active_jobs = (max_active_jobs if max_active_jobs is not None
+                                else ConfigManager().get_config().max_active_jobs)
+        self.active: Set[str] = set()  # Jobs holding a download slot
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.runner: Optional[web.AppRunner] = None
+        self.stopping = False
+        self.paused_at_stop: Set[str] = set()
+        self.playback = PlaybackServer(self.downloader, self.queue.jobs)
+
+        events = self.downloader.events
+        events.segment_status_changed.connect(
+            lambda name, index, status: self.broadcast("segment", name, index=index, status=status))
+        events.job_progress_updated.connect(
+            lambda name, progress, speed, eta: self.broadcast("progress", name, progress=progress, speed=speed, eta=eta))
+        events.job_failed.connect(lambda name, error: self.broadcast("failed", name, error=error))
+        events.job_cancelled.connect(self._on_cancelled)
+        events.job_paused.connect(lambda name: self._on_state_change("paused", name))
+        events.job_resumed.connect(lambda name: self._on_state_change("resumed", name))
+        # Saved so a restarted daemon knows every segment that may already be in the output
+        events.job_extended.connect(lambda name, end: self._on_state_change("extended", name, end=end))
+
+    # === Events ===
+
+    def broadcast(self, event_type: str, job_name: str, **data):
+        event = {"type": event_type, "job": job_name, **data}
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client: drop the event rather than stall the engine
+                pass
+
+    def _on_cancelled(self, job_name: str):
+        # Shutdown cancels everything but the jobs stay queued; don't report that
+        if not self.stopping:
+            self.broadcast("cancelled", job_name)
+            self.queue.save()
+
+    def _on_state_change(self, event_type: str, job_name: str, **data):
+        self.broadcast(event_type, job_name, **data)
+        self.queue.save()
+
+    # === Job control ===
+
+    def submit(self, job: Job) -> Job:
+        self.queue.add(job)
+        self.broadcast("submitted", job.name, job=job_to_dict(job))
+        self._schedule()
+        return job
+
+    def _schedule(self):
+        """Starts waiting jobs, highest priority first, while download slots are free."""
+        if self.stopping:
+            return
+        for job in self.queue.waiting():
+            if job.name in self.tasks:
+                continue
+            if self.max_active_jobs and len(self.active) >= self.max_active_jobs and not _unlimited(job):
+                continue
+            self._start(job)
+
+    def _start(self, job: Job):
+        job.status = JobStatus.QUEUED
+        if not _unlimited(job):
+            self.active.add(job.name)
+        self.tasks[job.name] = asyncio.create_task(self._run(job))
+
+    def _release(self, job: Job):
+        """Frees the job's download slot for the next waiting job."""
+        if job.name in self.active:
+            self.active.discard(job.name)
+            self._schedule()
+
+    async def _run(self, job: Job):
+        try:
+            await self.downloader.start_job(job)
+            # Merging needs no download slot
+            self._release(job)
+
+            if self.stopping:
+                # Interrupted by shutdown: keep it queued (or paused) for the next start
+                job.status = JobStatus.PAUSED if job.name in self.paused_at_stop else JobStatus.QUEUED
+                return
+            if status_value(job.status) == JobStatus.CANCELLED.value:
+                return
+            if not all(s.status == SegmentStatus.COMPLETED for s in job.segments):
+                job.status = JobStatus.FAILED
+                return
+
+            self.broadcast("completed", job.name)
+            success, valid, output_path = await merge_job(
+                self.segment_manager, self.merger, job, self.download_folder)
+            job.status = JobStatus.COMPLETED if success and valid else JobStatus.MERGE_ERROR
+            self.broadcast("merged", job.name, success=success, valid=valid, output_path=output_path)
+        except Exception as e:
+            print(f"Daemon job {job.name} error: {e}")
+            job.status = JobStatus.FAILED
+            self.broadcast("failed", job.name, error=str(e))
+        finally:
+            self.tasks.pop(job.name, None)
+            self._release(job)
+            self.queue.save()
+
+    def cancel(self, job: Job):
+        if job.name in self.tasks:
+            self.downloader.cancel_job(job.name)
+        elif status_value(job.status) in (JobStatus.QUEUED.value, JobStatus.PAUSED.value):
+            job.status = JobStatus.CANCELLED
+            self.broadcast("cancelled", job.name)
+            self.queue.save()
+
+    def pause(self, job: Job):
+        if job.name not in self.tasks or job.status != JobStatus.RUNNING:
+            raise ValueError(f"Job '{job.name}' is not running")
+        self.downloader.pause_job(job.name)
+        self._release(job)
+
+    def resume(self, job: Job):
+        if job.status != JobStatus.PAUSED:
+            raise ValueError(f"Job '{job.name}' is not paused")
+        if job.name in self.tasks:
+            if not _unlimited(job):
+                self.active.add(job.name)  # May go over max_active_jobs until a job finishes
+            self.downloader.resume_job(job.name)
+        else:
+            # Paused before the daemon restarted: start it again from the cache
+            self._start(job)
+            self.queue.save()
+            self.broadcast("resumed", job.name)
+
+    def stop_following(self, job: Job):
+        if job.name not in self.tasks or not job.follow:
+            raise ValueError(f"Job '{job.name}' is not following a live stream")
+        self.downloader.stop_following(job.name)
+        self.queue.save()
+
+    def set_rate(self, job: Job, rate: int):
+        job.rate_limit = rate
+        if job.name in self.tasks:
+            self.downloader.set_job_rate(job.name, rate)
+        self.queue.save()
+        self.broadcast("rate", job.name, rate=rate)
+
+    # === HTTP API ===
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/jobs", self.handle_submit)
+        app.router.add_post("/jobs/batch", self.handle_batch)
+        app.router.add_get("/jobs", self.handle_list)
+        app.router.add_get("/jobs/{name}", self.handle_get)
+        self.playback.add_routes(app)
+        app.router.add_post("/jobs/{name}/rate", self.handle_job_rate)
+        app.router.add_post("/jobs/{name}/{action}", self.handle_action)
+        app.router.add_get("/rate", self.handle_get_rate)
+        app.router.add_post("/rate", self.handle_set_rate)
+        app.router.add_get("/events", self.handle_events)
+        return app
+
+    @staticmethod
+    def _error(status: int, message: str) -> web.Response:
+        return web.json_response({"error": message}, status=status)
+
+    @staticmethod
+    async def _build_job(body: dict) -> Job:
+        follow = bool(body.get("follow"))
+        if body.get("urls"):
+            job = build_playlist_job(body["base_url"], list(body["urls"]), body.get("filename", ""), follow,
+                                     body.get("keys"))
+        elif body.get("start") is None and is_playlist_url(body["base_url"]):
+            job = await resolve_playlist_job(body["base_url"], body.get("filename", ""), follow=follow)
+        else:
+            start = int(body["start"])
+            end = int(body["end"]) if body.get("end") is not None or not follow else start - 1
+            job = build_job(body["base_url"], start, end, body.get("filename", ""), body.get("padding"), follow)
+        job.rate_limit = int(body.get("rate_limit") or 0)
+        job.playback = bool(body.get("playback"))
+        job.priority = int(body.get("priority") or 0)
+        return job
+
+    async def handle_submit(self, request: web.Request) -> web.Response:
+        try:
+            job = await self._build_job(await request.json())
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error(400, f"Invalid job request: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return self._error(502, f"Cannot load playlist: {e}")
+        try:
+            self.submit(job)
+        except ValueError as e:
+            return self._error(409, str(e))
+        return web.json_response(job_to_dict(job), status=201)
+
+    async def handle_batch(self, request: web.Request) -> web.Response:
+        """Queues many jobs with one request and one queue save; bad entries are reported, not fatal."""
+        try:
+            entries = list((await request.json())["jobs"])
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error(400, f"Invalid batch request: {e}")
+
+        resolving = asyncio.Semaphore(BATCH_RESOLVE_CONCURRENCY)
+
+        async def build(body):
+            try:
+                async with resolving:
+                    return await self._build_job(body)
+            except (KeyError, TypeError, ValueError) as e:
+                return f"Invalid job request: {e}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return f"Cannot load playlist: {e}"
+
+        submitted, errors = [], []
+        for number, job in enumerate(await asyncio.gather(*(build(body) for body in entries))):
+            if isinstance(job, Job):
+                try:
+                    self.queue.add(job, save=False)
+                except ValueError as e:
+                    job = str(e)
+            if isinstance(job, str):
+                errors.append({"index": number, "error": job})
+                continue
+            submitted.append(job_to_dict(job))
+            self.broadcast("submitted", job.name, job=submitted[-1])
+        self.queue.save()
+        self._schedule()
+        return web.json_response({"submitted": submitted, "errors": errors})
+
+    async def handle_list(self, request: web.Request) -> web.Response:
+        return web.json_response([job_to_dict(j) for j in self.queue.jobs.values()])
+
+    async def handle_get(self, request: web.Request) -> web.Response:
+        job = self.queue.get(request.match_info["name"])
+        if job is None:
+            return self._error(404, "Unknown job")
+        return web.json_response(job_to_dict(job, include_segments=True))
+
+    async def handle_action(self, request: web.Request) -> web.Response:
+        job = self.queue.get(request.match_info["name"])
+        if job is None:
+            return self._error(404, "Unknown job")
+        actions = {"cancel": self.cancel, "pause": self.pause, "resume": self.resume,
+                   "stop": self.stop_following}
+        action = actions.get(request.match_info["action"])
+        if action is None:
+            return self._error(404, "Unknown action")
+        try:
+            action(job)
+        except ValueError as e:
+            return self._error(409, str(e))
+        return web.json_response(job_to_dict(job))
+
+    @staticmethod
+    async def _read_rate(request: web.Request) -> int:
+        body = await request.json()
+        rate = int(body["rate"])
+        if rate < 0:
+            raise ValueError("rate must be >= 0")
+        return rate
+
+    async def handle_job_rate(self, request: web.Request) -> web.Response:
+        job = self.queue.get(request.match_info["name"])
+        if job is None:
+            return self._error(404, "Unknown job")
+        try:
+            self.set_rate(job, await self._read_rate(request))
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error(400, f"Invalid rate: {e}")
+        return web.json_response(job_to_dict(job))
+
+    async def handle_get_rate(self, request: web.Request) -> web.Response:
+        return web.json_response({"rate": int(self.downloader.global_limiter.rate)})
+
+    async def handle_set_rate(self, request: web.Request) -> web.Response:
+        try:
+            rate = await self._read_rate(request)
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error(400, f"Invalid rate: {e}")
+        self.downloader.set_global_rate(rate)
+        self.broadcast("rate", None, rate=rate)
+        return web.json_response({"rate": rate})
+
+    async def handle_events(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        queue = asyncio.Queue(maxsize=10000)
+        self.subscribers.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                await response.write(json.dumps(event).encode() + b"\n")
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(queue)
+        return response
+
+    # === Lifecycle ===
+
+    async def start(self, address: str):
+        os.makedirs(self.download_folder, exist_ok=True)
+        self.queue.load()
+        self._schedule()
+
+        self.runner = web.AppRunner(self.create_app())
+        await self.runner.setup()
+        parsed = parse_address(address)
+        if parsed[0] == "unix":
+            site = web.UnixSite(self.runner, parsed[1])
+        else:
+            site = web.TCPSite(self.runner, parsed[1], parsed[2])
+        await site.start()
+
+    async def stop(self):
+        self.stopping = True
+        self.paused_at_stop = {name for name, job in self.queue.jobs.items() if job.status == JobStatus.PAUSED}
+        for name in list(self.tasks):
+            self.downloader.cancel_job(name)
+        if self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        if self.runner:
+            await self.runner.cleanup()
+        await self.downloader.close()
+        self.merger.shutdown()
+
+    async def serve_forever(self, address: str):
+        await self.start(address)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+
+def _unlimited(job: Job) -> bool:
+    """Live and watched jobs cannot wait for a slot."""
+    return job.follow or job.playback
@@ -0,0 +1,224 @@
+import asyncio
+import json
+from typing import AsyncIterator, List, Optional
+from urllib.parse import quote
+import aiohttp
+from src.core.types import Job
+from src.core.events import DownloaderEvents
+from src.core.hls import is_playlist_url
+from src.core.jobs import segment_keys
+from src.utils.helpers import parse_address
+
+
+def job_path(name: str) -> str:
+    """URL path of a job; names are quoted whole, as they may hold spaces, '#', '?' or '/'."""
+    return "/jobs/" + quote(name, safe="")
+
+
+class DaemonError(Exception):
+    """Raised when the daemon is unreachable or rejects a request."""
+
+
+class DaemonClient:
+    """Thin async client for the JobDaemon control API."""
+
+    def __init__(self, address: str):
+        self.address = address
+        self.session: Optional[aiohttp.ClientSession] = None
+        parsed = parse_address(address)
+        if parsed[0] == "unix":
+            self._socket_path = parsed[1]
+            self.base_url = "http://localhost"
+        else:
+            self._socket_path = None
+            self.base_url = f"http://{parsed[1]}:{parsed[2]}"
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.UnixConnector(path=self._socket_path) if self._socket_path else None
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _request(self, method: str, path: str, **kwargs):
+        try:
+            async with self._get_session().request(method, self.base_url + path, **kwargs) as response:
+                if response.status >= 400:
+                    # Errors from the daemon are JSON; a proxy or aiohttp's own may be plain text
+                    try:
+                        error = (await response.json(content_type=None)).get("error")
+                    except (ValueError, AttributeError):
+                        error = None
+                    raise DaemonError(error or f"HTTP {response.status}")
+                return await response.json()
+        except aiohttp.ClientError as e:
+            raise DaemonError(f"Cannot reach daemon at {self.address}: {e}")
+
+    async def submit(self, base_url: str, start: Optional[int], end: Optional[int], filename: str,
+                     padding: Optional[str] = None, rate_limit: int = 0,
+                     urls: Optional[List[str]] = None, follow: bool = False,
+                     keys: Optional[list] = None, playback: bool = False, priority: int = 0) -> dict:
+        """start/end may be None for an HLS playlist URL (resolved by the daemon), end also for follow jobs."""
+        body = {"base_url": base_url, "start": start, "end": end, "filename": filename, "padding": padding,
+                "rate_limit": rate_limit, "follow": follow, "playback": playback, "priority": priority}
+        if urls:
+            body["urls"] = urls
+        if keys:
+            body["keys"] = keys  # Per segment: [key URL, IV hex] or None
+        return await self._request("POST", "/jobs", json=body)
+
+    async def submit_batch(self, entries: List[dict]) -> dict:
+        """Queues POST /jobs bodies in one request; returns {"submitted": [...], "errors": [{index, error}]}."""
+        return await self._request("POST", "/jobs/batch", json={"jobs": entries})
+
+    async def list_jobs(self) -> List[dict]:
+        return await self._request("GET", "/jobs")
+
+    async def get_job(self, name: str) -> dict:
+        return await self._request("GET", job_path(name))
+
+    async def cancel(self, name: str) -> dict:
+        return await self._request("POST", f"{job_path(name)}/cancel")
+
+    async def pause(self, name: str) -> dict:
+        return await self._request("POST", f"{job_path(name)}/pause")
+
+    async def resume(self, name: str) -> dict:
+        return await self._request("POST", f"{job_path(name)}/resume")
+
+    async def stop(self, name: str) -> dict:
+        return await self._request("POST", f"{job_path(name)}/stop")
+
+    async def set_job_rate(self, name: str, rate: int) -> dict:
+        return await self._request("POST", f"{job_path(name)}/rate", json={"rate": rate})
+
+    async def get_global_rate(self) -> int:
+        return (await self._request("GET", "/rate"))["rate"]
+
+    async def set_global_rate(self, rate: int) -> int:
+        return (await self._request("POST", "/rate", json={"rate": rate}))["rate"]
+
+    async def events(self) -> AsyncIterator[dict]:
+        """Yields progress events until the daemon closes the stream."""
+        try:
+            async with self._get_session().get(self.base_url + "/events", timeout=None) as response:
+                async for line in response.content:
+                    if line.strip():
+                        yield json.loads(line)
+        except aiohttp.ClientError as e:
+            raise DaemonError(f"Event stream lost: {e}")
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+
+
+class RemoteDownloader:
+    """
+    Stand-in for Downloader used when the GUI attaches to a daemon.
+    Jobs are submitted to the daemon and its event stream is re-emitted on
+    the same DownloaderEvents interface, so the UI code is unchanged.
+    """
+    merges_remotely = True
+
+    def __init__(self, address: str):
+        self.client = DaemonClient(address)
+        self.events = DownloaderEvents()
+        self._listener: Optional[asyncio.Task] = None
+        self._local = None
+
+    async def attach(self) -> List[dict]:
+        """Starts listening for events and returns a snapshot of the daemon's jobs."""
+        self._ensure_listener()
+        jobs = await self.client.list_jobs()
+        return [await self.client.get_job(j["name"]) for j in jobs]
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                async for event in self.client.events():
+                    self._dispatch(event)
+            except DaemonError as e:
+                print(f"Daemon connection: {e}")
+            # Reconnect after the daemon restarts
+            await asyncio.sleep(2)
+
+    def _dispatch(self, event: dict):
+        name = event.get("job")
+        kind = event.get("type")
+        if kind == "segment":
+            self.events.segment_status_changed.emit(name, event["index"], event["status"])
+        elif kind == "progress":
+            self.events.job_progress_updated.emit(name, event["progress"], event["speed"], event["eta"])
+        elif kind == "completed":
+            self.events.job_completed.emit(name)
+        elif kind == "failed":
+            self.events.job_failed.emit(name, event.get("error", ""))
+        elif kind == "cancelled":
+            self.events.job_cancelled.emit(name)
+        elif kind == "paused":
+            self.events.job_paused.emit(name)
+        elif kind == "resumed":
+            self.events.job_resumed.emit(name)
+        elif kind == "extended":
+            self.events.job_extended.emit(name, event["end"])
+        elif kind == "merged":
+            self.events.job_merged.emit(name, event["success"], event["valid"], event["output_path"])
+
+    async def start_job(self, job: Job):
+        self._ensure_listener()
+        try:
+            urls = [s.url for s in job.segments] if is_playlist_url(job.base_url) else None
+            await self.client.submit(job.base_url, job.start_index, job.end_index,
+                                     job.output_filename, job.padding, job.rate_limit, urls, job.follow,
+                                     segment_keys(job), job.playback, job.priority)
+        except DaemonError as e:
+            self.events.job_failed.emit(job.name, str(e))
+
+    def cancel_job(self, job_name: str):
+        asyncio.create_task(self._call(self.client.cancel, job_name))
+
+    def pause_job(self, job_name: str):
+        asyncio.create_task(self._call(self.client.pause, job_name))
+
+    def resume_job(self, job_name: str):
+        asyncio.create_task(self._call(self.client.resume, job_name))
+
+    def stop_following(self, job_name: str):
+        asyncio.create_task(self._call(self.client.stop, job_name))
+
+    def set_job_rate(self, job_name: str, rate: int):
+        asyncio.create_task(self._call(self.client.set_job_rate, job_name, rate))
+
+    def set_global_rate(self, rate: int):
+        asyncio.create_task(self._set_global_rate(rate))
+
+    async def _call(self, method, job_name: str, *args):
+        try:
+            await method(job_name, *args)
+        except DaemonError as e:
+            self.events.job_failed.emit(job_name, str(e))
+
+    async def _set_global_rate(self, rate: int):
+        try:
+            await self.client.set_global_rate(rate)
+        except DaemonError as e:
+            print(f"Daemon connection: {e}")
+
+    async def test_connectivity(self, first_url: str, last_url: str):
+        # URL checks do not need the daemon; run them locally
+        if self._local is None:
+            from src.core.downloader import Downloader
+            self._local = Downloader(None)
+            self._local.events.connectivity_tested.connect(self.events.connectivity_tested.emit)
+        return await self._local.test_connectivity(first_url, last_url)
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+        if self._local:
+            await self._local.close()
+        await self.client.close()
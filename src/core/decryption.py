@@ -0,0 +1,81 @@
+import asyncio
+from typing import Dict
+import aiohttp
+
+try:
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # Optional: only needed for encrypted (AES-128) HLS playlists
+    Cipher = None
+
+KEY_SIZE = 16
+
+
+def crypto_available() -> bool:
+    return Cipher is not None
+
+
+def require_crypto():
+    if Cipher is None:
+        raise ValueError("Encrypted playlist: install the 'cryptography' package to decrypt it")
+
+
+def sequence_iv(sequence: int) -> str:
+    """RFC 8216 5.2: without an IV attribute, the media sequence number is the IV (hex)."""
+    return sequence.to_bytes(16, "big").hex()
+
+
+class SegmentDecryptor:
+    """
+    Streaming AES-128-CBC decryption of one segment with PKCS#7 unpadding.
+    update() returns plaintext as ciphertext arrives, so a segment is
+    decrypted on its way to the cache instead of in a separate pass.
+    """
+    def __init__(self, key: bytes, iv_hex: str):
+        require_crypto()
+        self._decryptor = Cipher(algorithms.AES(key), modes.CBC(bytes.fromhex(iv_hex))).decryptor()
+        self._unpadder = padding.PKCS7(128).unpadder()
+
+    def update(self, data: bytes) -> bytes:
+        return self._unpadder.update(self._decryptor.update(data))
+
+    def finalize(self) -> bytes:
+        """The last block without its padding; raises ValueError for a wrong key or a cut body."""
+        return self._unpadder.update(self._decryptor.finalize()) + self._unpadder.finalize()
+
+    def decrypt(self, data: bytes) -> bytes:
+        return self.update(data) + self.finalize()
+
+
+class KeyCache:
+    """
+    Keys by URL. Segments of a playlist usually share one key, so it is
+    fetched once; concurrent requests for a key wait for the same fetch.
+    """
+    def __init__(self):
+        self.keys: Dict[str, bytes] = {}
+        self._fetches: Dict[str, asyncio.Task] = {}
+
+    async def get(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        key = self.keys.get(url)
+        if key is not None:
+            return key
+        fetch = self._fetches.get(url)
+        if fetch is None:
+            fetch = self._fetches[url] = asyncio.ensure_future(self._fetch(session, url))
+        try:
+            # Shielded: one waiter being cancelled (pause) must not fail the fetch for the others
+            return await asyncio.shield(fetch)
+        finally:
+            if fetch.done():
+                self._fetches.pop(url, None)
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        async with session.get(url, timeout=30) as response:
+            if response.status != 200:
+                raise IOError(f"Key request failed: HTTP {response.status} ({url})")
+            key = await response.read()
+        if len(key) != KEY_SIZE:
+            raise IOError(f"Key at {url} is {len(key)} bytes, expected {KEY_SIZE}")
+        self.keys[url] = key
+        return key
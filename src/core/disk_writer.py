@@ -0,0 +1,204 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+# Binary mode matters on Windows; the flag does not exist elsewhere
+_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+# Stay well below IOV_MAX (1024 on Linux) for a single pwritev call
+_MAX_IOVECS = 512
+_seek_lock = threading.Lock()
+
+
+class WriteHandle:
+    """An open output file with its write-behind buffer."""
+
+    def __init__(self, fd: int, path: str, offset: int = 0, owns_fd: bool = True, hasher=None):
+        self.fd = fd
+        self.path = path
+        self.hasher = hasher          # Fed every byte in file order, on the I/O threads
+        self.offset = offset          # Next absolute file offset to flush to
+        self.start_offset = offset
+        self.owns_fd = owns_fd        # False for shared, pre-opened descriptors
+        self.buffers: List[bytes] = []
+        self.buffered = 0
+        self.last_flush: Optional[asyncio.Task] = None
+        self.error: Optional[BaseException] = None
+        self.closed = False
+
+    @property
+    def size(self) -> int:
+        """Bytes accepted so far (flushed or still buffered)."""
+        return self.offset - self.start_offset + self.buffered
+
+
+class DiskWriter:
+    """
+    Write-behind stage between the network and the disk.
+
+    Chunks are buffered per file and flushed in batches of `batch_size` bytes
+    on a dedicated I/O thread pool (not the default executor, so it does not
+    compete with the Merger or other run_in_executor users). Flushes use
+    positional writes (os.pwritev/os.pwrite) where the OS provides them and
+    are serialized per file, so ordering is kept on every platform. That
+    ordering also lets an optional per-file hasher run on the I/O threads.
+
+    At most `max_pending_bytes` may be buffered or in flight across all
+    files; write() blocks beyond that, which applies back-pressure to the
+    network side when the disk falls behind.
+    """
+    def __init__(self, max_pending_bytes: int = 64 * 1024 * 1024,
+                 batch_size: int = 1024 * 1024, io_threads: int = 4):
+        self.max_pending_bytes = max_pending_bytes
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="fastflux-io")
+        self.pending_bytes = 0
+        self._drained = asyncio.Condition()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def open(self, path: str, hasher=None) -> WriteHandle:
+        fd = await self._run(os.open, path, _OPEN_FLAGS, 0o644)
+        return WriteHandle(fd, path, hasher=hasher)
+
+    def attach(self, fd: int, path: str, offset: int, hasher=None) -> WriteHandle:
+        """Wraps an already open descriptor; writes start at `offset` and the fd is left open."""
+        return WriteHandle(fd, path, offset, owns_fd=False, hasher=hasher)
+
+    async def write(self, handle: WriteHandle, data: bytes):
+        if handle.error:
+            raise handle.error
+        handle.buffers.append(data)
+        handle.buffered += len(data)
+        self.pending_bytes += len(data)
+        if handle.buffered >= self.batch_size:
+            self._flush(handle)
+
+        # Back-pressure: hold the producer until the disk catches up. Our own
+        # partial batch is flushed first so every waiter has a write in flight.
+        if self.pending_bytes > self.max_pending_bytes:
+            self._flush(handle)
+            async with self._drained:
+                await self._drained.wait_for(lambda: self.pending_bytes <= self.max_pending_bytes)
+
+    def _flush(self, handle: WriteHandle):
+        if not handle.buffers:
+            return
+        buffers, size, offset = handle.buffers, handle.buffered, handle.offset
+        handle.buffers, handle.buffered = [], 0
+        handle.offset += size
+        previous = handle.last_flush
+        handle.last_flush = asyncio.create_task(self._flush_batch(handle, previous, buffers, size, offset))
+
+    async def _flush_batch(self, handle: WriteHandle, previous, buffers, size, offset):
+        try:
+            if previous is not None:
+                await asyncio.shield(previous)
+            if handle.error is None:
+                await self._run(_write_at, handle.fd, buffers, offset, handle.hasher)
+        except BaseException as e:
+            handle.error = handle.error or e
+        finally:
+            self.pending_bytes -= size
+            async with self._drained:
+                self._drained.notify_all()
+
+    async def drain(self, handle: WriteHandle):
+        """Flushes everything buffered for this handle and waits for it to hit the OS."""
+        self._flush(handle)
+        if handle.last_flush is not None:
+            await handle.last_flush
+        if handle.error:
+            raise handle.error
+
+    async def close(self, handle: WriteHandle, fsync: bool = False) -> int:
+        """
+        Drains, optionally fsyncs, closes the file and returns the bytes written.
+        On error the file stays open; call abort() to discard it.
+        """
+        await self.drain(handle)
+        if fsync:
+            await self._run(os.fsync, handle.fd)
+        if handle.owns_fd:
+            handle.closed = True
+            await self._run(os.close, handle.fd)
+        return handle.offset - handle.start_offset
+
+    async def abort(self, handle: WriteHandle, remove: bool = True):
+        """Discards a partially written file (safe to call after a failed close)."""
+        # Drop what is still buffered, but let writes already handed to a thread finish
+        self.pending_bytes -= handle.buffered
+        handle.buffers, handle.buffered = [], 0
+        if handle.last_flush is not None:
+            await asyncio.gather(handle.last_flush, return_exceptions=True)
+        async with self._drained:
+            self._drained.notify_all()
+
+        if handle.owns_fd and not handle.closed:
+            handle.closed = True
+            await self._run(os.close, handle.fd)
+            if remove:
+                await self._run(_remove_quietly, handle.path)
+
+    async def commit(self, src: str, dst: str, sync_dir: bool = False):
+        """Atomically moves a finished file into place (optionally fsyncing the directory)."""
+        await self._run(os.replace, src, dst)
+        if sync_dir:
+            await self._run(_fsync_dir, os.path.dirname(dst))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+def _write_at(fd: int, buffers: List[bytes], offset: int, hasher=None):
+    """Writes all buffers contiguously at offset (runs on an I/O thread)."""
+    if hasher is not None:
+        # zlib/hashlib release the GIL on large buffers, so this overlaps with the network side
+        for b in buffers:
+            hasher.update(b)
+    if hasattr(os, "pwritev") and 1 < len(buffers) <= _MAX_IOVECS:
+        views = [memoryview(b) for b in buffers]
+        while views:
+            written = os.pwritev(fd, views, offset)
+            offset += written
+            # Drop fully written buffers and trim a partially written one
+            while views and written >= len(views[0]):
+                written -= len(views[0])
+                views.pop(0)
+            if views and written:
+                views[0] = views[0][written:]
+        return
+
+    data = memoryview(buffers[0] if len(buffers) == 1 else b"".join(buffers))
+    if hasattr(os, "pwrite"):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            offset += written
+            data = data[written:]
+    else:
+        # Windows: no positional writes; the lock covers descriptors shared between handles
+        with _seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+
+
+def _fsync_dir(path: str):
+    """Persists a rename. Directories cannot be opened for fsync on Windows; skipped there."""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
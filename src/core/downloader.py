@@ -1,133 +1,681 @@
 import asyncio
-import os
+import contextlib
 import aiohttp
-import aiofiles
+import bisect
+import os
+import sqlite3
 import time
-from PyQt6.QtCore import QObject, pyqtSignal
-from src.core.types import Job, Segment, SegmentStatus
+from typing import List, Optional
+from src.core.types import Job, JobStatus, Segment, SegmentStatus
 from src.core.segment_manager import SegmentManager
+from src.core.events import DownloaderEvents
+from src.core.disk_writer import DiskWriter
+from src.core.rate_limiter import TokenBucket
+from src.core.checksums import Manifest, hash_file, new_hasher
+from src.core.ts_validator import SegmentValidator, validate_buffer
+from src.core.memory_store import MemoryStore
+from src.core.shared_cache import SHARED_CACHE_DIRNAME, CachedSegment, SharedCache, materialize
+from src.core.live import LIVE_MEMORY_BUDGET, create_live_source
+from src.core.decryption import KeyCache, SegmentDecryptor
+from src.core.hls import MediaSegment
+from src.core.jobs import job_is_ts, wants_remux
+from src.core.host_profiles import PROFILES_FILENAME, THROTTLE_STATUSES, HostTuner, ProfileStore, host_of
 from src.config import ConfigManager
 
-class DownloaderSignals(QObject):
-    # Signals: Job Name, Segment Index, Status
-    segment_status_changed = pyqtSignal(str, int, str) 
-    # Signals: Job Name, Progress (0-100), Speed (str), ETA (str)
-    job_progress_updated = pyqtSignal(str, float, str, str)
-    job_completed = pyqtSignal(str)
-    job_failed = pyqtSignal(str, str)
-    job_cancelled = pyqtSignal(str)
-    # Signals: First URL status (int), Last URL status (int), First error (str), Last error (str)
-    connectivity_tested = pyqtSignal(int, int, str, str)
+# Size of the reads handed from the socket to the disk writer
+CHUNK_SIZE = 64 * 1024
+# Times a segment that fails TS validation is fetched again
+MAX_VALIDATION_RETRIES = 2
+# Playback jobs retry a failed segment straight away this often (a viewer is waiting on it)
+PLAYBACK_RETRIES = 3
+# Stands in for a host's HostTuner when tuning is off
+_UNTUNED = contextlib.nullcontext()
+
 
 class Downloader:
-    def __init__(self, segment_manager: SegmentManager):
+    def __init__(self, segment_manager: SegmentManager, max_concurrent: Optional[int] = None,
+                 max_rate: Optional[int] = None, shard_worker: bool = False):
         self.segment_manager = segment_manager
-        self.signals = DownloaderSignals()
+        self.events = DownloaderEvents()
+        # Overrides the configured concurrency / bandwidth cap (e.g. from the CLI)
+        self.max_concurrent = max_concurrent
         self.active_jobs = {}
-        self.cancellation_tokens = {}  # job_name -> bool (True = cancel requested)
+        self.job_tasks = {}  # job_name -> set of segment tasks (the job's task group)
+        self.resume_events = {}  # job_name -> asyncio.Event set by resume_job/cancel_job
+        self.semaphore = None
+        self.ceiling = 0  # Size of the semaphore
         self.session = None
+        config = ConfigManager().get_config()
+        # Bandwidth: one bucket for everything plus one per job (job.rate_limit)
+        self.global_limiter = TokenBucket(config.max_download_rate if max_rate is None else max_rate)
+        self.job_limiters = {}  # job_name -> TokenBucket
+        self.disk_writer = DiskWriter(
+            max_pending_bytes=config.write_buffer_mb * 1024 * 1024,
+            io_threads=config.io_threads,
+        )
+        self.durability = config.durability
+        self.checksum_algorithm = config.checksum_algorithm
+        # Sharded workers hash but leave the manifest and validation to the parent process
+        self.shard_worker = shard_worker
+        self.manifests = {}  # job_name -> Manifest
+        self.validator = None
+        if config.validate_segments and not shard_worker:
+            self.validator = SegmentValidator(config.validation_processes)
+        # Budget for finished segments kept in RAM while the output is written
+        # (0 = off; None = never write the output here, not even for follow jobs)
+        self.memory_budget = 0 if shard_worker else config.memory_budget_mb * 1024 * 1024
+        self.stores = {}  # job_name -> MemoryStore
+        self.follow_wakeups = {}  # job_name -> asyncio.Event cutting a follow job's poll wait short
+        self.playheads = {}  # job_name -> segment position a viewer is waiting for (playback jobs)
+        self.playback_wakeups = {}  # job_name -> asyncio.Event set when the playhead moves
+        self.keys = KeyCache()  # AES-128 keys of encrypted playlist segments
+        self.shared_cache = None
+        # Not for the URL tester (no segment manager): it only sends HEAD requests
+        if config.shared_cache_mb > 0 and segment_manager is not None:
+            root = config.shared_cache_dir or os.path.join(segment_manager.base_download_path, SHARED_CACHE_DIRNAME)
+            self.shared_cache = SharedCache(root, config.shared_cache_mb * 1024 * 1024)
+        # Learned per-host concurrency (host_profiles.py); sharded workers run untuned
+        self.profiles = None
+        if config.host_tuning and not shard_worker and segment_manager is not None:
+            self.profiles = ProfileStore(os.path.join(segment_manager.base_download_path, PROFILES_FILENAME))
+        self.tuners = {}  # host -> HostTuner, kept across jobs while the budget stays the same
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        Global connection budget shared by all jobs. Rebuilt from the config
+        only while nothing is running, so settings changes apply to the next job.
+        """
+        if self.semaphore is None or not self.job_tasks:
+            max_concurrent = self.max_concurrent or ConfigManager().get_config().max_concurrent_downloads
+            self.semaphore = asyncio.Semaphore(max_concurrent)
+            self.ceiling = max_concurrent
+            self.save_profiles()
+            self.tuners.clear()  # Their ceiling was the old budget
+        return self.semaphore
+
+    def _host_tuner(self, url: str) -> Optional[HostTuner]:
+        if self.profiles is None:
+            return None
+        host = host_of(url)
+        tuner = self.tuners.get(host)
+        if tuner is None:
+            tuner = self.tuners[host] = HostTuner(host, self.ceiling, self.profiles.get(host))
+        return tuner
+
+    def save_profiles(self):
+        """Records what the hosts' tuners learned so far."""
+        if self.profiles is not None and sum([self.profiles.record(t) for t in self.tuners.values()]):
+            self.profiles.save()
 
     async def start_job(self, job: Job):
+        """
+        Downloads all non-completed segments of a job. Returns once the job has
+        completed, failed or been cancelled; while paused it keeps waiting.
+        """
         self.active_jobs[job.name] = job
-        self.cancellation_tokens[job.name] = False  # Initialize cancellation token
-        job.status = "Running"
+        self.resume_events[job.name] = asyncio.Event()
+        self.job_limiters[job.name] = TokenBucket(job.rate_limit)
+        job.status = JobStatus.RUNNING
         
         # Initialize Cache
         self.segment_manager.initialize_job_cache(job)
+        self._load_manifest(job)
+        self._skip_consumed(job)
         
-        # Configure Semaphore
-        config = ConfigManager().get_config()
-        self.semaphore = asyncio.Semaphore(config.max_concurrent_downloads)
+        semaphore = self._get_semaphore()
 
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession()
 
-        tasks = []
-        for segment in job.segments:
-            if segment.status != SegmentStatus.COMPLETED:
-                tasks.append(self.download_segment(job, segment))
-        
         # Monitor progress in background
         progress_task = asyncio.create_task(self.monitor_progress(job))
         
         try:
-            await asyncio.gather(*tasks)
+            await self._open_store(job)
+            while True:
+                await self._run_segments(job, semaphore)
+                await self._flush_store(job)
+                if job.status == JobStatus.PAUSED:
+                    # Paused: wait for resume_job() (or cancel_job(), which also wakes us)
+                    resume_event = self.resume_events[job.name]
+                    await resume_event.wait()
+                    resume_event.clear()
+                    if job.status == JobStatus.CANCELLED:
+                        break
+                    job.status = JobStatus.RUNNING
+                    continue
+                if job.status == JobStatus.RUNNING and await self.validate_job(job):
+                    # Bad segments were reset; fetch them again (after a resume if paused meanwhile)
+                    if job.status in (JobStatus.RUNNING, JobStatus.PAUSED):
+                        continue
+                break
         except asyncio.CancelledError:
-            # Job was cancelled
-            job.status = "Cancelled"
-            self.signals.job_cancelled.emit(job.name)
+            # Job task itself was cancelled
+            self._cancel_tasks(job.name)
+            job.status = JobStatus.CANCELLED
+            self.events.job_cancelled.emit(job.name)
         except Exception as e:
             print(f"Job failed: {e}")
-            job.status = "Failed"
-            self.signals.job_failed.emit(job.name, str(e))
+            job.status = JobStatus.FAILED
+            self.events.job_failed.emit(job.name, str(e))
         finally:
              # Wait for progress monitor to finish one last update
             progress_task.cancel()
+            self.job_tasks.pop(job.name, None)
+            self.resume_events.pop(job.name, None)
+            self.follow_wakeups.pop(job.name, None)
+            self.playback_wakeups.pop(job.name, None)
+            self.job_limiters.pop(job.name, None)
+            await self._save_manifest(job)
+            self.segment_manager.close_job(job)
+            store = self.stores.pop(job.name, None)
+            if store is not None:
+                await store.close()
+            self.save_profiles()
             
-            # Clean up cancellation token
-            if job.name in self.cancellation_tokens:
-                del self.cancellation_tokens[job.name]
-            
-            # Check completion (only if not cancelled)
-            if job.status == "Running":
-                if all(s.status == SegmentStatus.COMPLETED for s in job.segments):
-                    job.status = "Completed"
-                    self.signals.job_completed.emit(job.name)
-                else:
-                     # Check for failures
-                     failed_count = sum(1 for s in job.segments if s.status == SegmentStatus.FAILED)
-                     if failed_count > 0:
-                          self.signals.job_failed.emit(job.name, f"{failed_count} segments failed.")
-
-    async def download_segment(self, job: Job, segment: Segment):
-        # Check if job is cancelled before starting
-        if self.cancellation_tokens.get(job.name, False):
+            self.finish_job(job)
+
+    async def _run_segments(self, job: Job, semaphore: asyncio.Semaphore):
+        """Runs one task per pending segment as the job's task group and waits for all of them."""
+        if job.status != JobStatus.RUNNING:
+            return  # Paused or cancelled while no task group existed (store opening, validation)
+        if job.playback and not job.follow:
+            await self._run_playback(job, semaphore)
             return
-            
-        target_path = self.segment_manager.get_segment_path(job, segment)
-        
+        tasks = set()
+        for segment in job.segments:
+            if segment.status != SegmentStatus.COMPLETED:
+                tasks.add(asyncio.create_task(self.download_segment(job, segment, semaphore)))
+        self.job_tasks[job.name] = tasks
+        if job.follow:
+            await self._follow(job, semaphore, tasks)
+        if tasks:
+            # Cancelled tasks (pause/cancel) are expected here, not errors
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _follow(self, job: Job, semaphore: asyncio.Semaphore, tasks: set):
+        """
+        Follow mode: polls the job's live source and starts each new segment's
+        download as soon as it is published, alongside the ones in flight.
+        Polls are timed from their start, so a slow reload does not add to the
+        delay behind the live edge. Ends with the stream (EXT-X-ENDLIST, or
+        nothing new for live_timeout seconds), on stop_following(), or when the
+        job is paused or cancelled (a resumed job follows again).
+        """
+        config = ConfigManager().get_config()
+        source = create_live_source(job, config.live_poll_interval)
+        wakeup = self.follow_wakeups.setdefault(job.name, asyncio.Event())
+        loop = asyncio.get_running_loop()
+        last_new = loop.time()
+        while job.follow and job.status == JobStatus.RUNNING:
+            started = loop.time()
+            try:
+                published = await source.poll(self.session)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f"[{job.name}] Live poll failed: {e}")
+                published = []
+            if published:
+                last_new = started
+                for segment in self._extend_job(job, published):
+                    task = asyncio.create_task(self.download_segment(job, segment, semaphore))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            # Commit what reached the output: live segments cannot be fetched again later
+            await self._flush_store(job)
+            if source.ended or started - last_new > config.live_timeout:
+                print(f"[{job.name}] Live stream ended" if source.ended else
+                      f"[{job.name}] No new segments for {config.live_timeout}s; stopping")
+                job.follow = False
+                break
+            try:
+                await asyncio.wait_for(wakeup.wait(), max(0.0, source.interval - (loop.time() - started)))
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+
+    async def _run_playback(self, job: Job, semaphore: asyncio.Semaphore):
+        """
+        Playback mode: instead of queueing every segment at once, only a
+        connection budget's worth is started at a time, nearest the playhead
+        first, so the in-order prefix a player reads grows as fast as it can
+        (see playback.py). A failed segment is tried again right away, since
+        playback cannot get past it.
+        """
+        window = self.max_concurrent or ConfigManager().get_config().max_concurrent_downloads
+        pending = [i for i, s in enumerate(job.segments) if s.status != SegmentStatus.COMPLETED]
+        running = {}  # task -> position
+        retries = {}
+        tasks = self.job_tasks[job.name] = set()
+        wakeup = self.playback_wakeups.setdefault(job.name, asyncio.Event())
+        try:
+            while (pending or running) and job.status == JobStatus.RUNNING:
+                playhead = self.playheads.get(job.name, 0)
+                while pending and len(running) < window:
+                    # The first pending segment at or after the playhead, else the earliest one
+                    k = bisect.bisect_left(pending, playhead)
+                    position = pending.pop(k if k < len(pending) else 0)
+                    task = asyncio.create_task(self.download_segment(job, job.segments[position], semaphore))
+                    running[task] = position
+                    tasks.add(task)
+                moved = asyncio.ensure_future(wakeup.wait())
+                try:
+                    done, _ = await asyncio.wait([*running, moved], return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    moved.cancel()
+                wakeup.clear()
+                for task in done:
+                    if task is moved:
+                        continue
+                    position = running.pop(task)
+                    tasks.discard(task)
+                    segment = job.segments[position]
+                    if segment.status == SegmentStatus.FAILED and retries.get(position, 0) < PLAYBACK_RETRIES:
+                        retries[position] = retries.get(position, 0) + 1
+                        segment.status = SegmentStatus.PENDING
+                        bisect.insort(pending, position)
+        finally:
+            if running:
+                # Cancelled tasks (pause/cancel) are expected here, not errors
+                await asyncio.gather(*running, return_exceptions=True)
+
+    def set_playhead(self, job_name: str, position: int):
+        """Moves a playback job's download priority to the segment at `position` (0-based)."""
+        if self.playheads.get(job_name) == position:
+            return
+        self.playheads[job_name] = position
+        wakeup = self.playback_wakeups.get(job_name)
+        if wakeup is not None:
+            wakeup.set()
+
+    def _extend_job(self, job: Job, published: List[MediaSegment]) -> List[Segment]:
+        """Appends newly published segments to a follow job."""
+        new = [Segment(job.end_index + 1 + i, s.url, key_url=s.key_url, key_iv=s.key_iv)
+               for i, s in enumerate(published)]
+        job.segments.extend(new)
+        job.end_index += len(new)
+        store = self.stores.get(job.name)
+        if store is not None:
+            store.extend([self.segment_manager.get_segment_path(job, s) for s in new])
+        self.events.job_extended.emit(job.name, job.end_index)
+        return new
+
+    def stop_following(self, job_name: str):
+        """Stops a follow job's polling; it completes (and is merged) once its segments are in."""
+        job = self.active_jobs.get(job_name)
+        if job is None or not job.follow:
+            return
+        job.follow = False
+        self._wake_follow(job_name)
+
+    def _wake_follow(self, job_name: str):
+        wakeup = self.follow_wakeups.get(job_name)
+        if wakeup is not None:
+            wakeup.set()
+
+    def _cancel_tasks(self, job_name: str):
+        """Aborts every queued and in-flight request of a job, releasing its connections."""
+        for task in self.job_tasks.get(job_name, ()):
+            task.cancel()
+
+    def _load_manifest(self, job: Job):
+        if not self.shard_worker:
+            cache_dir = self.segment_manager.get_job_cache_path(job.name)
+            self.manifests[job.name] = Manifest.load(cache_dir, self.checksum_algorithm)
+
+    def _skip_consumed(self, job: Job):
+        """Segments already merged away by an interrupted consume-mode merge are not fetched again."""
+        if self.shard_worker:
+            return
+        for segment in job.segments[:self.segment_manager.consumed_segments(job)]:
+            if segment.status != SegmentStatus.COMPLETED:
+                segment.status = SegmentStatus.COMPLETED
+                self.events.segment_status_changed.emit(job.name, segment.index, "Completed")
+
+    async def _open_store(self, job: Job):
+        """
+        With a memory budget, the output is written while downloading (per-file
+        cache only). Follow jobs always are, so a recording grows as it runs.
+        """
+        budget = self.memory_budget
+        if job.follow and budget == 0:
+            budget = LIVE_MEMORY_BUDGET
+        if not budget or self.segment_manager.layout != "files":
+            return
+        if (wants_remux(job) or job.playback) and not job.follow:
+            # Remuxed at merge time instead of appended to as TS; playback reads the cache in order
+            return
+        store = MemoryStore(
+            os.path.join(self.segment_manager.base_download_path, job.output_filename),
+            self.segment_manager.get_merge_progress_path(job.name),
+            job.segments,
+            self.segment_manager.get_all_segment_files(job),
+            budget,
+            self.checksum_algorithm,
+            self.disk_writer.executor,
+            growing=job.follow,
+        )
+        await store.open()
+        self.stores[job.name] = store
+
+    async def _flush_store(self, job: Job):
+        store = self.stores.get(job.name)
+        if store is not None:
+            await store.flush()
+
+    async def _save_manifest(self, job: Job):
+        manifest = self.manifests.pop(job.name, None)
+        if manifest is not None:
+            await self._run_io(manifest.save)
+
+    def _record_checksum(self, job: Job, segment: Segment):
+        """Stores a fresh segment hash, or restores the known one for a cached segment."""
+        manifest = self.manifests.get(job.name)
+        if manifest is None:
+            return
+        if segment.checksum:
+            manifest.record(segment.index, segment.size, segment.checksum)
+            if manifest.due():
+                manifest.save_in(self.disk_writer.executor)
+        else:
+            segment.checksum = manifest.get(segment.index)
+
+    async def validate_job(self, job: Job) -> bool:
+        """
+        Checks the MPEG-TS structure of a fully downloaded job so that error
+        pages or garbage served with a 200 never reach the merge. Bad segments
+        are deleted and reset to Pending (up to MAX_VALIDATION_RETRIES times,
+        then Failed). Returns True if any segment has to be fetched again.
+        """
+        if self.validator is None or not job_is_ts(job):
+            return False
+        if not all(s.status == SegmentStatus.COMPLETED for s in job.segments):
+            return False
+
+        # Consumed segments were checked before their merge and no longer exist,
+        # and those waiting in a MemoryStore were checked on arrival
+        consumed = self.segment_manager.consumed_segments(job)
+        store = self.stores.get(job.name)
+        in_memory = store.pending if store is not None else {}
+        files = self.segment_manager.get_all_segment_files(job)
+        positions = [i for i in range(consumed, len(job.segments)) if i not in in_memory]
+        segments = [job.segments[i] for i in positions]
+        paths = [files[i] for i in positions]
+        results = await self.validator.validate(paths)
+        if job.status != JobStatus.RUNNING:
+            return False  # Paused or cancelled while validating
+
+        retry = False
+        for segment, (error, cc_errors) in zip(segments, results):
+            if not error and not cc_errors:
+                continue
+            problem = error or f"{cc_errors} continuity errors"
+            if segment.retries >= MAX_VALIDATION_RETRIES:
+                if error:
+                    print(f"Segment {segment.index} invalid: {problem}")
+                    segment.status = SegmentStatus.FAILED
+                    self.events.segment_status_changed.emit(job.name, segment.index, "Failed")
+                else:
+                    # Same stream on every fetch: an encoder glitch, not a broken transfer
+                    print(f"Segment {segment.index} kept with {problem}")
+                continue
+
+            print(f"Segment {segment.index} invalid ({problem}), downloading again")
+            if self.shared_cache is not None:
+                try:
+                    await self._run_index(self.shared_cache.remove, segment.url)
+                except sqlite3.Error as e:
+                    print(f"Shared cache: could not drop segment {segment.index}: {e}")
+            segment.retries += 1
+            segment.checksum = None
+            segment.status = SegmentStatus.PENDING
+            self.segment_manager.remove_segment(job, segment)
+            self.events.segment_status_changed.emit(job.name, segment.index, "Pending")
+            retry = True
+        return retry
+
+    def finish_job(self, job: Job):
+        """Sets the final job status and emits completion/failure (only if not cancelled)."""
+        if job.status == JobStatus.RUNNING:
+            if all(s.status == SegmentStatus.COMPLETED for s in job.segments):
+                job.status = JobStatus.COMPLETED
+                self.events.job_completed.emit(job.name)
+            else:
+                 # Check for failures
+                 failed_count = sum(1 for s in job.segments if s.status == SegmentStatus.FAILED)
+                 if failed_count > 0:
+                      self.events.job_failed.emit(job.name, f"{failed_count} segments failed.")
+
+    async def download_segment(self, job: Job, segment: Segment, semaphore: asyncio.Semaphore):
         if self.segment_manager.check_segment_exists(job, segment):
             segment.status = SegmentStatus.COMPLETED
-            self.signals.segment_status_changed.emit(job.name, segment.index, "Completed")
+            self._record_checksum(job, segment)
+            self.events.segment_status_changed.emit(job.name, segment.index, "Completed")
             return
 
-        async with self.semaphore:
-            # Check again after acquiring semaphore
-            if self.cancellation_tokens.get(job.name, False):
-                return
-                
+        # The host's slot first: waiting for it must not hold a connection other hosts could use
+        tuner = self._host_tuner(segment.url)
+        async with tuner or _UNTUNED, semaphore:
             segment.status = SegmentStatus.DOWNLOADING
             # Immediate status update for downloading start
-            self.signals.segment_status_changed.emit(job.name, segment.index, "Downloading")
+            self.events.segment_status_changed.emit(job.name, segment.index, "Downloading")
             
             try:
-                async with self.session.get(segment.url, timeout=30) as response:
-                    if response.status == 200:
-                        async with aiofiles.open(target_path, 'wb') as f:
-                            await f.write(await response.read())
-                        segment.status = SegmentStatus.COMPLETED
-                        segment.size = os.path.getsize(target_path)
-                        job.downloaded_segments += 1
-                        self.signals.segment_status_changed.emit(job.name, segment.index, "Completed")
+                cached = None
+                if self.shared_cache is not None:
+                    cached = await self._run_index(self.shared_cache.lookup, segment.url)
+                headers = cached.conditional_headers() if cached is not None else None
+                # Without validators a cached body is trusted as is (segments rarely change)
+                if cached is not None and not headers and await self._use_shared(job, segment, cached):
+                    self._segment_completed(job, segment)
+                    return
+                # Encrypted segments are decrypted as they arrive; caches only hold plaintext
+                decryptor = None
+                if segment.key_url:
+                    key = await self.keys.get(self.session, segment.key_url)
+                    decryptor = SegmentDecryptor(key, segment.key_iv)
+                async with self.session.get(segment.url, timeout=30, headers=headers) as response:
+                    if response.status == 304 and cached is not None and await self._use_shared(job, segment, cached):
+                        self._segment_completed(job, segment)
+                    elif response.status == 200:
+                        expected = self._expected_size(response)
+                        hasher = new_hasher(self.checksum_algorithm)
+                        store = self.stores.get(job.name)
+                        if store is not None and expected is not None and expected <= store.budget:
+                            source = await self._receive_to_memory(job, segment, response, expected, hasher, store,
+                                                                   decryptor)
+                        else:
+                            source = await self._receive_to_disk(job, segment, response, expected, hasher,
+                                                                 decryptor)
+                            if store is not None:
+                                await store.spilled(segment.index - job.start_index)
+                        segment.checksum = hasher.hexdigest() if hasher else None
+                        if self.shared_cache is not None:
+                            await self._share(segment, response, source)
+                        self._segment_completed(job, segment)
+                        if tuner is not None:
+                            tuner.succeeded(segment.size)
                     else:
+                        if tuner is not None:
+                            tuner.failed(response.status in THROTTLE_STATUSES)
                         segment.status = SegmentStatus.FAILED
-                        self.signals.segment_status_changed.emit(job.name, segment.index, "Failed")
+                        self.events.segment_status_changed.emit(job.name, segment.index, "Failed")
+            except asyncio.CancelledError:
+                # Paused or cancelled mid-transfer: the partial file is gone, fetch again later
+                segment.status = SegmentStatus.PENDING
+                self.events.segment_status_changed.emit(job.name, segment.index, "Pending")
+                raise
             except Exception as e:
                 print(f"Segment {segment.index} error: {e}")
+                if tuner is not None:
+                    tuner.failed(isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)))
                 segment.status = SegmentStatus.FAILED
-                self.signals.segment_status_changed.emit(job.name, segment.index, "Failed")
+                self.events.segment_status_changed.emit(job.name, segment.index, "Failed")
+
+    def _segment_completed(self, job: Job, segment: Segment):
+        self._record_checksum(job, segment)
+        segment.status = SegmentStatus.COMPLETED
+        job.downloaded_segments += 1
+        self.events.segment_status_changed.emit(job.name, segment.index, "Completed")
+
+    async def _use_shared(self, job: Job, segment: Segment, cached: CachedSegment) -> bool:
+        """Serves a segment from the shared cache. False if the entry vanished (evicted meanwhile)."""
+        temp_path = self.segment_manager.get_temp_path(job, segment)
+        try:
+            await self._run_io(materialize, cached, temp_path)
+        except OSError:
+            return False
+        segment.size = cached.size
+        if cached.algorithm == self.checksum_algorithm:
+            segment.checksum = cached.checksum
+        else:
+            segment.checksum = await self._run_io(hash_file, temp_path, self.checksum_algorithm)
+        try:
+            await self._run_index(self.shared_cache.touch, segment.url)
+        except sqlite3.Error as e:
+            print(f"Shared cache: could not update segment {segment.index}: {e}")
+
+        pack = self.segment_manager.get_pack(job)
+        if pack is not None:
+            await self._run_io(pack.add_file, segment.index, temp_path)
+        else:
+            await self.disk_writer.commit(temp_path, self.segment_manager.get_segment_path(job, segment))
+        store = self.stores.get(job.name)
+        if store is not None:
+            await store.spilled(segment.index - job.start_index)
+        return True
+
+    async def _share(self, segment: Segment, response: aiohttp.ClientResponse, source):
+        """Adds a fresh body to the shared cache; failures only cost the cache entry."""
+        try:
+            size = await self._run_io(self.shared_cache.write_object, segment.url, source)
+            await self._run_index(self.shared_cache.add, segment.url, size, response.headers.get("ETag"),
+                                  response.headers.get("Last-Modified"), segment.checksum,
+                                  self.checksum_algorithm)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Shared cache: could not store segment {segment.index}: {e}")
+
+    async def _iter_body(self, job: Job, response: aiohttp.ClientResponse, expected: Optional[int],
+                         decryptor: Optional[SegmentDecryptor] = None):
+        """
+        Yields the response body chunk by chunk, rate-limited and checked
+        against Content-Length (which counts the ciphertext), decrypted if a
+        decryptor is given.
+        """
+        job_limiter = self.job_limiters.get(job.name)
+        received = 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            received += len(chunk)
+            if expected is not None and received > expected:
+                raise IOError(f"Body longer than Content-Length ({expected} bytes)")
+            # Waiting here stops reading the socket, so TCP slows the sender
+            if job_limiter is not None:
+                await job_limiter.consume(len(chunk))
+            await self.global_limiter.consume(len(chunk))
+            # Inline: AES-NI takes tens of microseconds per chunk, less than a hop to an I/O thread
+            yield decryptor.update(chunk) if decryptor is not None else chunk
+        if expected is not None and received != expected:
+            raise IOError(f"Truncated: got {received} of {expected} bytes")
+        if decryptor is not None:
+            try:
+                yield decryptor.finalize()
+            except ValueError:
+                raise IOError("Decryption failed: bad padding (wrong key or IV?)")
+
+    async def _receive_to_disk(self, job: Job, segment: Segment, response: aiohttp.ClientResponse,
+                               expected: Optional[int], hasher, decryptor: Optional[SegmentDecryptor] = None):
+        temp_path = self.segment_manager.get_temp_path(job, segment)
+        pack = self.segment_manager.get_pack(job)
+        # Stream via the write-behind stage; write() blocks when the disk lags.
+        # Packed caches take the body straight into a reserved range of the pack,
+        # bodies of unknown length go through a temp file first. (A decrypted
+        # body is up to one block shorter than its reserved range.)
+        if pack is not None and expected is not None:
+            handle = self.disk_writer.attach(pack.fd, pack.path, pack.reserve(expected), hasher)
+        else:
+            handle = await self.disk_writer.open(temp_path, hasher)
+        try:
+            async for chunk in self._iter_body(job, response, expected, decryptor):
+                await self.disk_writer.write(handle, chunk)
+            segment.size = await self.disk_writer.close(handle, fsync=self.durability in ("file", "full"))
+        except BaseException:
+            await self.disk_writer.abort(handle)
+            raise
+        # Only complete, verified segments get their final name or index entry
+        sync = self.durability == "full"
+        if not handle.owns_fd:
+            await self._run_io(pack.add, segment.index, handle.start_offset, segment.size, sync)
+        elif pack is not None:
+            await self._run_io(pack.add_file, segment.index, temp_path, sync)
+        else:
+            target_path = self.segment_manager.get_segment_path(job, segment)
+            await self.disk_writer.commit(temp_path, target_path, sync_dir=sync)
+            return target_path
+        return pack.get(segment.index)
+
+    async def _receive_to_memory(self, job: Job, segment: Segment, response: aiohttp.ClientResponse,
+                                 expected: int, hasher, store: MemoryStore,
+                                 decryptor: Optional[SegmentDecryptor] = None):
+        """
+        Keeps the body in memory for the job's MemoryStore. Bodies are checked
+        on arrival because nothing can be taken back out of the output; bad
+        ones, and those that do not fit the budget, are spilled to the cache.
+        """
+        data = b"".join([chunk async for chunk in self._iter_body(job, response, expected, decryptor)])
+        segment.size = len(data)
+        if hasher is not None:
+            await self._run_io(hasher.update, data)
+        bad = False
+        if self.validator is not None and job_is_ts(job):
+            error, cc_errors = await self._run_io(validate_buffer, data)
+            bad = bool(error or cc_errors)
+
+        position = segment.index - job.start_index
+        if not bad and store.fits(position, len(data)):
+            await store.add(position, data)
+            return data
+        if bad:
+            store.hold(position)  # Before the file appears, or a drain could pick it up
+
+        temp_path = self.segment_manager.get_temp_path(job, segment)
+        handle = await self.disk_writer.open(temp_path)
+        try:
+            await self.disk_writer.write(handle, data)
+            await self.disk_writer.close(handle, fsync=self.durability in ("file", "full"))
+        except BaseException:
+            await self.disk_writer.abort(handle)
+            raise
+        await self.disk_writer.commit(temp_path, self.segment_manager.get_segment_path(job, segment),
+                                      sync_dir=self.durability == "full")
+        await store.spilled(position)
+        return data
+
+    async def _run_io(self, func, *args):
+        """Runs blocking cache bookkeeping on the disk writer's I/O threads."""
+        return await asyncio.get_running_loop().run_in_executor(self.disk_writer.executor, func, *args)
+
+    async def _run_index(self, func, *args):
+        """Runs a shared cache index call (SQLite, may wait on another process's lock) on its thread."""
+        return await asyncio.get_running_loop().run_in_executor(self.shared_cache.executor, func, *args)
+
+    @staticmethod
+    def _expected_size(response: aiohttp.ClientResponse) -> Optional[int]:
+        """Body size announced by the server, if it can be checked against the bytes we got."""
+        # Content-Length counts encoded bytes; aiohttp hands us decoded ones
+        if response.headers.get("Content-Encoding", "identity").lower() != "identity":
+            return None
+        return response.content_length
 
     async def monitor_progress(self, job: Job):
         """
-        Periodically calculates progress and emits throttled signals.
+        Periodically calculates progress and emits throttled progress events.
         """
         start_time = time.time()
         last_emit = 0
         throttle_interval = 0.1 # 100ms
         
-        while job.status == "Running":
+        while job.status in (JobStatus.RUNNING, JobStatus.PAUSED):
             now = time.time()
-            if now - last_emit >= throttle_interval:
+            if job.status == JobStatus.RUNNING and now - last_emit >= throttle_interval:
                 # Calculate metrics
                 total = job.total_segments
                 completed = sum(1 for s in job.segments if s.status == SegmentStatus.COMPLETED)
@@ -149,33 +697,66 @@ class Downloader:
                     speed_str = "0.0 seg/s"
                     eta_str = "--"
 
-                self.signals.job_progress_updated.emit(job.name, progress, speed_str, eta_str)
+                self.events.job_progress_updated.emit(job.name, progress, speed_str, eta_str)
                 last_emit = now
             
             await asyncio.sleep(0.05) # Check/Sleep 50ms
 
     def cancel_job(self, job_name: str):
         """
-        Requests cancellation of a job. The download_segment coroutines will
-        check this flag and exit early. Does NOT clean up files immediately
-        since downloads may still be in progress - use clear_cache separately.
+        Cancels a job: all of its segment tasks are cancelled, which aborts
+        in-flight requests and frees their connections immediately. Partial
+        segment files are discarded; completed ones stay in the cache until
+        "Clear Cache" is used.
         """
-        if job_name in self.cancellation_tokens:
-            self.cancellation_tokens[job_name] = True
-            
-        # Update job status
-        if job_name in self.active_jobs:
-            job = self.active_jobs[job_name]
-            job.status = "Cancelled"
-            self.signals.job_cancelled.emit(job_name)
-            # Note: File cleanup is deferred - user can use "Clear Cache" button
-            # after cancellation completes to remove partial files
+        job = self.active_jobs.get(job_name)
+        if job is None or job.status not in (JobStatus.RUNNING, JobStatus.PAUSED):
+            return
+        job.status = JobStatus.CANCELLED
+        self._cancel_tasks(job_name)
+        self._wake_follow(job_name)
+        if job_name in self.resume_events:
+            self.resume_events[job_name].set()
+        self.events.job_cancelled.emit(job_name)
+
+    def pause_job(self, job_name: str):
+        """
+        Pauses a running job. In-flight transfers are aborted (and re-fetched on
+        resume) and queued ones released, so the job's share of the global
+        connection budget goes to the other jobs straight away.
+        """
+        job = self.active_jobs.get(job_name)
+        if job is None or job.status != JobStatus.RUNNING:
+            return
+        job.status = JobStatus.PAUSED
+        self._cancel_tasks(job_name)
+        self._wake_follow(job_name)
+        self.events.job_paused.emit(job_name)
+
+    def resume_job(self, job_name: str):
+        job = self.active_jobs.get(job_name)
+        if job is None or job.status != JobStatus.PAUSED or job_name not in self.resume_events:
+            return
+        self.resume_events[job_name].set()
+        self.events.job_resumed.emit(job_name)
+
+    def set_global_rate(self, rate: int):
+        """Changes the overall bandwidth cap (bytes/s, 0 = unlimited); applies to running transfers."""
+        self.global_limiter.set_rate(rate)
+
+    def set_job_rate(self, job_name: str, rate: int):
+        """Changes one job's bandwidth cap (bytes/s, 0 = unlimited) without restarting it."""
+        job = self.active_jobs.get(job_name)
+        if job is not None:
+            job.rate_limit = rate
+        if job_name in self.job_limiters:
+            self.job_limiters[job_name].set_rate(rate)
 
     async def test_connectivity(self, first_url: str, last_url: str):
         """
         Tests connectivity to both the first and last segment URLs.
         Performs HEAD requests (falls back to GET) and reports status codes.
-        Emits connectivity_tested signal with results.
+        Emits connectivity_tested event with results.
         """
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession()
@@ -217,9 +798,15 @@ class Downloader:
         first_status, first_error = await check_url(first_url)
         last_status, last_error = await check_url(last_url)
         
-        self.signals.connectivity_tested.emit(first_status, last_status, first_error, last_error)
+        self.events.connectivity_tested.emit(first_status, last_status, first_error, last_error)
         return first_status, last_status, first_error, last_error
 
     async def close(self):
+        self.save_profiles()
         if self.session:
             await self.session.close()
+        self.disk_writer.shutdown()
+        if self.validator is not None:
+            self.validator.close()
+        if self.shared_cache is not None:
+            self.shared_cache.close()
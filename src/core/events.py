@@ -0,0 +1,48 @@
+from typing import Callable, List
+
+
+class Event:
+    """
+    A minimal callback list with a Qt-like connect/emit API.
+    Lets the core report progress without depending on PyQt; the GUI simply
+    connects its slots, the CLI connects plain functions.
+    """
+    def __init__(self):
+        self._handlers: List[Callable] = []
+
+    def connect(self, handler: Callable):
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    def disconnect(self, handler: Callable):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    def emit(self, *args):
+        # Iterate over a copy so handlers may (dis)connect while being called
+        for handler in list(self._handlers):
+            try:
+                handler(*args)
+            except Exception as e:
+                # A broken listener must never fail a download
+                print(f"Event handler error in {getattr(handler, '__name__', handler)}: {e}")
+
+
+class DownloaderEvents:
+    def __init__(self):
+        # Args: Job Name, Segment Index, Status
+        self.segment_status_changed = Event()
+        # Args: Job Name, Progress (0-100), Speed (str), ETA (str)
+        self.job_progress_updated = Event()
+        self.job_completed = Event()
+        self.job_failed = Event()
+        self.job_cancelled = Event()
+        self.job_paused = Event()
+        self.job_resumed = Event()
+        # Args: Job Name, new End Index (a follow job found new segments)
+        self.job_extended = Event()
+        # Args: Job Name, Merged (bool), Integrity OK (bool), Output Path (str)
+        # Only emitted by hosts that merge on their own (the daemon)
+        self.job_merged = Event()
+        # Args: First URL status (int), Last URL status (int), First error (str), Last error (str)
+        self.connectivity_tested = Event()
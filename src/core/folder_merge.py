@@ -0,0 +1,114 @@
+import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from src.core.checksums import DEFAULT_ALGORITHM
+from src.core.merger import Merger
+from src.core.segment_pack import PACK_SUFFIX, PackedSegment, load_pack_index
+
+# Files a folder merge picks up (cache folders hold NNNNN.ts plus .ts.part leftovers)
+SEGMENT_EXTENSIONS = (".ts",)
+# Gaps listed in messages before "..."
+GAPS_SHOWN = 5
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+@dataclass
+class FolderScan:
+    folder: str
+    # In merge order; whole files are ranges too, so the merge reuses the sizes of the scan
+    segments: List[PackedSegment]
+    gaps: List[Tuple[int, int]]  # Missing segment numbers, as (first, last) runs
+
+    @property
+    def total_size(self) -> int:
+        return sum(s.size for s in self.segments)
+
+    @property
+    def missing(self) -> int:
+        return sum(last - first + 1 for first, last in self.gaps)
+
+
+def natural_key(name: str) -> list:
+    """Sort key reading digit runs as numbers: 2.ts before 10.ts, seg_9 before seg_10."""
+    return [int(part) if i % 2 else part.lower() for i, part in enumerate(_DIGITS.split(name))]
+
+
+def segment_number(key: list) -> Optional[int]:
+    """The last number of a natural_key (of seg_0042: 42), or None."""
+    return key[-2] if len(key) > 1 else None
+
+
+def find_gaps(numbers: List[Optional[int]]) -> List[Tuple[int, int]]:
+    """Runs of numbers missing between the lowest and highest; none if some name has no number."""
+    if not numbers or None in numbers:
+        return []
+    present = sorted(set(numbers))
+    return [(a + 1, b - 1) for a, b in zip(present, present[1:]) if b > a + 1]
+
+
+def format_gaps(gaps: List[Tuple[int, int]]) -> str:
+    """
+    >>> format_gaps([(3, 3), (7, 9)])
+    '3, 7-9'
+    """
+    text = ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in gaps[:GAPS_SHOWN])
+    return text + (", ..." if len(gaps) > GAPS_SHOWN else "")
+
+
+def suggested_name(folder: str) -> str:
+    """Output name for a folder: its name without the "Cache_" prefix of job caches."""
+    name = os.path.basename(os.path.normpath(folder))
+    return name[6:] if name.startswith("Cache_") else name
+
+
+def scan_folder(folder: str, extensions: Tuple[str, ...] = SEGMENT_EXTENSIONS) -> FolderScan:
+    """
+    Lists a folder's segments in one os.scandir pass, sizes included,
+    sorted naturally (1.ts, 2.ts, 10.ts). A packed job cache
+    (segments.pack) is read through its index instead. Raises OSError if
+    the folder cannot be read.
+    """
+    files = []
+    packed = False
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.endswith(PACK_SUFFIX):
+                packed = True
+            elif entry.name.lower().endswith(extensions) and entry.is_file():
+                # Keyed without the extension, so the last number in the key is the segment's
+                key = natural_key(entry.name[:entry.name.rfind(".")])
+                files.append((key, entry.name, entry.path, entry.stat().st_size))
+
+    if packed and not files:
+        index = load_pack_index(folder)
+        numbers = sorted(index)
+        return FolderScan(folder, [index[n] for n in numbers], find_gaps(numbers))
+
+    files.sort()
+    return FolderScan(folder, [PackedSegment(path, 0, size) for _, _, path, size in files],
+                      find_gaps([segment_number(key) for key, _, _, _ in files]))
+
+
+async def merge_folders(merger: Merger, plans: List[Tuple[FolderScan, str]],
+                        algorithm: str = DEFAULT_ALGORITHM,
+                        parallel: int = 2) -> List[Tuple[bool, bool, Optional[str]]]:
+    """
+    Merges each (scan, output_path) pair, `parallel` folders at a time;
+    each merge also uses the merger's copy threads. Returns the
+    (merged, valid, output_checksum) of each pair, in order.
+    """
+    if not plans:
+        return []
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=max(1, min(parallel, len(plans))), thread_name_prefix="fastflux-folders")
+    try:
+        return await asyncio.gather(*(
+            loop.run_in_executor(pool, merger.merge_segments, scan.segments, output_path, None, algorithm)
+            for scan, output_path in plans))
+    finally:
+        # Not waiting: on a cancel, queued folders are dropped and the loop goes on while running ones finish
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,171 @@
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+import aiohttp
+from src.core.decryption import sequence_iv
+
+PLAYLIST_SUFFIXES = (".m3u8", ".m3u")
+# NAME=value or NAME="quoted, value" pairs of a tag's attribute list
+_ATTRIBUTE_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+# Lower variants fetched alongside the chosen one, in case it is unavailable
+VARIANT_FALLBACKS = 2
+
+
+@dataclass
+class Variant:
+    url: str
+    bandwidth: int
+    resolution: str = ""
+    codecs: str = ""
+
+
+@dataclass
+class MediaSegment:
+    url: str
+    duration: float
+    sequence: int  # Media sequence number, stable across reloads of a live playlist
+    key_url: Optional[str] = None  # AES-128 key, if the segment is encrypted
+    key_iv: Optional[str] = None   # Its IV (hex), explicit or derived from the sequence number
+
+
+@dataclass
+class MediaPlaylist:
+    url: str
+    segments: List[MediaSegment] = field(default_factory=list)
+    media_sequence: int = 0
+    target_duration: float = 0.0
+    ended: bool = False          # EXT-X-ENDLIST seen: no segments will be added
+    init: Optional[MediaSegment] = None  # EXT-X-MAP (fMP4 initialization section)
+
+    @property
+    def download_order(self) -> List[MediaSegment]:
+        """The initialization section first, then the media segments."""
+        return [self.init] + self.segments if self.init else list(self.segments)
+
+
+def is_playlist_url(url: str) -> bool:
+    return urlparse(url.strip()).path.lower().endswith(PLAYLIST_SUFFIXES)
+
+
+def parse_attributes(text: str) -> Dict[str, str]:
+    return {k: v.strip('"') for k, v in _ATTRIBUTE_RE.findall(text)}
+
+
+def _lines(text: str) -> List[str]:
+    lines = [line.strip() for line in text.lstrip("\ufeff").splitlines()]
+    if not lines or lines[0] != "#EXTM3U":
+        raise ValueError("Not an M3U8 playlist (missing #EXTM3U)")
+    return [line for line in lines if line]
+
+
+def is_master_playlist(text: str) -> bool:
+    return "#EXT-X-STREAM-INF" in text
+
+
+def parse_master_playlist(text: str, url: str) -> List[Variant]:
+    variants = []
+    attributes = None
+    for line in _lines(text):
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            attributes = parse_attributes(line.split(":", 1)[1])
+        elif not line.startswith("#") and attributes is not None:
+            try:
+                bandwidth = int(attributes.get("BANDWIDTH", 0))
+            except ValueError:
+                bandwidth = 0
+            variants.append(Variant(urljoin(url, line), bandwidth,
+                                    attributes.get("RESOLUTION", ""), attributes.get("CODECS", "")))
+            attributes = None
+    return variants
+
+
+def parse_media_playlist(text: str, url: str) -> MediaPlaylist:
+    playlist = MediaPlaylist(url)
+    duration = None
+    key_url = key_iv = None  # EXT-X-KEY in effect
+    for line in _lines(text):
+        tag, _, value = line.partition(":")
+        if tag == "#EXT-X-MEDIA-SEQUENCE":
+            playlist.media_sequence = int(value)
+        elif tag == "#EXT-X-TARGETDURATION":
+            playlist.target_duration = float(value)
+        elif tag == "#EXT-X-ENDLIST":
+            playlist.ended = True
+        elif tag == "#EXT-X-MAP":
+            # An encrypted initialization section must carry an explicit IV
+            iv = key_iv or (sequence_iv(playlist.media_sequence) if key_url else None)
+            playlist.init = MediaSegment(urljoin(url, parse_attributes(value)["URI"]), 0.0, -1, key_url, iv)
+        elif tag == "#EXTINF":
+            duration = float(value.split(",", 1)[0] or 0)
+        elif tag == "#EXT-X-BYTERANGE":
+            raise ValueError("Byte-range playlists are not supported")
+        elif tag == "#EXT-X-KEY":
+            attributes = parse_attributes(value)
+            method = attributes.get("METHOD", "NONE")
+            if method == "NONE":
+                key_url = key_iv = None
+            elif method == "AES-128":
+                key_url = urljoin(url, attributes["URI"])
+                iv = attributes.get("IV")
+                key_iv = iv[2:].rjust(32, "0") if iv and iv[:2].lower() == "0x" else None
+            else:
+                raise ValueError(f"Unsupported encryption method {method}")
+        elif not line.startswith("#"):
+            sequence = playlist.media_sequence + len(playlist.segments)
+            iv = key_iv or (sequence_iv(sequence) if key_url else None)
+            playlist.segments.append(MediaSegment(urljoin(url, line), duration or 0.0, sequence, key_url, iv))
+            duration = None
+    return playlist
+
+
+def select_variant(variants: List[Variant], max_bandwidth: int = 0) -> Variant:
+    """The best variant within max_bandwidth (bits/s; 0 = no cap), else the lowest one."""
+    if not variants:
+        raise ValueError("Master playlist lists no variants")
+    ordered = sorted(variants, key=lambda v: v.bandwidth)
+    if max_bandwidth:
+        fitting = [v for v in ordered if v.bandwidth <= max_bandwidth]
+        return fitting[-1] if fitting else ordered[0]
+    return ordered[-1]
+
+
+async def fetch_playlist(session: aiohttp.ClientSession, url: str) -> str:
+    async with session.get(url, timeout=30) as response:
+        if response.status != 200:
+            raise ValueError(f"Playlist request failed: HTTP {response.status} ({url})")
+        return await response.text(errors="replace")
+
+
+async def load_media_playlist(url: str, max_bandwidth: int = 0,
+                              session: Optional[aiohttp.ClientSession] = None) -> MediaPlaylist:
+    """
+    Fetches a playlist and, for a master playlist, the chosen variant's
+    media playlist. If the variant cannot be loaded the next best ones are
+    tried, fetched concurrently so a dead rendition costs one round trip.
+    """
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession()
+    try:
+        text = await fetch_playlist(session, url)
+        if not is_master_playlist(text):
+            return parse_media_playlist(text, url)
+
+        variants = parse_master_playlist(text, url)
+        chosen = select_variant(variants, max_bandwidth)
+        fallbacks = sorted((v for v in variants if v is not chosen and v.bandwidth <= chosen.bandwidth),
+                           key=lambda v: v.bandwidth, reverse=True)[:VARIANT_FALLBACKS]
+        candidates = [chosen] + fallbacks
+        results = await asyncio.gather(*(fetch_playlist(session, v.url) for v in candidates),
+                                       return_exceptions=True)
+        for variant, result in zip(candidates, results):
+            if isinstance(result, BaseException):
+                print(f"Variant {variant.url} unavailable: {result}")
+                continue
+            return parse_media_playlist(result, variant.url)
+        raise ValueError("No variant playlist could be loaded")
+    finally:
+        if own_session:
+            await session.close()
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# Learned per-host settings, in the download folder next to the daemon's queue
+PROFILES_FILENAME = ".fastflux_hosts.json"
+# Throughput is measured over windows of this many seconds
+SAMPLE_WINDOW = 5.0
+# Windows with a larger share of failed requests do not count as optimal
+MAX_ERROR_SHARE = 0.02
+# Requests a session needs before it updates a host's profile
+MIN_SAMPLES = 20
+# Limit factor on throttling (429/503, connection errors)
+BACKOFF = 0.7
+# Weight of the latest session in a profile's error rate
+ERROR_RATE_WEIGHT = 0.3
+# HTTP statuses that mean the host wants fewer connections
+THROTTLE_STATUSES = (429, 503)
+
+
+def host_of(url: str) -> str:
+    """Profile key of a URL: its host, with the port if one is given."""
+    parts = urlsplit(url)
+    return (parts.netloc or parts.path).lower().rpartition("@")[2]
+
+
+@dataclass
+class HostProfile:
+    host: str
+    concurrency: int        # Connections of the fastest window with few errors
+    throughput: float       # Bytes/s reached at that concurrency
+    error_rate: float       # Share of failed requests (moving average over sessions)
+    segment_size: int       # Mean segment size in bytes
+    samples: int = 0        # Requests seen over all sessions
+    updated: float = 0.0    # Unix time of the last update
+
+
+class ProfileStore:
+    """Host profiles persisted as JSON; a missing or broken file starts empty."""
+    def __init__(self, path: str):
+        self.path = path
+        self.profiles: Dict[str, HostProfile] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+            self.profiles = {e["host"]: HostProfile(**e) for e in entries}
+        except Exception as e:
+            print(f"Error loading host profiles: {e}")
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump([asdict(p) for p in self.profiles.values()], f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving host profiles: {e}")
+
+    def get(self, host: str) -> Optional[HostProfile]:
+        return self.profiles.get(host)
+
+    def forget(self, host: str) -> bool:
+        return self.profiles.pop(host, None) is not None
+
+    def record(self, tuner: "HostTuner") -> bool:
+        """Folds a tuner's session into its host's profile; False if it has too few samples yet."""
+        profile = tuner.take_profile(self.profiles.get(tuner.host))
+        if profile is None:
+            return False
+        self.profiles[tuner.host] = profile
+        return True
+
+
+class HostTuner:
+    """
+    Connection limit for one host, adjusted while jobs run: one more
+    connection after each `limit` successes (up to `ceiling`, the global
+    budget), about a third fewer when the host throttles. Starts from the
+    host's learned concurrency, so a known host is at full speed from the
+    first request; an unknown host starts at the ceiling, as without tuning.
+
+    Also measures throughput per SAMPLE_WINDOW and remembers the best
+    window with few errors; take_profile() turns that into a HostProfile.
+    """
+    def __init__(self, host: str, ceiling: int, profile: Optional[HostProfile] = None):
+        self.host = host
+        self.ceiling = ceiling
+        self.limit = min(profile.concurrency, ceiling) if profile else ceiling
+        self.in_use = 0
+        self.waiters = deque()
+        self.successes = 0
+        self.stale = 0  # Requests started before the last cut that have not finished yet
+        self._reset_session()
+        self._start_window(time.monotonic())
+
+    def _reset_session(self):
+        self.completed = 0
+        self.errors = 0
+        self.bytes = 0
+        self.started = None  # First request of the session (monotonic)
+        self.best = None  # (bytes/s, peak connections) of the best window
+
+    def _start_window(self, now: float):
+        self.window_start = now
+        self.window_bytes = 0
+        self.window_completed = 0
+        self.window_errors = 0
+        self.window_peak = self.in_use
+
+    async def acquire(self):
+        if self.started is None:
+            self.started = time.monotonic()
+        if self.in_use < self.limit and not self.waiters:
+            self.in_use += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self.waiters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release()  # The slot was handed over just before the cancel
+                elif future in self.waiters:
+                    self.waiters.remove(future)
+                raise
+        self.window_peak = max(self.window_peak, self.in_use)
+
+    def release(self):
+        self.in_use -= 1
+        self._wake()
+
+    def _wake(self):
+        while self.waiters and self.in_use < self.limit:
+            future = self.waiters.popleft()
+            if not future.done():
+                self.in_use += 1
+                future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def succeeded(self, size: int):
+        now = time.monotonic()
+        self._roll_window(now)
+        self.completed += 1
+        self.bytes += size
+        self.window_completed += 1
+        self.window_bytes += size
+        self.successes += 1
+        self.stale = max(0, self.stale - 1)
+        if self.successes >= self.limit and self.limit < self.ceiling and not self.stale:
+            self.limit += 1
+            self.successes = 0
+            self._wake()
+
+    def failed(self, throttled: bool):
+        now = time.monotonic()
+        self._roll_window(now)
+        self.errors += 1
+        self.window_errors += 1
+        # Requests in flight during a burst of throttling fail together: cut once per round of them
+        if self.stale:
+            self.stale -= 1
+        elif throttled:
+            self.limit = max(1, int(self.limit * BACKOFF))
+            self.successes = 0
+            self.stale = self.in_use - 1  # This request's slot is still held
+
+    def _roll_window(self, now: float, min_length: float = SAMPLE_WINDOW):
+        elapsed = now - self.window_start
+        if elapsed < min_length:
+            return
+        requests = self.window_completed + self.window_errors
+        if self.window_completed and self.window_errors <= MAX_ERROR_SHARE * requests:
+            throughput = self.window_bytes / elapsed
+            if self.best is None or throughput > self.best[0]:
+                self.best = (throughput, max(1, min(self.window_peak, self.ceiling)))
+        self._start_window(now)
+
+    def take_profile(self, previous: Optional[HostProfile]) -> Optional[HostProfile]:
+        """
+        The host's profile updated with this session, which then starts
+        over; None (and the session goes on) below MIN_SAMPLES requests.
+        """
+        samples = self.completed + self.errors
+        if samples < MIN_SAMPLES:
+            return None
+        now = time.monotonic()
+        self._roll_window(now, min_length=1.0)  # A short job may not fill a window
+        error_rate = self.errors / samples
+        if previous is not None:
+            error_rate = previous.error_rate + ERROR_RATE_WEIGHT * (error_rate - previous.error_rate)
+        if self.best is not None:
+            throughput, concurrency = self.best
+        else:
+            # No window ran clean: the limit the throttling left is the best guess
+            throughput, concurrency = self.bytes / max(now - self.started, 1e-3), self.limit
+        profile = HostProfile(
+            host=self.host,
+            concurrency=concurrency,
+            throughput=round(throughput, 1),
+            error_rate=round(error_rate, 4),
+            segment_size=self.bytes // self.completed if self.completed else (previous.segment_size if previous else 0),
+            samples=samples + (previous.samples if previous else 0),
+            updated=time.time(),
+        )
+        self._reset_session()
+        return profile
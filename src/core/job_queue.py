@@ -0,0 +1,145 @@
+import json
+import os
+from enum import Enum
+from typing import Dict, List, Optional
+from src.core.types import Job, JobStatus, SegmentStatus
+from src.core.jobs import build_job, build_playlist_job, segment_keys
+from src.core.hls import is_playlist_url
+
+# Statuses a job can be in while it still has work left
+UNFINISHED_STATUSES = (JobStatus.QUEUED.value, JobStatus.RUNNING.value, JobStatus.PAUSED.value)
+
+_SEGMENT_CODES = {
+    SegmentStatus.PENDING: "P",
+    SegmentStatus.DOWNLOADING: "D",
+    SegmentStatus.COMPLETED: "C",
+    SegmentStatus.FAILED: "F",
+}
+
+
+def status_value(status) -> str:
+    """Job.status holds either a JobStatus or its plain string value."""
+    return status.value if isinstance(status, Enum) else str(status)
+
+
+def segment_status_string(job: Job) -> str:
+    """Compact per-segment status (one letter per segment) for status snapshots."""
+    return "".join(_SEGMENT_CODES[s.status] for s in job.segments)
+
+
+def job_to_dict(job: Job, include_segments: bool = False) -> dict:
+    completed = sum(1 for s in job.segments if s.status == SegmentStatus.COMPLETED)
+    failed = sum(1 for s in job.segments if s.status == SegmentStatus.FAILED)
+    data = {
+        "name": job.name,
+        "base_url": job.base_url,
+        "start": job.start_index,
+        "end": job.end_index,
+        "filename": job.output_filename,
+        "padding": job.padding,
+        "rate_limit": job.rate_limit,
+        "follow": job.follow,
+        "playback": job.playback,
+        "priority": job.priority,
+        "status": status_value(job.status),
+        "total_segments": job.total_segments,
+        "completed_segments": completed,
+        "failed_segments": failed,
+    }
+    if include_segments:
+        data["segments"] = segment_status_string(job)
+    return data
+
+
+class JobQueue:
+    """
+    Ordered, persistent set of jobs owned by the daemon.
+    Only the job definitions and statuses are stored; segment state is
+    recovered from the segment cache when a job is (re)started.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.jobs: Dict[str, Job] = {}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading job queue: {e}")
+            return
+
+        for entry in entries:
+            try:
+                follow = bool(entry.get("follow"))
+                if "urls" in entry:
+                    job = build_playlist_job(entry["base_url"], entry["urls"], entry["filename"], follow,
+                                             entry.get("keys"))
+                else:
+                    job = build_job(entry["base_url"], entry["start"], entry["end"],
+                                    entry["filename"], entry.get("padding"), follow)
+                job.rate_limit = int(entry.get("rate_limit") or 0)
+                job.playback = bool(entry.get("playback"))
+                job.priority = int(entry.get("priority") or 0)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Skipping invalid queue entry: {e}")
+                continue
+            status = entry.get("status", JobStatus.QUEUED.value)
+            # A job that was running when the daemon stopped is resumed
+            if status == JobStatus.RUNNING.value:
+                status = JobStatus.QUEUED.value
+            try:
+                job.status = JobStatus(status)
+            except ValueError:
+                job.status = JobStatus.QUEUED
+            self.jobs[job.name] = job
+
+    def save(self):
+        entries = []
+        for job in self.jobs.values():
+            entry = job_to_dict(job)
+            entry = {k: entry[k] for k in ("base_url", "start", "end", "filename", "padding", "rate_limit",
+                                           "follow", "playback", "priority", "status")}
+            if is_playlist_url(job.base_url):
+                # The playlist may change or expire; keep the segment list it gave
+                entry["urls"] = [s.url for s in job.segments]
+                keys = segment_keys(job)
+                if keys:
+                    entry["keys"] = keys
+            entries.append(entry)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving job queue: {e}")
+
+    def add(self, job: Job, save: bool = True):
+        existing = self.jobs.get(job.name)
+        if existing is not None and status_value(existing.status) in UNFINISHED_STATUSES:
+            raise ValueError(f"Job '{job.name}' is already queued")
+        # Re-submitting a finished job replaces it (and moves it to the end)
+        self.jobs.pop(job.name, None)
+        self.jobs[job.name] = job
+        if save:
+            self.save()
+
+    def get(self, name: str) -> Optional[Job]:
+        return self.jobs.get(name)
+
+    def remove(self, name: str) -> Optional[Job]:
+        job = self.jobs.pop(name, None)
+        if job is not None:
+            self.save()
+        return job
+
+    def unfinished(self) -> List[Job]:
+        return [j for j in self.jobs.values() if status_value(j.status) in UNFINISHED_STATUSES]
+
+    def waiting(self) -> List[Job]:
+        """Queued jobs in start order: highest priority first, then in submission order."""
+        queued = [j for j in self.jobs.values() if status_value(j.status) == JobStatus.QUEUED.value]
+        return sorted(queued, key=lambda j: -j.priority)
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import shutil
+from typing import List, Optional, Tuple
+from src.core.types import Job, Segment
+from src.core.segment_manager import SegmentManager
+from src.core.merger import Merger
+from src.core.checksums import DEFAULT_ALGORITHM, Manifest
+from src.core.hls import load_media_playlist
+from src.core.decryption import require_crypto
+from src.core.ts_validator import is_ts_job
+from src.config import ConfigManager
+from src.utils.helpers import generate_url
+
+
+def normalize_output_filename(filename: str) -> str:
+    """Applies the default name and forces a video extension."""
+    fname = filename.strip() or "output.mp4"
+    if not fname.endswith(('.mp4', '.ts')):
+        fname += ".mp4"
+    return fname
+
+
+def build_job(base_url: str, start: int, end: int, filename: str, padding: Optional[str] = None,
+              follow: bool = False) -> Job:
+    """
+    Creates a Job with one Segment per index in [start, end].
+    Shared by the GUI and the CLI so both name and lay out jobs identically.
+    A follow job may start empty (end = start - 1) and grows as segments appear.
+    """
+    if start > end + (1 if follow else 0):
+        raise ValueError("Start index must be <= End index")
+
+    fname = normalize_output_filename(filename)
+    job_name = fname.replace(".", "_")  # Simple unique ID logic
+    job = Job(job_name, base_url, start, end, fname, padding=padding, follow=follow)
+
+    for i in range(start, end + 1):
+        job.segments.append(Segment(i, generate_url(base_url, i, padding)))
+    return job
+
+
+def build_playlist_job(playlist_url: str, segment_urls: List[str], filename: str, follow: bool = False,
+                       keys: Optional[List[Optional[Tuple[str, str]]]] = None) -> Job:
+    """
+    Creates a Job from an explicit segment list (an HLS playlist): segments
+    are numbered 0..n-1 in playlist order and keep their own URLs. `keys`
+    gives each segment's AES-128 (key URL, IV hex), or None if it is clear.
+    """
+    if not segment_urls and not follow:
+        raise ValueError("Playlist has no segments")
+    if keys and any(keys):
+        require_crypto()
+
+    fname = normalize_output_filename(filename)
+    job = Job(fname.replace(".", "_"), playlist_url, 0, len(segment_urls) - 1, fname, follow=follow)
+    job.segments = [Segment(i, url) for i, url in enumerate(segment_urls)]
+    for segment, key in zip(job.segments, keys or ()):
+        if key:
+            segment.key_url, segment.key_iv = key
+    return job
+
+
+def segment_keys(job: Job) -> Optional[List[Optional[Tuple[str, str]]]]:
+    """The `keys` argument of build_playlist_job() for a job, or None if nothing is encrypted."""
+    keys = [(s.key_url, s.key_iv) if s.key_url else None for s in job.segments]
+    return keys if any(keys) else None
+
+
+async def resolve_playlist_job(playlist_url: str, filename: str, max_bandwidth: Optional[int] = None,
+                               follow: bool = False) -> Job:
+    """
+    Loads an HLS playlist (picking a variant from a master playlist) and builds
+    its job. A live playlist (no EXT-X-ENDLIST) is only followed with `follow`;
+    otherwise the job takes the segments listed right now.
+    """
+    if max_bandwidth is None:
+        max_bandwidth = ConfigManager().get_config().max_bandwidth
+    playlist = await load_media_playlist(playlist_url.strip(), max_bandwidth)
+    entries = playlist.download_order
+    urls = [e.url for e in entries]
+    keys = [(e.key_url, e.key_iv) if e.key_url else None for e in entries]
+    if follow and not playlist.ended:
+        # Followed through the chosen variant's media playlist, which is what gets reloaded
+        return build_playlist_job(playlist.url, urls, filename, follow=True, keys=keys)
+    return build_playlist_job(playlist_url.strip(), urls, filename, keys=keys)
+
+
+def job_is_ts(job: Job) -> bool:
+    """Playlist jobs have no URL template; their segment URLs tell the format."""
+    return is_ts_job(job.segments[-1].url if job.segments else job.base_url)
+
+
+def wants_remux(job: Job) -> bool:
+    """Whether merging writes the job's .mp4 output as a real (fragmented) MP4 rather than TS bytes."""
+    return (ConfigManager().get_config().merge_backend == "remux"
+            and job.output_filename.lower().endswith(".mp4") and job_is_ts(job))
+
+
+async def merge_files(merger: Merger, segment_files: List[str], output_path: str,
+                      checksums: Optional[List[Optional[str]]] = None,
+                      algorithm: str = DEFAULT_ALGORITHM,
+                      progress_path: Optional[str] = None,
+                      remux: bool = False) -> Tuple[bool, bool, Optional[str]]:
+    """
+    Merges and verifies segment files on the merger's executor. With a
+    progress_path, segments are consumed (deleted) as they are merged;
+    otherwise remux writes TS segments as an MP4.
+    Returns (merged, integrity_ok, output_checksum).
+    """
+    loop = asyncio.get_running_loop()
+    if progress_path:
+        return await loop.run_in_executor(
+            merger.executor, merger.merge_consuming,
+            segment_files, output_path, progress_path, checksums, algorithm)
+    return await loop.run_in_executor(
+        merger.executor,
+        merger.merge_segments,
+        segment_files,
+        output_path,
+        checksums,
+        algorithm,
+        remux
+    )
+
+
+def should_consume(segment_files: List[str], output_path: str, progress_path: str) -> bool:
+    """
+    Free-space preflight for merge_mode "auto": consume segments while merging
+    when cache and output share a volume that cannot hold both copies.
+    """
+    if not all(isinstance(f, str) for f in segment_files):
+        return False  # A packed cache cannot give space back segment by segment
+    if os.path.exists(progress_path):
+        return True  # Finish an interrupted consume-mode merge
+    mode = ConfigManager().get_config().merge_mode
+    if mode != "auto":
+        return mode == "consume"
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    cache_dir = os.path.dirname(progress_path)
+    try:
+        if os.stat(output_dir).st_dev != os.stat(cache_dir).st_dev:
+            return False  # Deleting segments would not free space on the output volume
+        needed = sum(os.path.getsize(f) for f in segment_files if os.path.exists(f))
+        if os.path.exists(output_path):
+            needed -= os.path.getsize(output_path)  # Overwritten in place
+        # Keep some headroom for the filesystem and other writers
+        return shutil.disk_usage(output_dir).free < needed + max(needed // 100, 64 * 1024 * 1024)
+    except OSError:
+        return False
+
+
+async def merge_job(segment_manager: SegmentManager, merger: Merger, job: Job, output_folder: str) -> Tuple[bool, bool, str]:
+    """
+    Merges a downloaded job into output_folder, checking each segment against
+    the job's manifest and recording the output hash there.
+    Returns (merged, integrity_ok, output_path).
+    """
+    files = segment_manager.get_all_segment_files(job)
+    output_path = os.path.join(output_folder, job.output_filename)
+    manifest = Manifest.load(segment_manager.get_job_cache_path(job.name),
+                             ConfigManager().get_config().checksum_algorithm)
+    checksums = [s.checksum or manifest.get(s.index) for s in job.segments]
+    progress_path = segment_manager.get_merge_progress_path(job.name)
+    remux = wants_remux(job)
+    if not should_consume(files, output_path, progress_path):
+        progress_path = None
+    elif not os.path.exists(progress_path):
+        print(f"[{job.name}] Consume-mode merge: segments are deleted as they are merged"
+              + (" (kept as TS, remuxing needs both copies)" if remux else ""))
+    success, valid, checksum = await merge_files(merger, files, output_path, checksums, manifest.algorithm,
+                                                 progress_path, remux)
+    if success and os.path.isdir(os.path.dirname(manifest.path)):
+        manifest.set_output(job.output_filename, os.path.getsize(output_path), checksum)
+        manifest.save()
+    return success, valid, output_path
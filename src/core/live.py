@@ -0,0 +1,105 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import aiohttp
+from src.core.hls import MediaPlaylist, MediaSegment, fetch_playlist, is_playlist_url, parse_media_playlist
+from src.core.types import Job
+from src.utils.helpers import generate_url
+
+# Follow jobs always write the output while downloading; this is their
+# MemoryStore budget when memory_budget_mb is 0
+LIVE_MEMORY_BUDGET = 32 * 1024 * 1024
+# Indices probed at once past the last known segment of an [index] template
+LIVE_PROBE_AHEAD = 3
+
+
+class LiveSource(ABC):
+    """
+    Where a follow job learns about newly published segments. poll() returns
+    the segments that appeared since the previous call, in order; `interval` is
+    how long to wait (from the start of that poll) before polling again.
+    """
+    interval: float = 1.0
+    ended: bool = False
+
+    @abstractmethod
+    async def poll(self, session: aiohttp.ClientSession) -> List[MediaSegment]:
+        """The segments published since the previous poll."""
+
+
+class PlaylistSource(LiveSource):
+    """Reloads a live HLS media playlist and tracks segments by media sequence number."""
+
+    def __init__(self, playlist_url: str, known_urls: List[str]):
+        self.playlist_url = playlist_url
+        self.known_urls = known_urls
+        self.next_sequence: Optional[int] = None
+
+    async def poll(self, session: aiohttp.ClientSession) -> List[MediaSegment]:
+        playlist = parse_media_playlist(await fetch_playlist(session, self.playlist_url), self.playlist_url)
+
+        if self.next_sequence is None:
+            self.next_sequence = self._line_up(playlist)
+        elif playlist.media_sequence > self.next_sequence:
+            print(f"Live playlist dropped {playlist.media_sequence - self.next_sequence} segments "
+                  f"before they were seen; poll more often or raise max_concurrent_downloads")
+        new = [s for s in playlist.segments if s.sequence >= self.next_sequence]
+        if new:
+            self.next_sequence = new[-1].sequence + 1
+        # RFC 8216 6.3.4: reload after a target duration, or half of it if nothing changed
+        target = playlist.target_duration or 2.0
+        self.interval = target if new else target / 2
+        self.ended = playlist.ended
+        return new
+
+    def _line_up(self, playlist: MediaPlaylist) -> int:
+        """First sequence number not in the job yet (the whole window for a new job)."""
+        known = set(self.known_urls)
+        matched = [s.sequence for s in playlist.segments if s.url in known]
+        if matched:
+            return max(matched) + 1
+        if self.known_urls and playlist.segments:
+            print("Live playlist no longer lists any segment of this job; continuing from its current window")
+        return playlist.media_sequence
+
+
+class TemplateSource(LiveSource):
+    """
+    Probes an [index] URL template past the last known segment. Several
+    indices are probed at once, and again straight away while all of them
+    exist, so a job that starts behind the live edge catches up quickly.
+    """
+    def __init__(self, base_url: str, padding: Optional[str], next_index: int, interval: float):
+        self.base_url = base_url
+        self.padding = padding
+        self.next_index = next_index
+        self.poll_interval = interval
+
+    async def poll(self, session: aiohttp.ClientSession) -> List[MediaSegment]:
+        urls = [generate_url(self.base_url, i, self.padding)
+                for i in range(self.next_index, self.next_index + LIVE_PROBE_AHEAD)]
+        found = await asyncio.gather(*(self._exists(session, url) for url in urls))
+        new = []
+        for url, exists in zip(urls, found):
+            if not exists:
+                break
+            new.append(MediaSegment(url, 0.0, self.next_index + len(new)))
+        self.next_index += len(new)
+        self.interval = 0 if len(new) == LIVE_PROBE_AHEAD else self.poll_interval
+        return new
+
+    @staticmethod
+    async def _exists(session: aiohttp.ClientSession, url: str) -> bool:
+        # A one-byte ranged GET: HEAD is not allowed everywhere
+        try:
+            async with session.get(url, timeout=10, headers={"Range": "bytes=0-0"}) as response:
+                return response.status in (200, 206)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+
+def create_live_source(job: Job, poll_interval: float) -> LiveSource:
+    """A follow job's base URL is either a media playlist or an [index] template."""
+    if is_playlist_url(job.base_url):
+        return PlaylistSource(job.base_url, [s.url for s in job.segments])
+    return TemplateSource(job.base_url, job.padding, job.end_index + 1, poll_interval)
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import zlib
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+from src.core.checksums import new_hasher
+from src.core.merger import CONSUME_BATCH, MergeProgress
+from src.core.segment_manager import PART_SUFFIX
+from src.core.types import Segment
+
+
+class MemoryStore:
+    """
+    Hybrid segment store for jobs that fit in RAM: finished segments are
+    held in memory and appended to the output as soon as they are
+    contiguous, so they never go through the cache folder. A segment that
+    arrives out of order while the budget is used up is spilled to the
+    cache as usual and read back (and verified) when its turn comes.
+
+    Progress is kept in the consume-mode merge marker: an interrupted job
+    resumes after the last committed segment, and the final merge
+    (Merger.merge_consuming) only appends whatever is still on disk.
+
+    A `growing` store belongs to a follow job, whose segment list is
+    extended (see extend()) while it runs.
+    """
+    def __init__(self, output_path: str, progress_path: str, segments: List[Segment],
+                 segment_paths: List[str], budget: int, algorithm: Optional[str], executor: Executor,
+                 growing: bool = False):
+        self.output_path = output_path
+        self.segments = segments
+        self.segment_paths = segment_paths
+        self.growing = growing
+        self.budget = budget
+        self.algorithm = algorithm
+        self.executor = executor
+        self.progress = MergeProgress.load(progress_path)
+        self.position = 0        # Next segment (position in the job) the output is waiting for
+        self.pending: Dict[int, bytes] = {}  # position -> body, waiting for earlier segments
+        self.used = 0
+        self.held = set()        # Spilled positions that must pass validation before they are written
+        self.crc: Optional[int] = None
+        self.file = None
+        self.unsynced = 0
+        self.spilled_done: List[str] = []  # spilled files already in the output, removed on commit
+        self._lock = asyncio.Lock()
+
+    async def open(self):
+        await self._run(self._open)
+
+    def _open(self):
+        progress = self.progress
+        # A growing job may have been saved with more segments than the marker has seen
+        same_job = progress.total == len(self.segments) or (self.growing and progress.total <= len(self.segments))
+        resume = (progress.output == self.output_path and same_job
+                  and os.path.exists(self.output_path) and os.path.getsize(self.output_path) >= progress.offset)
+        if not resume:
+            progress = self.progress = MergeProgress(progress.path)
+            progress.output, progress.total = self.output_path, len(self.segments)
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self.file = open(self.output_path, 'r+b' if resume else 'wb')
+        self.file.truncate(progress.offset)
+        self.file.seek(progress.offset)
+        self.position = progress.next
+        # A running CRC-32 of the output; other algorithms cannot be carried across restarts
+        self.crc = (progress.crc or 0) if self.algorithm == "crc32" else None
+        progress.save()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def extend(self, segment_paths: List[str]):
+        """Cache paths of segments just appended to the job (growing stores)."""
+        self.segment_paths.extend(segment_paths)
+
+    def fits(self, position: int, size: int) -> bool:
+        """Whether a finished segment can be kept in memory (else it goes to the cache)."""
+        return position == self.position or self.used + size <= self.budget
+
+    async def add(self, position: int, data: bytes):
+        self.held.discard(position)
+        self.pending[position] = data
+        self.used += len(data)
+        await self._drain()
+
+    def hold(self, position: int):
+        """Keeps a segment that is about to be spilled out of the output until validate_job() passes it."""
+        self.held.add(position)
+
+    async def spilled(self, position: int):
+        """A segment went to the cache instead; it may be next in line."""
+        if position not in self.held:
+            await self._drain()
+
+    async def _drain(self):
+        async with self._lock:
+            while True:
+                # Contiguous run from memory, ending at most with one spilled file
+                batch = []
+                position = self.position
+                while position < len(self.segments):
+                    data = self.pending.pop(position, None)
+                    if data is not None:
+                        self.used -= len(data)
+                        batch.append(data)
+                    elif position not in self.held and os.path.exists(self.segment_paths[position]):
+                        batch.append(self.segment_paths[position])
+                        break
+                    else:
+                        break
+                    position += 1
+                if not batch:
+                    return
+                written = await self._run(self._write, self.position, batch)
+                self.position += written
+                if written < len(batch):
+                    return  # A spilled file failed its check; the final merge reports it
+
+    def _write(self, position: int, batch: list) -> int:
+        """Appends a batch to the output (I/O thread). Returns how many segments were written."""
+        written = 0
+        for item in batch:
+            if isinstance(item, str):
+                with open(item, 'rb') as f:
+                    data = f.read()
+                expected = self.segments[position + written].checksum
+                hasher = new_hasher(self.algorithm)
+                if expected and hasher is not None:
+                    hasher.update(data)
+                    if hasher.hexdigest() != expected:
+                        print(f"Checksum mismatch: {item}")
+                        return written
+                self.spilled_done.append(item)
+            else:
+                data = item
+            self.file.write(data)
+            if self.crc is not None:
+                self.crc = zlib.crc32(data, self.crc)
+            written += 1
+            self.unsynced += len(data)
+            if self.unsynced >= CONSUME_BATCH:
+                self._commit(position + written)
+        return written
+
+    def _commit(self, next_index: int):
+        """Makes the output durable up to next_index, then records it (same order as merge_consuming)."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.progress.next = next_index
+        self.progress.total = len(self.segments)
+        self.progress.offset = self.file.tell()
+        self.progress.crc = self.crc
+        self.progress.save()
+        for path in self.spilled_done:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.spilled_done.clear()
+        self.unsynced = 0
+
+    async def flush(self):
+        """Commits everything written so far (before validation reads the cache)."""
+        async with self._lock:
+            await self._run(self._commit, self.position)
+
+    async def close(self):
+        """Commits and spills whatever is still held in memory to the cache."""
+        await self.flush()
+        pending, self.pending = self.pending, {}
+        self.used = 0
+        await self._run(self._close, pending)
+
+    def _close(self, pending: Dict[int, bytes]):
+        self.file.close()
+        for position, data in pending.items():
+            path = self.segment_paths[position]
+            with open(path + PART_SUFFIX, 'wb') as f:
+                f.write(data)
+            os.replace(path + PART_SUFFIX, path)
@@ -1,19 +1,90 @@
+import json
 import os
-import shutil
+import threading
 from concurrent.futures import ThreadPoolExecutor
-from typing import List
+from itertools import accumulate
+from typing import List, Optional, Tuple
+from src.core.checksums import DEFAULT_ALGORITHM, Crc32, crc32_combine, new_hasher
+from src.core.remux import RemuxError, TsRemuxer
+from src.config import ConfigManager
+
+# Read size of the merge copy loop
+COPY_BUFFER = 1024 * 1024
+_OUTPUT_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+_INPUT_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+# Consume mode commits progress (fsync + marker) and frees segments in batches of this size
+CONSUME_BATCH = 64 * 1024 * 1024
+
+
+class MergeProgress:
+    """
+    Crash-safe marker of a consume-mode merge: segments before `next` are in
+    the output (up to `offset`, fsynced) and may already be deleted.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.output = ""
+        self.total = 0
+        self.next = 0
+        self.offset = 0
+        self.crc: Optional[int] = None
+
+    @classmethod
+    def load(cls, path: str) -> "MergeProgress":
+        progress = cls(path)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                progress.output = data["output"]
+                progress.total = data["total"]
+                progress.next = data["next"]
+                progress.offset = data["offset"]
+                progress.crc = data.get("crc")
+            except Exception as e:
+                print(f"Ignoring unreadable merge progress: {e}")
+                progress = cls(path)
+        return progress
+
+    def save(self):
+        data = {"output": self.output, "total": self.total, "next": self.next,
+                "offset": self.offset, "crc": self.crc}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        for path in (self.path, self.path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
 
 class Merger:
-    def __init__(self):
+    def __init__(self, threads: Optional[int] = None):
         self.executor = ThreadPoolExecutor(max_workers=1)
+        # Copy threads for the parallel merge; 1 = always sequential
+        self.threads = threads if threads is not None else ConfigManager().get_config().merge_threads
+        self._copy_pool: Optional[ThreadPoolExecutor] = None
+        self._copy_pool_lock = threading.Lock()  # Several folders may merge at once (folder_merge.py)
 
-    def merge_segments(self, segment_files: List[str], output_file: str) -> bool:
+    def merge_segments(self, segment_files: list, output_file: str,
+                       expected_checksums: Optional[List[Optional[str]]] = None,
+                       algorithm: Optional[str] = DEFAULT_ALGORITHM,
+                       remux: bool = False) -> Tuple[bool, bool, Optional[str]]:
         """
-        Merges segments into a single file using a separate thread for blocking I/O.
-        Returns a Future (implicitly handled if using run_in_executor correctly in async context, 
-        but here we design it to be called from an async wrapper or directly).
-        For this synchronous implementation, it blocks. 
-        It is intended to be run with loop.run_in_executor.
+        Merges segments into a single file. Blocking; intended to be run
+        with loop.run_in_executor. Entries are file paths or PackedSegment
+        ranges of a packed cache, which are copied straight from the pack.
+
+        Verification happens in the same pass: every segment is hashed as it
+        is copied and compared with expected_checksums (None entries are not
+        checked), and the whole output is hashed on the way, so no extra read
+        of the data is needed. algorithm "none" skips hashing.
+        With remux, MPEG-TS segments are written as a fragmented MP4 instead
+        (falling back to a plain merge if the stream cannot be remuxed).
+        Returns (merged, valid, output_checksum).
         """
         try:
             # Ensure output directory exists
@@ -21,31 +92,307 @@ class Merger:
             if output_dir and not os.path.exists(output_dir):
                 os.makedirs(output_dir, exist_ok=True)
 
-            with open(output_file, 'wb') as outfile:
-                for segment_path in segment_files:
-                    if not os.path.exists(segment_path):
-                        print(f"Missing segment during merge: {segment_path}")
-                        continue
-                        
-                    with open(segment_path, 'rb') as infile:
-                        shutil.copyfileobj(infile, outfile)
-            return True
+            if remux:
+                try:
+                    return self._merge_remux(segment_files, output_file, expected_checksums, algorithm)
+                except RemuxError as e:
+                    print(f"Cannot remux to MP4 ({e}); merging the segments as they are")
+            if self.can_merge_parallel(segment_files, algorithm):
+                return self._merge_parallel(segment_files, output_file, expected_checksums, algorithm)
+            return self._merge_sequential(segment_files, output_file, expected_checksums, algorithm)
         except Exception as e:
             print(f"Merge error: {e}")
-            return False
+            return False, False, None
+
+    def can_merge_parallel(self, segment_files: list, algorithm: Optional[str]) -> bool:
+        """
+        Parallel copies need positional writes (not on Windows) and a whole-file
+        hash that can be assembled from per-segment ones (CRC-32, or none).
+        """
+        return (self.threads > 1 and len(segment_files) > 1 and hasattr(os, "pwrite")
+                and algorithm in ("crc32", "none", None))
+
+    def _merge_sequential(self, segment_files, output_file, expected_checksums, algorithm):
+        valid = True
+        output_hasher = new_hasher(algorithm)
+        buffer = bytearray(COPY_BUFFER)
+        view = memoryview(buffer)
+        with open(output_file, 'wb') as outfile:
+            for i, segment in enumerate(segment_files):
+                segment_path, start, remaining = _segment_range(segment)
+                if not os.path.exists(segment_path):
+                    print(f"Missing segment during merge: {segment_path}")
+                    valid = False
+                    continue
 
-    def verify_integrity(self, segment_files: List[str], output_file: str) -> bool:
+                segment_hasher = new_hasher(algorithm)
+                with open(segment_path, 'rb') as infile:
+                    infile.seek(start)
+                    while True:
+                        n = infile.readinto(view if remaining is None else view[:min(remaining, COPY_BUFFER)])
+                        if not n:
+                            break
+                        if remaining is not None:
+                            remaining -= n
+                        chunk = view[:n]
+                        if segment_hasher is not None:
+                            segment_hasher.update(chunk)
+                            output_hasher.update(chunk)
+                        outfile.write(chunk)
+
+                expected = expected_checksums[i] if expected_checksums else None
+                if expected and segment_hasher and segment_hasher.hexdigest() != expected:
+                    print(f"Checksum mismatch: {segment}")
+                    valid = False
+        return True, valid, output_hasher.hexdigest() if output_hasher else None
+
+    def _merge_remux(self, segment_files, output_file, expected_checksums, algorithm):
+        """
+        Demuxes each segment and writes it as an MP4 fragment in the same
+        pass; segment checksums cover the TS data, the output hash the MP4.
+        """
+        valid = True
+        output_hasher = new_hasher(algorithm)
+        with open(output_file, 'wb') as outfile:
+            def write(data: bytes):
+                if output_hasher is not None:
+                    output_hasher.update(data)
+                outfile.write(data)
+
+            remuxer = TsRemuxer(write)
+            for i, segment in enumerate(segment_files):
+                segment_path, start, size = _segment_range(segment)
+                if not os.path.exists(segment_path):
+                    print(f"Missing segment during merge: {segment_path}")
+                    valid = False
+                    continue
+                with open(segment_path, 'rb') as infile:
+                    infile.seek(start)
+                    data = infile.read() if size is None else infile.read(size)
+
+                expected = expected_checksums[i] if expected_checksums else None
+                segment_hasher = new_hasher(algorithm)
+                if expected and segment_hasher:
+                    segment_hasher.update(data)
+                    if segment_hasher.hexdigest() != expected:
+                        print(f"Checksum mismatch: {segment}")
+                        valid = False
+                remuxer.add(data)
+            remuxer.finish()
+        return True, valid, output_hasher.hexdigest() if output_hasher else None
+
+    def _merge_parallel(self, segment_files, output_file, expected_checksums, algorithm):
         """
-        Checks if the output file size matches the sum of segment sizes.
+        The output layout is fixed once the sizes are known: each segment's
+        offset is the prefix sum of the sizes before it. The file is
+        preallocated and segments are copied concurrently to their offsets.
         """
+        valid = True
+        sizes = []
+        for segment in segment_files:
+            segment_path, _, size = _segment_range(segment)
+            try:
+                file_size = os.stat(segment_path).st_size
+                sizes.append(file_size if size is None else size)
+            except FileNotFoundError:
+                print(f"Missing segment during merge: {segment_path}")
+                valid = False
+                sizes.append(0)
+        offsets = list(accumulate(sizes, initial=0))
+
+        fd = os.open(output_file, _OUTPUT_FLAGS, 0o644)
         try:
-            if not os.path.exists(output_file):
-                return False
-                
-            total_segment_size = sum(os.path.getsize(f) for f in segment_files if os.path.exists(f))
-            final_size = os.path.getsize(output_file)
-            
-            return total_segment_size == final_size
+            _preallocate(fd, offsets[-1])
+            with self._copy_pool_lock:
+                if self._copy_pool is None:
+                    self._copy_pool = ThreadPoolExecutor(max_workers=self.threads,
+                                                         thread_name_prefix="fastflux-merge")
+            hashers = list(self._copy_pool.map(
+                lambda i: _copy_segment(segment_files[i], fd, offsets[i], sizes[i], algorithm) if sizes[i] else None,
+                range(len(segment_files))))
+        finally:
+            os.close(fd)
+
+        if new_hasher(algorithm) is None:
+            return True, valid, None
+
+        output_crc = 0
+        for i, (segment_hasher, size) in enumerate(zip(hashers, sizes)):
+            if segment_hasher is None:
+                continue
+            expected = expected_checksums[i] if expected_checksums else None
+            if expected and segment_hasher.hexdigest() != expected:
+                print(f"Checksum mismatch: {segment_files[i]}")
+                valid = False
+            output_crc = crc32_combine(output_crc, segment_hasher.value, size)
+        return True, valid, f"{output_crc:08x}"
+
+    def merge_consuming(self, segment_files: List[str], output_file: str, progress_path: str,
+                        expected_checksums: Optional[List[Optional[str]]] = None,
+                        algorithm: Optional[str] = DEFAULT_ALGORITHM) -> Tuple[bool, bool, Optional[str]]:
+        """
+        Merge for low disk space: appends segments one by one and deletes them
+        once they are safely in the output, so the job never needs room for
+        two copies. Every CONSUME_BATCH bytes the output is fsynced, the
+        progress marker is written, and only then are the copied segments
+        removed; after a crash the merge resumes from the marker.
+
+        A missing or corrupt segment stops the merge (it cannot be repaired
+        once later segments are consumed): the bad file is removed so that
+        downloading the job again fetches it, and the merge can be resumed.
+        Returns (merged, valid, output_checksum) like merge_segments().
+        """
+        try:
+            progress = MergeProgress.load(progress_path)
+            resume = (progress.output == output_file and progress.total == len(segment_files)
+                      and os.path.exists(output_file) and os.path.getsize(output_file) >= progress.offset)
+            if not resume:
+                progress = MergeProgress(progress_path)
+                progress.output, progress.total = output_file, len(segment_files)
+            else:
+                # Leftovers of a crash between writing the marker and deleting
+                for path in segment_files[:progress.next]:
+                    _remove_if_exists(path)
+
+            # Only a CRC-32 can be carried across a restart (segment CRCs are combined);
+            # other output hashes are only available for an uninterrupted merge
+            combine = algorithm == "crc32"
+            if combine:
+                output_hasher = Crc32()
+                output_hasher.value = progress.crc or 0
+            else:
+                output_hasher = new_hasher(algorithm) if progress.next == 0 else None
+
+            output_dir = os.path.dirname(output_file)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir, exist_ok=True)
+
+            consumed = []  # copied but not yet committed
+            pending_bytes = 0
+            with open(output_file, 'r+b' if resume else 'wb') as outfile:
+                outfile.truncate(progress.offset)
+                outfile.seek(progress.offset)
+
+                def commit(next_index: int):
+                    outfile.flush()
+                    os.fsync(outfile.fileno())
+                    progress.next = next_index
+                    progress.offset = outfile.tell()
+                    progress.crc = output_hasher.value if combine else None
+                    progress.save()
+                    for path in consumed:
+                        _remove_if_exists(path)
+                    consumed.clear()
+
+                for i in range(progress.next, len(segment_files)):
+                    segment_path = segment_files[i]
+                    segment_start = outfile.tell()
+                    if not os.path.exists(segment_path):
+                        print(f"Missing segment during merge: {segment_path}")
+                        commit(i)
+                        return False, False, None
+
+                    segment_hasher = new_hasher(algorithm)
+                    with open(segment_path, 'rb') as infile:
+                        while True:
+                            chunk = infile.read(COPY_BUFFER)
+                            if not chunk:
+                                break
+                            if segment_hasher is not None:
+                                segment_hasher.update(chunk)
+                            if output_hasher is not None and not combine:
+                                output_hasher.update(chunk)
+                            outfile.write(chunk)
+                    segment_size = outfile.tell() - segment_start
+
+                    expected = expected_checksums[i] if expected_checksums else None
+                    if expected and segment_hasher and segment_hasher.hexdigest() != expected:
+                        print(f"Checksum mismatch: {segment_path} - removed, download the job again to fetch it")
+                        outfile.seek(segment_start)
+                        outfile.truncate()
+                        commit(i)
+                        _remove_if_exists(segment_path)
+                        return False, False, None
+
+                    if combine:
+                        output_hasher.value = crc32_combine(output_hasher.value, segment_hasher.value, segment_size)
+                    consumed.append(segment_path)
+                    pending_bytes += segment_size
+                    if pending_bytes >= CONSUME_BATCH:
+                        commit(i + 1)
+                        pending_bytes = 0
+                commit(len(segment_files))
+
+            progress.clear()
+            return True, True, output_hasher.hexdigest() if output_hasher else None
         except Exception as e:
-            print(f"Integrity check error: {e}")
-            return False
+            print(f"Merge error: {e}")
+            return False, False, None
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        if self._copy_pool is not None:
+            self._copy_pool.shutdown(wait=False)
+
+
+def _remove_if_exists(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _preallocate(fd: int, size: int):
+    """Reserves the whole output up front so parallel writers do not fragment it."""
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass  # Not supported by this filesystem
+    os.ftruncate(fd, size)
+
+
+def _segment_range(segment) -> Tuple[str, int, Optional[int]]:
+    """(path, start, size) of a segment file (size None = whole file) or of a PackedSegment."""
+    if isinstance(segment, str):
+        return segment, 0, None
+    return segment.path, segment.offset, segment.size
+
+
+def _copy_segment(segment, out_fd: int, offset: int, size: int, algorithm):
+    """
+    Copies one segment to its offset in the output (runs on a merge thread).
+    Returns the segment's hasher, or None when hashing is off; then the copy
+    stays in the kernel via copy_file_range where available.
+    """
+    path, start, _ = _segment_range(segment)
+    hasher = new_hasher(algorithm)
+    in_fd = os.open(path, _INPUT_FLAGS)
+    try:
+        copied = 0
+        if hasher is None and hasattr(os, "copy_file_range"):
+            try:
+                while copied < size:
+                    n = os.copy_file_range(in_fd, out_fd, size - copied, start + copied, offset + copied)
+                    if not n:
+                        break
+                    copied += n
+            except OSError:
+                pass  # e.g. not supported between these filesystems: finish with plain reads
+        while copied < size:
+            chunk = os.pread(in_fd, min(COPY_BUFFER, size - copied), start + copied)
+            if not chunk:
+                break
+            if hasher is not None:
+                hasher.update(chunk)
+            view = memoryview(chunk)
+            while view:
+                written = os.pwrite(out_fd, view, offset + copied)
+                copied += written
+                view = view[written:]
+        if copied != size:
+            raise IOError(f"{path} changed during merge ({copied} of {size} bytes)")
+    finally:
+        os.close(in_fd)
+    return hasher
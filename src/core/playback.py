@@ -0,0 +1,211 @@
+import asyncio
+import bisect
+import os
+from typing import Dict, List, Optional, Tuple
+from aiohttp import web
+from src.core.types import Job, JobStatus, Segment, SegmentStatus
+from src.core.segment_pack import load_pack_index
+from src.core.jobs import job_is_ts
+
+# Seconds a Range request past the downloaded part waits for it before giving up
+PLAYBACK_WAIT = 30.0
+# Read size when streaming segments to a player
+STREAM_CHUNK = 256 * 1024
+_FINISHED = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.MERGE_ERROR)
+
+
+class _Prefix:
+    """The run of completed segments from the first one on: their sources and end offsets."""
+    def __init__(self):
+        self.sources: list = []   # File paths or PackedSegment ranges
+        self.ends: List[int] = []  # Output offset just past each segment
+
+    @property
+    def size(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+
+class PlaybackServer:
+    """
+    Serves the output of a job while it downloads, so a player can start
+    before the merge: GET /jobs/{name}/stream returns the segments that are
+    complete from the first one on, in order. Without a Range header the
+    response keeps streaming as the next segments arrive; Range requests
+    are answered from the downloaded part (total length "*" until the job
+    is complete) and wait up to PLAYBACK_WAIT seconds for bytes not there
+    yet. Waiting moves the job's playhead, which playback jobs download
+    from first (Downloader._run_playback).
+
+    Once the job is merged and its cache is gone, the output file is served.
+    """
+    def __init__(self, downloader, jobs: Dict[str, Job]):
+        self.downloader = downloader
+        self.jobs = jobs
+        self.prefixes: Dict[str, _Prefix] = {}
+        self.pack_indexes: Dict[str, dict] = {}  # Indexes of packs no longer open for writing
+        self.changed: Dict[str, asyncio.Event] = {}  # job_name -> set (and replaced) on each new segment
+        self.runner: Optional[web.AppRunner] = None
+        downloader.events.segment_status_changed.connect(self._on_segment_status)
+
+    def add_routes(self, app: web.Application):
+        app.router.add_get("/jobs/{name}/stream", self.handle_stream)
+
+    async def start(self, host: str, port: int):
+        app = web.Application()
+        self.add_routes(app)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def _on_segment_status(self, job_name: str, index: int, status: str):
+        if status == "Completed":
+            event = self.changed.pop(job_name, None)
+            if event is not None:
+                event.set()
+
+    def _source(self, job: Job, segment: Segment) -> Optional[Tuple[object, int]]:
+        """(source, size) of a completed segment in the cache, or None if it is not there."""
+        manager = self.downloader.segment_manager
+        if manager.layout == "pack":
+            pack = manager.packs.get(job.name)
+            if pack is not None:
+                entry = pack.get(segment.index)
+            else:
+                index = self.pack_indexes.get(job.name)
+                if index is None or segment.index not in index:
+                    index = self.pack_indexes[job.name] = load_pack_index(manager.get_job_cache_path(job.name))
+                entry = index.get(segment.index)
+            return (entry, entry.size) if entry is not None else None
+        path = manager.get_segment_path(job, segment)
+        try:
+            return path, os.path.getsize(path)
+        except OSError:
+            return None
+
+    def _prefix(self, job: Job) -> _Prefix:
+        prefix = self.prefixes.setdefault(job.name, _Prefix())
+        while len(prefix.sources) < len(job.segments):
+            segment = job.segments[len(prefix.sources)]
+            found = self._source(job, segment) if segment.status == SegmentStatus.COMPLETED else None
+            if found is None:
+                break
+            prefix.sources.append(found[0])
+            prefix.ends.append(prefix.size + found[1])
+        return prefix
+
+    def _complete(self, job: Job, prefix: _Prefix) -> bool:
+        return len(prefix.sources) == len(job.segments) and not job.follow
+
+    async def _wait_for(self, job: Job, size: int, timeout: Optional[float]) -> bool:
+        """Waits until the prefix holds `size` bytes; False on timeout or if the job ended short of it."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            prefix = self._prefix(job)
+            if prefix.size >= size:
+                return True
+            if self._complete(job, prefix) or job.status in _FINISHED:
+                return False
+            self.downloader.set_playhead(job.name, len(prefix.sources))
+            event = self.changed.setdefault(job.name, asyncio.Event())
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                # Also re-checked every few seconds: a pause or cancel does not complete a segment
+                await asyncio.wait_for(event.wait(), min(remaining or 5.0, 5.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, response: web.StreamResponse, job: Job, start: int, end: int):
+        """Writes output bytes [start, end) of the prefix, read from the cache on an I/O thread."""
+        prefix = self._prefix(job)
+        position = bisect.bisect_right(prefix.ends, start)
+        loop = asyncio.get_running_loop()
+        while start < end:
+            segment_start = prefix.ends[position - 1] if position else 0
+            length = min(end, prefix.ends[position]) - start
+            offset = start - segment_start
+            while length > 0:
+                n = min(length, STREAM_CHUNK)
+                data = await loop.run_in_executor(None, _read, prefix.sources[position], offset, n)
+                if len(data) != n:
+                    raise IOError(f"segment {position} changed while streaming")
+                await response.write(data)
+                start += n
+                offset += n
+                length -= n
+            position += 1
+
+    def _unsatisfiable(self, job: Job) -> web.HTTPRequestRangeNotSatisfiable:
+        """416 with the output's length once it is known; "bytes */*" is not valid, so none before."""
+        prefix = self._prefix(job)
+        headers = {"Content-Range": f"bytes */{prefix.size}"} if self._complete(job, prefix) else None
+        return web.HTTPRequestRangeNotSatisfiable(headers=headers)
+
+    async def handle_stream(self, request: web.Request) -> web.StreamResponse:
+        job = self.jobs.get(request.match_info["name"])
+        if job is None:
+            raise web.HTTPNotFound(text="No such job")
+        if job.status == JobStatus.COMPLETED:
+            self.prefixes.pop(job.name, None)  # The merge may have consumed or cleared the cache
+        prefix = self._prefix(job)
+        output_path = os.path.join(self.downloader.segment_manager.base_download_path, job.output_filename)
+        if not prefix.sources and job.status == JobStatus.COMPLETED and os.path.exists(output_path):
+            return web.FileResponse(output_path)  # Merged and cleared: the output has full Range support
+
+        headers = {"Accept-Ranges": "bytes", "Content-Type": "video/mp2t" if job_is_ts(job) else "video/mp4"}
+        byte_range = _parse_range(request.headers.get("Range"))
+        if byte_range is not None:
+            start, last = byte_range
+            if (last is not None and last < start) or not await self._wait_for(job, start + 1, PLAYBACK_WAIT):
+                raise self._unsatisfiable(job)
+            prefix = self._prefix(job)
+            last = prefix.size - 1 if last is None else min(last, prefix.size - 1)
+            total = prefix.size if self._complete(job, prefix) else "*"
+            headers["Content-Range"] = f"bytes {start}-{last}/{total}"
+            response = web.StreamResponse(status=206, headers=headers)
+            response.content_length = last + 1 - start
+            await response.prepare(request)
+            await self._send(response, job, start, last + 1)
+            await response.write_eof()
+            return response
+
+        # Whole stream: keeps going as segments complete, until the job is done
+        response = web.StreamResponse(headers=headers)
+        if self._complete(job, prefix):
+            response.content_length = prefix.size
+        await response.prepare(request)
+        sent = 0
+        while True:
+            size = self._prefix(job).size
+            if sent < size:
+                await self._send(response, job, sent, size)
+                sent = size
+            elif not await self._wait_for(job, sent + 1, None):
+                break
+        await response.write_eof()
+        return response
+
+
+def _parse_range(header: Optional[str]) -> Optional[Tuple[int, Optional[int]]]:
+    """(first, last or None) of a single "bytes=first-[last]" range; suffix and multi-ranges are not served."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].partition("-")
+    try:
+        return int(first), int(last) if last else None
+    except ValueError:
+        return None
+
+
+def _read(source, offset: int, size: int) -> bytes:
+    path, start = (source, 0) if isinstance(source, str) else (source.path, source.offset)
+    with open(path, 'rb') as f:
+        f.seek(start + offset)
+        return f.read(size)
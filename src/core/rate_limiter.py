@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+# Burst allowance, in seconds' worth of the configured rate
+BURST_SECONDS = 0.25
+# Never smaller than one read chunk, or a single read could never be covered
+MIN_BURST = 64 * 1024
+
+
+class TokenBucket:
+    """
+    Byte-rate limiter shared by any number of concurrent streams.
+
+    consume() is called after each chunk is read from the socket. Waiters
+    are served one at a time (FIFO) and the bucket may go into debt, so the
+    long-run rate stays exact no matter how many connections share it: the
+    bucket holder sleeps off its own debt and everyone else queues behind it.
+    A rate of 0 (or None) means unlimited. set_rate() takes effect
+    immediately, including for streams that are currently waiting.
+    """
+    def __init__(self, rate: float = 0):
+        self.rate = 0.0
+        self.burst = 0.0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self.set_rate(rate)
+
+    @property
+    def limited(self) -> bool:
+        return self.rate > 0
+
+    def set_rate(self, rate: float):
+        self._refill()
+        self.rate = float(rate or 0)
+        self.burst = max(self.rate * BURST_SECONDS, MIN_BURST) if self.rate else 0.0
+        self.tokens = min(self.tokens, self.burst)
+        # Wake the current waiter so it recomputes its sleep with the new rate
+        self._changed.set()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def consume(self, amount: int):
+        if not self.rate:
+            return
+        async with self._lock:
+            self._refill()
+            self.tokens -= amount
+            while self.tokens < 0 and self.rate:
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), -self.tokens / self.rate)
+                except asyncio.TimeoutError:
+                    pass
+                self._refill()
+            if not self.rate:
+                # Limit lifted while we waited: forget the debt
+                self.tokens = 0.0
@@ -0,0 +1,551 @@
+import struct
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: without NumPy packets are split in a Python loop (several times slower)
+    np = None
+
+TS_PACKET_SIZE = 188
+SYNC_BYTE = 0x47
+PAT_PID = 0x0000
+STREAM_AAC = 0x0F   # ADTS AAC
+STREAM_H264 = 0x1B
+# PES timestamps are 33-bit counters of a 90 kHz clock
+PES_CLOCK = 90000
+TIMESTAMP_WRAP = 1 << 33
+# Durations used for a track's very last sample when it has no successor
+DEFAULT_VIDEO_DURATION = PES_CLOCK // 30
+AAC_FRAME_SAMPLES = 1024
+AAC_SAMPLE_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350)
+
+# trun sample flags: sync samples depend on nothing, others on earlier ones
+SYNC_SAMPLE_FLAGS = 0x02000000
+NON_SYNC_SAMPLE_FLAGS = 0x01010000
+_MATRIX = struct.pack(">9I", 0x00010000, 0, 0, 0, 0x00010000, 0, 0, 0, 0x40000000)
+
+
+class RemuxError(Exception):
+    """The stream cannot be remuxed (not MPEG-TS, or no H.264/AAC in it)."""
+
+
+def _split_packets(data: bytes) -> Dict[int, Tuple[bytes, List[int]]]:
+    """
+    Per PID: its packet payloads joined together, and the offsets in them
+    where a unit (PES packet or PSI section) starts.
+    """
+    count = len(data) // TS_PACKET_SIZE
+    if count == 0:
+        return {}
+    if np is None:
+        return _split_packets_plain(data, count)
+
+    packets = np.frombuffer(data, dtype=np.uint8, count=count * TS_PACKET_SIZE).reshape(-1, TS_PACKET_SIZE)
+    if not (packets[:, 0] == SYNC_BYTE).all():
+        raise RemuxError(f"lost sync at packet {int(np.argmax(packets[:, 0] != SYNC_BYTE))}")
+    pids = ((packets[:, 1].astype(np.uint16) & 0x1F) << 8) | packets[:, 2]
+    unit_start = (packets[:, 1] & 0x40) != 0
+    control = packets[:, 3] >> 4
+    # Payload starts after the header and the adaptation field; packets without one contribute nothing
+    starts = np.where(control & 0x2, 5 + packets[:, 4].astype(np.int32), 4)
+    starts = np.minimum(np.where(control & 0x1, starts, TS_PACKET_SIZE), TS_PACKET_SIZE)
+    columns = np.arange(TS_PACKET_SIZE)
+
+    result = {}
+    for pid in np.unique(pids).tolist():
+        rows = np.flatnonzero(pids == pid)
+        row_starts = starts[rows]
+        # Row-major boolean selection yields the payload bytes in stream order
+        payload = packets[rows][columns >= row_starts[:, None]].tobytes()
+        offsets = np.cumsum(TS_PACKET_SIZE - row_starts) - (TS_PACKET_SIZE - row_starts)
+        result[pid] = (payload, offsets[unit_start[rows]].tolist())
+    return result
+
+
+def _split_packets_plain(data: bytes, count: int) -> Dict[int, Tuple[bytes, List[int]]]:
+    payloads: Dict[int, bytearray] = {}
+    units: Dict[int, List[int]] = {}
+    for i in range(0, count * TS_PACKET_SIZE, TS_PACKET_SIZE):
+        if data[i] != SYNC_BYTE:
+            raise RemuxError(f"lost sync at packet {i // TS_PACKET_SIZE}")
+        pid = ((data[i + 1] & 0x1F) << 8) | data[i + 2]
+        control = data[i + 3] >> 4
+        if not control & 0x1:
+            continue
+        start = i + (5 + data[i + 4] if control & 0x2 else 4)
+        payload = payloads.setdefault(pid, bytearray())
+        if data[i + 1] & 0x40:
+            units.setdefault(pid, []).append(len(payload))
+        payload += data[start:i + TS_PACKET_SIZE]
+    return {pid: (bytes(payload), units.get(pid, [])) for pid, payload in payloads.items()}
+
+
+def _psi_section(payload: bytes, offset: int) -> bytes:
+    """The section starting at a unit offset (skipping the pointer field), without its CRC."""
+    start = offset + 1 + payload[offset]
+    length = ((payload[start + 1] & 0x0F) << 8) | payload[start + 2]
+    return payload[start:start + 3 + length - 4]
+
+
+def _parse_pat(section: bytes) -> List[int]:
+    """PMT PIDs listed in a PAT (network PID entries skipped)."""
+    return [((section[i + 2] & 0x1F) << 8) | section[i + 3]
+            for i in range(8, len(section) - 3, 4) if section[i] or section[i + 1]]
+
+
+def _parse_pmt(section: bytes) -> Dict[int, int]:
+    """Elementary stream PID -> stream_type of a PMT."""
+    streams = {}
+    i = 12 + (((section[10] & 0x0F) << 8) | section[11])  # After program_info
+    while i + 5 <= len(section):
+        streams[((section[i + 1] & 0x1F) << 8) | section[i + 2]] = section[i]
+        i += 5 + (((section[i + 3] & 0x0F) << 8) | section[i + 4])
+    return streams
+
+
+def _pes_timestamp(data: bytes, i: int) -> int:
+    return (((data[i] >> 1) & 0x07) << 30 | data[i + 1] << 22 | (data[i + 2] >> 1) << 15
+            | data[i + 3] << 7 | data[i + 4] >> 1)
+
+
+def _parse_pes(pes: bytes) -> Optional[Tuple[Optional[int], Optional[int], bytes]]:
+    """(PTS, DTS, payload) of a PES packet; DTS defaults to the PTS. None if it is not one."""
+    if len(pes) < 9 or pes[:3] != b"\x00\x00\x01":
+        return None
+    pts = _pes_timestamp(pes, 9) if pes[7] & 0x80 else None
+    dts = _pes_timestamp(pes, 14) if pes[7] & 0x40 else pts
+    length = (pes[4] << 8) | pes[5]
+    return pts, dts, pes[9 + pes[8]:6 + length if length else len(pes)]
+
+
+class TsDemuxer:
+    """
+    Turns MPEG-TS data, fed a segment at a time, into complete PES packets of
+    the H.264 and AAC streams of the first program. A PES packet cut by a
+    segment boundary is completed by the next segment.
+    """
+    def __init__(self):
+        self.pmt_pid: Optional[int] = None
+        self.streams: Dict[int, int] = {}  # PID -> stream_type
+        self.partial: Dict[int, bytes] = {}  # PID -> PES packet still being received
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        """Returns the (PID, PES packet) pairs completed by this data, in stream order per PID."""
+        split = _split_packets(data)
+        if PAT_PID in split and self.pmt_pid is None:
+            payload, units = split[PAT_PID]
+            if units:
+                pmt_pids = _parse_pat(_psi_section(payload, units[0]))
+                self.pmt_pid = pmt_pids[0] if pmt_pids else None
+        if self.pmt_pid in split and not self.streams:
+            payload, units = split[self.pmt_pid]
+            if units:
+                streams = _parse_pmt(_psi_section(payload, units[0]))
+                self.streams = {pid: kind for pid, kind in streams.items() if kind in (STREAM_H264, STREAM_AAC)}
+                if not self.streams:
+                    raise RemuxError("no H.264 or AAC stream (stream types "
+                                     f"{', '.join(hex(kind) for kind in streams.values())})")
+
+        completed = []
+        for pid in self.streams:
+            if pid not in split:
+                continue
+            payload, units = split[pid]
+            # Bytes before the first unit start continue the previous packet (dropped if there is none)
+            head = payload[:units[0]] if units else payload
+            if pid in self.partial:
+                self.partial[pid] += head
+            if not units:
+                continue
+            if pid in self.partial:
+                completed.append((pid, self.partial.pop(pid)))
+            for start, end in zip(units, units[1:]):
+                completed.append((pid, payload[start:end]))
+            self.partial[pid] = payload[units[-1]:]
+        return completed
+
+    def flush(self) -> List[Tuple[int, bytes]]:
+        completed = list(self.partial.items())
+        self.partial.clear()
+        return completed
+
+
+class _BitReader:
+    def __init__(self, data: bytes):
+        self.value = int.from_bytes(data, "big")
+        self.remaining = len(data) * 8
+
+    def bits(self, n: int) -> int:
+        self.remaining -= n
+        if self.remaining < 0:
+            raise RemuxError("truncated SPS")
+        return (self.value >> self.remaining) & ((1 << n) - 1)
+
+    def ue(self) -> int:
+        zeros = 0
+        while not self.bits(1):
+            zeros += 1
+        return (1 << zeros) - 1 + self.bits(zeros)
+
+    def se(self) -> int:
+        value = self.ue()
+        return (value + 1) // 2 if value & 1 else -(value // 2)
+
+
+def _parse_sps(sps: bytes) -> Tuple[int, int, bytes]:
+    """(width, height, avcC extension bytes for High profiles) of an H.264 SPS NAL unit."""
+    reader = _BitReader(sps[1:].replace(b"\x00\x00\x03", b"\x00\x00"))  # RBSP without emulation bytes
+    profile = reader.bits(8)
+    reader.bits(16)  # Constraint flags, level
+    reader.ue()
+    chroma_format, separate_planes, depth_luma, depth_chroma = 1, 0, 0, 0
+    extension = b""
+    if profile in (100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135):
+        chroma_format = reader.ue()
+        if chroma_format == 3:
+            separate_planes = reader.bits(1)
+        depth_luma, depth_chroma = reader.ue(), reader.ue()
+        reader.bits(1)
+        if reader.bits(1):  # Scaling matrices: skipped entry by entry
+            for i in range(12 if chroma_format == 3 else 8):
+                if reader.bits(1):
+                    last = following = 8
+                    for _ in range(16 if i < 6 else 64):
+                        if following:
+                            following = (last + reader.se()) % 256
+                        last = following or last
+        extension = bytes((0xFC | chroma_format, 0xF8 | depth_luma, 0xF8 | depth_chroma, 0))
+    reader.ue()  # log2_max_frame_num_minus4
+    order_type = reader.ue()
+    if order_type == 0:
+        reader.ue()
+    elif order_type == 1:
+        reader.bits(1)
+        reader.se()
+        reader.se()
+        for _ in range(reader.ue()):
+            reader.se()
+    reader.ue()
+    reader.bits(1)
+    width_mbs, height_units = reader.ue() + 1, reader.ue() + 1
+    frame_mbs_only = reader.bits(1)
+    if not frame_mbs_only:
+        reader.bits(1)
+    reader.bits(1)
+    crop = (reader.ue(), reader.ue(), reader.ue(), reader.ue()) if reader.bits(1) else (0, 0, 0, 0)
+    if separate_planes or chroma_format == 0:
+        crop_x, crop_y = 1, 2 - frame_mbs_only
+    else:
+        crop_x, crop_y = (1 if chroma_format == 3 else 2), (2 if chroma_format == 1 else 1) * (2 - frame_mbs_only)
+    width = width_mbs * 16 - crop_x * (crop[0] + crop[1])
+    height = (2 - frame_mbs_only) * height_units * 16 - crop_y * (crop[2] + crop[3])
+    return width, height, extension
+
+
+def _split_nal_units(data: bytes) -> List[bytes]:
+    """NAL units of an Annex B byte stream (start codes removed)."""
+    units = []
+    start = data.find(b"\x00\x00\x01")
+    while start >= 0:
+        end = data.find(b"\x00\x00\x01", start + 3)
+        unit = data[start + 3:end if end >= 0 else len(data)].rstrip(b"\x00")
+        if unit:
+            units.append(unit)
+        start = end
+    return units
+
+
+class _Track(ABC):
+    """Samples of one stream waiting to be written, as (data, decode time, composition offset, sync)."""
+    handler = b""
+
+    def __init__(self, track_id: int, timescale: int):
+        self.track_id = track_id
+        self.timescale = timescale
+        self.samples: List[Tuple[bytes, int, int, bool]] = []
+        self.last_duration = 0
+        self.last_timestamp: Optional[int] = None
+
+    def unwrap(self, timestamp: int, origin: int) -> int:
+        """A PES timestamp as 90 kHz ticks since the origin, continuous across the 33-bit wrap."""
+        reference = origin if self.last_timestamp is None else self.last_timestamp
+        timestamp += round((reference - timestamp) / TIMESTAMP_WRAP) * TIMESTAMP_WRAP
+        self.last_timestamp = timestamp
+        return timestamp - origin
+
+    @property
+    @abstractmethod
+    def ready(self) -> bool:
+        """Whether the sample description is known."""
+
+    @abstractmethod
+    def sample_entry(self) -> bytes:
+        """The stsd entry (avc1, mp4a) describing the samples."""
+
+    def take(self, final: bool) -> Tuple[Optional[int], List[Tuple[bytes, int, int, bool]], List[int]]:
+        """
+        The samples for the next fragment with their durations, and the
+        fragment's base decode time. The last sample is kept back (its
+        duration is the gap to its successor) unless this is the final one.
+        """
+        samples = self.samples if final else self.samples[:-1]
+        self.samples = self.samples[len(samples):]
+        if not samples:
+            return None, [], []
+        times = [s[1] for s in samples] + [self.samples[0][1] if self.samples else None]
+        durations = []
+        for time, following in zip(times, times[1:]):
+            if following is not None and following > time:
+                self.last_duration = following - time
+            durations.append(self.last_duration or self.default_duration)
+        return samples[0][1], samples, durations
+
+    default_duration = 1
+
+
+class _VideoTrack(_Track):
+    handler = b"vide"
+    default_duration = DEFAULT_VIDEO_DURATION
+
+    def __init__(self, track_id: int):
+        super().__init__(track_id, PES_CLOCK)
+        self.sps: Optional[bytes] = None
+        self.pps: Optional[bytes] = None
+        self.width = self.height = 0
+        self.sps_extension = b""
+
+    @property
+    def ready(self) -> bool:
+        return self.sps is not None and self.pps is not None
+
+    def add(self, pts: Optional[int], dts: Optional[int], payload: bytes, origin: int):
+        """One PES packet holds one access unit; parameter sets go to the sample entry."""
+        parts = []
+        sync = False
+        for unit in _split_nal_units(payload):
+            kind = unit[0] & 0x1F
+            if kind == 7:
+                if self.sps is None:
+                    self.sps = unit
+                    self.width, self.height, self.sps_extension = _parse_sps(unit)
+            elif kind == 8:
+                if self.pps is None:
+                    self.pps = unit
+            elif kind != 9:  # Access unit delimiters are not carried in MP4
+                sync = sync or kind == 5
+                parts.append(struct.pack(">I", len(unit)))
+                parts.append(unit)
+        if not parts or self.sps is None:
+            return  # Nothing decodable before the first parameter sets
+        if dts is None:
+            if self.samples:
+                # No timestamp: the rest of the previous access unit
+                data, time, offset, was_sync = self.samples[-1]
+                self.samples[-1] = (data + b"".join(parts), time, offset, was_sync or sync)
+            return
+        offset = (pts - dts) % TIMESTAMP_WRAP if pts is not None else 0
+        self.samples.append((b"".join(parts), self.unwrap(dts, origin), offset, sync))
+
+    def sample_entry(self) -> bytes:
+        avcc = (bytes((1, self.sps[1], self.sps[2], self.sps[3], 0xFF, 0xE1)) + struct.pack(">H", len(self.sps))
+                + self.sps + b"\x01" + struct.pack(">H", len(self.pps)) + self.pps + self.sps_extension)
+        return _box(b"avc1", bytes(6), struct.pack(">HHH12xHHIIIH32xHh", 1, 0, 0, self.width, self.height,
+                                                   0x00480000, 0x00480000, 0, 1, 0x18, -1),
+                    _box(b"avcC", avcc))
+
+
+class _AudioTrack(_Track):
+    """ADTS AAC: each frame is a sample of 1024 samples; the track timescale is the sample rate."""
+    handler = b"soun"
+    default_duration = AAC_FRAME_SAMPLES
+
+    def __init__(self, track_id: int):
+        super().__init__(track_id, 0)
+        self.config: Optional[bytes] = None
+        self.channels = 0
+        self.buffer = b""
+        self.next_time: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.config is not None
+
+    def add(self, pts: Optional[int], dts: Optional[int], payload: bytes, origin: int):
+        data = self.buffer + payload
+        position = 0
+        while position + 7 <= len(data):
+            if data[position] != 0xFF or data[position + 1] & 0xF0 != 0xF0:
+                position += 1  # Resynchronize on the next ADTS header
+                continue
+            header = data[position:position + 7]
+            length = ((header[3] & 0x03) << 11) | (header[4] << 3) | (header[5] >> 5)
+            header_size = 7 if header[1] & 0x01 else 9
+            if length < header_size:
+                position += 1
+                continue
+            if position + length > len(data):
+                break
+            if self.config is None:
+                self._configure(header)
+            if self.next_time is None or pts is not None:
+                # Frame counting keeps durations exact; the PES clock corrects real drift
+                expected = self.unwrap(pts, origin) * self.timescale // PES_CLOCK if pts is not None else 0
+                if self.next_time is None or abs(expected - self.next_time) > 2 * AAC_FRAME_SAMPLES:
+                    self.next_time = expected
+                pts = None
+            self.samples.append((data[position + header_size:position + length], self.next_time, 0, True))
+            self.next_time += AAC_FRAME_SAMPLES
+            position += length
+        self.buffer = data[position:]
+
+    def _configure(self, header: bytes):
+        object_type = (header[2] >> 6) + 1
+        rate_index = (header[2] >> 2) & 0x0F
+        self.channels = ((header[2] & 0x01) << 2) | (header[3] >> 6)
+        if rate_index >= len(AAC_SAMPLE_RATES):
+            raise RemuxError(f"invalid AAC sample rate index {rate_index}")
+        self.timescale = AAC_SAMPLE_RATES[rate_index]
+        self.config = struct.pack(">H", (object_type << 11) | (rate_index << 7) | (self.channels << 3))
+
+    def sample_entry(self) -> bytes:
+        specific = _descriptor(5, self.config)
+        decoder = _descriptor(4, struct.pack(">BB3xII", 0x40, 0x15, 0, 0) + specific)
+        es = _descriptor(3, struct.pack(">HB", self.track_id, 0) + decoder + _descriptor(6, b"\x02"))
+        return _box(b"mp4a", bytes(6), struct.pack(">H8xHHHHI", 1, self.channels or 2, 16, 0, 0,
+                                                   min(self.timescale, 0xFFFF) << 16),
+                    _full_box(b"esds", 0, 0, es))
+
+
+def _box(kind: bytes, *payload: bytes) -> bytes:
+    body = b"".join(payload)
+    return struct.pack(">I", 8 + len(body)) + kind + body
+
+
+def _full_box(kind: bytes, version: int, flags: int, *payload: bytes) -> bytes:
+    return _box(kind, struct.pack(">I", (version << 24) | flags), *payload)
+
+
+def _descriptor(tag: int, body: bytes) -> bytes:
+    return bytes((tag, len(body))) + body
+
+
+def _init_segment(tracks: List[_Track]) -> bytes:
+    """ftyp + moov describing the tracks, with no samples (they follow in fragments)."""
+    brands = [b"isom", b"iso6", b"mp41"] + ([b"avc1"] if any(isinstance(t, _VideoTrack) for t in tracks) else [])
+    ftyp = _box(b"ftyp", b"iso6", struct.pack(">I", 0), *brands)
+    mvhd = _full_box(b"mvhd", 0, 0, struct.pack(">IIIIIH10x", 0, 0, 1000, 0, 0x00010000, 0x0100),
+                     _MATRIX, bytes(24), struct.pack(">I", max(t.track_id for t in tracks) + 1))
+    traks = []
+    for track in tracks:
+        video = isinstance(track, _VideoTrack)
+        tkhd = _full_box(b"tkhd", 0, 0x3, struct.pack(">IIIII8xHHH2x", 0, 0, track.track_id, 0, 0, 0, 0,
+                                                      0 if video else 0x0100),
+                         _MATRIX, struct.pack(">II", track.width << 16 if video else 0,
+                                              track.height << 16 if video else 0))
+        mdhd = _full_box(b"mdhd", 0, 0, struct.pack(">IIIIHH", 0, 0, track.timescale, 0, 0x55C4, 0))  # "und"
+        name = b"VideoHandler\x00" if video else b"SoundHandler\x00"
+        hdlr = _full_box(b"hdlr", 0, 0, struct.pack(">I", 0), track.handler, bytes(12), name)
+        media_header = _full_box(b"vmhd", 0, 1, bytes(8)) if video else _full_box(b"smhd", 0, 0, bytes(4))
+        dinf = _box(b"dinf", _full_box(b"dref", 0, 0, struct.pack(">I", 1), _full_box(b"url ", 0, 1)))
+        stbl = _box(b"stbl",
+                    _full_box(b"stsd", 0, 0, struct.pack(">I", 1), track.sample_entry()),
+                    _full_box(b"stts", 0, 0, struct.pack(">I", 0)),
+                    _full_box(b"stsc", 0, 0, struct.pack(">I", 0)),
+                    _full_box(b"stsz", 0, 0, struct.pack(">II", 0, 0)),
+                    _full_box(b"stco", 0, 0, struct.pack(">I", 0)))
+        minf = _box(b"minf", media_header, dinf, stbl)
+        traks.append(_box(b"trak", tkhd, _box(b"mdia", mdhd, hdlr, minf)))
+    mvex = _box(b"mvex", *(_full_box(b"trex", 0, 0, struct.pack(">IIIII", t.track_id, 1, 0, 0, 0))
+                           for t in tracks))
+    return ftyp + _box(b"moov", mvhd, *traks, mvex)
+
+
+def _fragment(sequence: int, parts: List[Tuple[_Track, int, list, List[int]]]) -> List[bytes]:
+    """moof + mdat for one fragment: (track, base decode time, samples, durations) per track."""
+    # trun: data offset, and per sample duration, size, flags and composition offset (signed, v1)
+    trun_flags = 0x000001 | 0x000100 | 0x000200 | 0x000400 | 0x000800
+    moof_size = 8 + 16 + sum(8 + 16 + 20 + 20 + 16 * len(samples) for _, _, samples, _ in parts)
+    data_offset = moof_size + 8
+    trafs = []
+    for track, base_time, samples, durations in parts:
+        entries = b"".join(
+            struct.pack(">IIIi", duration, len(data), SYNC_SAMPLE_FLAGS if sync else NON_SYNC_SAMPLE_FLAGS, offset)
+            for (data, _, offset, sync), duration in zip(samples, durations))
+        trafs.append(_box(
+            b"traf",
+            _full_box(b"tfhd", 0, 0x020000, struct.pack(">I", track.track_id)),  # default-base-is-moof
+            _full_box(b"tfdt", 1, 0, struct.pack(">Q", max(base_time, 0))),
+            _full_box(b"trun", 1, trun_flags, struct.pack(">Ii", len(samples), data_offset), entries),
+        ))
+        data_offset += sum(len(s[0]) for s in samples)
+    moof = _box(b"moof", _full_box(b"mfhd", 0, 0, struct.pack(">I", sequence)), *trafs)
+    mdat_size = 8 + sum(len(s[0]) for _, _, samples, _ in parts for s in samples)
+    return [moof, struct.pack(">I", mdat_size) + b"mdat"] + [s[0] for _, _, samples, _ in parts for s in samples]
+
+
+class TsRemuxer:
+    """
+    Streaming MPEG-TS to fragmented MP4 remuxer (H.264 video, AAC audio).
+    Segments are fed in order and each becomes one fragment, so the output
+    is written in the same pass that reads the segments; nothing is buffered
+    beyond the current segment. The header (ftyp + moov) goes out once the
+    first fragment has shown the codec parameters.
+    """
+    def __init__(self, write: Callable[[bytes], None]):
+        self.write = write
+        self.demuxer = TsDemuxer()
+        self.tracks: Dict[int, _Track] = {}  # PID -> track
+        self.written: Optional[List[_Track]] = None  # Tracks in the header, once written
+        self.origin: Optional[int] = None
+        self.sequence = 0
+
+    def add(self, data: bytes):
+        self._dispatch(self.demuxer.feed(data))
+        self._emit(final=False)
+
+    def finish(self):
+        self._dispatch(self.demuxer.flush())
+        self._emit(final=True)
+        if self.written is None:
+            raise RemuxError("no decodable H.264 or AAC data")
+
+    def _dispatch(self, packets: List[Tuple[int, bytes]]):
+        parsed = [(pid, _parse_pes(pes)) for pid, pes in packets]
+        parsed = [(pid, pes) for pid, pes in parsed if pes is not None]
+        if self.origin is None:
+            times = [pes[1] for _, pes in parsed if pes[1] is not None]
+            if not times:
+                return
+            self.origin = min(times)
+        for pid, (pts, dts, payload) in parsed:
+            track = self.tracks.get(pid)
+            if track is None:
+                if self.written is not None:
+                    continue  # A stream that appeared after the header cannot be added
+                kind = self.demuxer.streams[pid]
+                track_id = len(self.tracks) + 1
+                track = self.tracks[pid] = _VideoTrack(track_id) if kind == STREAM_H264 else _AudioTrack(track_id)
+            track.add(pts, dts, payload, self.origin)
+
+    def _emit(self, final: bool):
+        if self.written is None:
+            tracks = [t for t in self.tracks.values() if t.samples]
+            if not tracks or not (final or all(t.ready for t in tracks)):
+                return
+            # Streams that never showed their parameters are left out
+            self.written = [t for t in tracks if t.ready]
+            self.tracks = {pid: t for pid, t in self.tracks.items() if t in self.written}
+            if not self.written:
+                return
+            self.write(_init_segment(self.written))
+
+        parts = []
+        for track in self.written:
+            base_time, samples, durations = track.take(final)
+            if samples:
+                parts.append((track, base_time, samples, durations))
+        if parts:
+            self.sequence += 1
+            for chunk in _fragment(self.sequence, parts):
+                self.write(chunk)
@@ -1,16 +1,47 @@
 import os
 import shutil
-from src.core.types import Job, Segment
+from typing import Dict, Optional
+from src.core.types import Job, Segment, SegmentStatus
+from src.core.segment_pack import PACK_NAME, SegmentPack, load_pack_index, remove_packed
+from src.config import ConfigManager
+
+# Suffix of segments still being written; renamed away once verified
+PART_SUFFIX = ".part"
+# Progress marker of an interrupted consume-mode merge (see Merger.merge_consuming)
+MERGE_PROGRESS_FILENAME = "merge_progress.json"
 
 class SegmentManager:
-    def __init__(self, base_download_path: str):
+    def __init__(self, base_download_path: str, layout: Optional[str] = None, pack_name: str = PACK_NAME):
         self.base_download_path = base_download_path
+        # "files": one NNNNN.ts per segment; "pack": one segments.pack + index per job
+        self.layout = layout or ConfigManager().get_config().cache_layout
+        self.pack_name = pack_name  # Sharded workers each append to their own pack
+        self.packs: Dict[str, SegmentPack] = {}  # job_name -> open pack
 
     def initialize_job_cache(self, job: Job):
-        """Creates the cache directory for the job."""
+        """Creates the cache directory for the job and drops leftovers of interrupted writes."""
         cache_dir = self.get_job_cache_path(job.name)
         if not os.path.exists(cache_dir):
             os.makedirs(cache_dir, exist_ok=True)
+        else:
+            self.remove_stale_parts(job)
+        # Reopened per run: another process may have changed the index meanwhile
+        self.close_job(job)
+
+    def get_pack(self, job: Job) -> Optional[SegmentPack]:
+        """The job's pack for writing, or None with the per-file layout."""
+        if self.layout != "pack":
+            return None
+        pack = self.packs.get(job.name)
+        if pack is None:
+            pack = SegmentPack(self.get_job_cache_path(job.name), self.pack_name)
+            self.packs[job.name] = pack
+        return pack
+
+    def close_job(self, job: Job):
+        pack = self.packs.pop(job.name, None)
+        if pack is not None:
+            pack.close()
 
     def get_job_cache_path(self, job_name: str) -> str:
         # Sanitize job name to be safe for folder name
@@ -25,11 +56,49 @@ class SegmentManager:
         filename = f"{segment.index:05d}.ts" 
         return os.path.join(cache_dir, filename)
 
+    def get_temp_path(self, job: Job, segment: Segment) -> str:
+        """Where a segment is written until it is complete and verified."""
+        return self.get_segment_path(job, segment) + PART_SUFFIX
+
+    def remove_stale_parts(self, job: Job):
+        """
+        Removes temp files left by a crash or kill. Only this job's pending
+        segments are touched, so shards of the same job running in other
+        worker processes keep their in-flight files.
+        """
+        for segment in job.segments:
+            if segment.status == SegmentStatus.COMPLETED:
+                continue
+            try:
+                os.remove(self.get_temp_path(job, segment))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Failed to remove stale segment {segment.index}: {e}")
+
+    def get_merge_progress_path(self, job_name: str) -> str:
+        return os.path.join(self.get_job_cache_path(job_name), MERGE_PROGRESS_FILENAME)
+
+    def consumed_segments(self, job: Job) -> int:
+        """
+        Number of leading segments already merged (and deleted) by an
+        interrupted consume-mode merge. They count as downloaded.
+        """
+        from src.core.merger import MergeProgress
+        path = self.get_merge_progress_path(job.name)
+        if not os.path.exists(path):
+            return 0
+        progress = MergeProgress.load(path)
+        if progress.total == job.total_segments or (job.follow and progress.total <= job.total_segments):
+            return progress.next
+        return 0
+
     def clear_job_cache(self, job: Job) -> bool:
         """
         Clears the cache directory for a job.
         Returns True if successful, False if files are in use.
         """
+        self.close_job(job)
         cache_dir = self.get_job_cache_path(job.name)
         if os.path.exists(cache_dir):
             try:
@@ -44,15 +113,39 @@ class SegmentManager:
         return True
 
     def check_segment_exists(self, job: Job, segment: Segment) -> bool:
+        pack = self.get_pack(job)
+        entry = pack.get(segment.index) if pack is not None else None
+        if entry is not None and entry.size > 0:
+            return True
+        # Segments only get their final name after a verified write, so this can be trusted
         path = self.get_segment_path(job, segment)
         return os.path.exists(path) and os.path.getsize(path) > 0
     
-    def get_all_segment_files(self, job: Job) -> list[str]:
-        """Returns a sorted list of all segment file paths for merging."""
+    def get_all_segment_files(self, job: Job) -> list:
+        """
+        Returns the segments in merge order: file paths, or PackedSegment
+        ranges for segments stored in a pack. The index is read from disk,
+        so segments written by other processes are included.
+        """
+        packed = load_pack_index(self.get_job_cache_path(job.name))
         files = []
         for segment in job.segments:
-            files.append(self.get_segment_path(job, segment))
+            files.append(packed.get(segment.index) or self.get_segment_path(job, segment))
         return files
+
+    def remove_segment(self, job: Job, segment: Segment):
+        """Drops a cached segment (e.g. one that failed validation) so it is fetched again."""
+        entry = load_pack_index(self.get_job_cache_path(job.name)).get(segment.index)
+        if entry is not None:
+            pack = self.packs.get(job.name)
+            if pack is not None:
+                pack.entries.pop(segment.index, None)
+            remove_packed(segment.index, entry)
+            return
+        try:
+            os.remove(self.get_segment_path(job, segment))
+        except OSError:
+            pass
     
     @staticmethod
     def clear_all_caches(base_path: str) -> int:
@@ -0,0 +1,134 @@
+import os
+import shutil
+import struct
+import threading
+from typing import Dict, NamedTuple, Optional
+
+PACK_NAME = "segments"
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx"
+# Index record: segment index, offset in the pack, size (-1 marks a removed segment)
+_RECORD = struct.Struct("<qqq")
+_PACK_FLAGS = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+_INDEX_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+
+
+class PackedSegment(NamedTuple):
+    """Byte range of one segment inside a pack file."""
+    path: str
+    offset: int
+    size: int
+
+
+def _index_path(pack_path: str) -> str:
+    return pack_path[:-len(PACK_SUFFIX)] + INDEX_SUFFIX
+
+
+def _read_index(pack_path: str) -> Dict[int, PackedSegment]:
+    try:
+        with open(_index_path(pack_path), 'rb') as f:
+            data = f.read()
+        pack_size = os.path.getsize(pack_path)
+    except FileNotFoundError:
+        return {}
+    entries = {}
+    # A torn record at the end (crash mid-append) is ignored
+    data = data[:len(data) - len(data) % _RECORD.size]
+    for index, offset, size in _RECORD.iter_unpack(data):
+        if size < 0:
+            entries.pop(index, None)
+        elif offset + size <= pack_size:
+            entries[index] = PackedSegment(pack_path, offset, size)
+    return entries
+
+
+def load_pack_index(cache_dir: str) -> Dict[int, PackedSegment]:
+    """Every packed segment of a job cache (sharded downloads write one pack per worker)."""
+    entries = {}
+    try:
+        names = sorted(os.listdir(cache_dir))
+    except FileNotFoundError:
+        return entries
+    for name in names:
+        if name.endswith(PACK_SUFFIX):
+            entries.update(_read_index(os.path.join(cache_dir, name)))
+    return entries
+
+
+def _append_record(index_fd: int, index: int, offset: int, size: int, sync: bool = False):
+    # One small O_APPEND write: records from several processes never interleave
+    os.write(index_fd, _RECORD.pack(index, offset, size))
+    if sync:
+        os.fsync(index_fd)
+
+
+def remove_packed(index: int, entry: PackedSegment):
+    """Marks a segment removed in the index of the pack that holds it."""
+    fd = os.open(_index_path(entry.path), _INDEX_FLAGS, 0o644)
+    try:
+        _append_record(fd, index, entry.offset, -1)
+    finally:
+        os.close(fd)
+
+
+class SegmentPack:
+    """
+    Append-only cache of a job's segments in a single file plus a compact
+    index (24 bytes per segment) instead of one file per segment.
+
+    Writers reserve a byte range at the end of the pack, write the body
+    there (positional writes, so transfers run concurrently) and only then
+    append the index record, so the index never points at a partial body.
+    Ranges of failed or interrupted transfers are simply never indexed;
+    their space comes back when the cache is cleared.
+    """
+    def __init__(self, cache_dir: str, name: str = PACK_NAME):
+        self.path = os.path.join(cache_dir, name + PACK_SUFFIX)
+        self.index_path = _index_path(self.path)
+        self.fd = os.open(self.path, _PACK_FLAGS, 0o644)
+        self.index_fd = os.open(self.index_path, _INDEX_FLAGS, 0o644)
+        self.entries = load_pack_index(cache_dir)
+        own_ends = [e.offset + e.size for e in self.entries.values() if e.path == self.path]
+        self.end = max([os.fstat(self.fd).st_size] + own_ends)
+        self._lock = threading.Lock()
+
+    def get(self, index: int) -> Optional[PackedSegment]:
+        return self.entries.get(index)
+
+    def reserve(self, size: int) -> int:
+        """Returns the offset of a fresh range of `size` bytes."""
+        with self._lock:
+            offset = self.end
+            self.end += size
+        return offset
+
+    def add(self, index: int, offset: int, size: int, sync: bool = False):
+        """Publishes a fully written range. Blocking when sync is set."""
+        _append_record(self.index_fd, index, offset, size, sync)
+        self.entries[index] = PackedSegment(self.path, offset, size)
+
+    def add_file(self, index: int, src_path: str, sync: bool = False):
+        """
+        Copies a finished segment file (bodies of unknown length are spooled
+        to a temp file first) into the pack and removes it. Blocking.
+        """
+        size = os.path.getsize(src_path)
+        offset = self.reserve(size)
+        # A separate file object has its own position, so concurrent writers are unaffected
+        with open(src_path, 'rb') as src, open(self.path, 'r+b') as dst:
+            dst.seek(offset)
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+            dst.flush()
+            if sync:
+                os.fsync(dst.fileno())
+        self.add(index, offset, size, sync)
+        os.remove(src_path)
+
+    def remove(self, index: int):
+        entry = self.entries.pop(index, None)
+        if entry is not None:
+            remove_packed(index, entry)
+
+    def close(self):
+        os.close(self.fd)
+        os.close(self.index_fd)
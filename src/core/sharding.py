@@ -0,0 +1,363 @@
+import asyncio
+import dataclasses
+import multiprocessing
+import threading
+from typing import Dict, List, Optional, Set
+from src.core.types import Job, JobStatus, Segment, SegmentStatus
+from src.core.segment_manager import SegmentManager
+from src.core.segment_pack import PACK_NAME
+from src.core.downloader import Downloader
+from src.config import AppConfig, ConfigManager
+
+# How often a worker ships its buffered segment updates to the parent
+FLUSH_INTERVAL = 0.05
+# How often the parent checks that its worker processes are still alive
+WORKER_CHECK_INTERVAL = 1.0
+
+
+def create_downloader(segment_manager: SegmentManager, max_concurrent: Optional[int] = None,
+                      processes: Optional[int] = None, max_rate: Optional[int] = None) -> Downloader:
+    """
+    Returns a single-loop Downloader, or a ShardedDownloader when more than one
+    worker process is requested (argument, else config.worker_processes).
+    """
+    if processes is None:
+        processes = ConfigManager().get_config().worker_processes
+    if processes and processes > 1:
+        return ShardedDownloader(segment_manager, max_concurrent=max_concurrent, processes=processes,
+                                 max_rate=max_rate)
+    return Downloader(segment_manager, max_concurrent=max_concurrent, max_rate=max_rate)
+
+
+def _split_rate(rate: float, parts: int) -> int:
+    """Share of a bandwidth cap for one of `parts` workers (0 stays unlimited)."""
+    return max(1, int(rate // parts)) if rate else 0
+
+
+def _worker_main(worker_id: int, download_folder: str, max_concurrent: int, max_rate: int, config: dict,
+                 commands: multiprocessing.Queue, results: multiprocessing.Queue):
+    """Entry point of a worker process: its own event loop, session and Downloader."""
+    try:
+        asyncio.run(_worker_loop(worker_id, download_folder, max_concurrent, max_rate, config, commands, results))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        results.put(("error", worker_id, str(e)))
+
+
+async def _worker_loop(worker_id, download_folder, max_concurrent, max_rate, config, commands, results):
+    try:
+        # The parent's settings, which may differ from the saved config (unsaved GUI changes, benchmark overrides)
+        ConfigManager().config = AppConfig(**config)
+        segment_manager = SegmentManager(download_folder, pack_name=f"{PACK_NAME}-{worker_id}")
+        downloader = Downloader(segment_manager, max_concurrent=max_concurrent,
+                                max_rate=max_rate, shard_worker=True)
+    except Exception as e:
+        # The parent fails this worker's shards and starts a new worker for the next job
+        results.put(("error", worker_id, f"startup failed: {e}"))
+        return
+    loop = asyncio.get_running_loop()
+    # job name -> segment index -> Segment, for the shards this worker runs
+    shard_segments: Dict[str, Dict[int, Segment]] = {}
+    updates = []
+
+    def on_segment(job_name: str, index: int, status: str):
+        segment = shard_segments.get(job_name, {}).get(index)
+        if segment is None:
+            updates.append((job_name, index, status, 0, None))
+        else:
+            updates.append((job_name, index, status, segment.size, segment.checksum))
+
+    def flush():
+        if updates:
+            results.put(("segments", worker_id, updates[:]))
+            updates.clear()
+
+    async def flusher():
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            flush()
+
+    async def run_shard(job: Job):
+        try:
+            await downloader.start_job(job)
+        except Exception as e:
+            print(f"Worker {worker_id} job {job.name} error: {e}")
+        finally:
+            flush()
+            shard_segments.pop(job.name, None)
+            results.put(("done", worker_id, job.name))
+
+    downloader.events.segment_status_changed.connect(on_segment)
+    flush_task = asyncio.create_task(flusher())
+    shard_tasks = set()
+
+    while True:
+        command = await loop.run_in_executor(None, commands.get)
+        if command[0] == "start":
+            job = command[1]
+            shard_segments[job.name] = {s.index: s for s in job.segments}
+            task = asyncio.create_task(run_shard(job))
+            shard_tasks.add(task)
+            task.add_done_callback(shard_tasks.discard)
+        elif command[0] == "cancel":
+            downloader.cancel_job(command[1])
+        elif command[0] == "pause":
+            downloader.pause_job(command[1])
+        elif command[0] == "resume":
+            downloader.resume_job(command[1])
+        elif command[0] == "rate":
+            downloader.set_job_rate(command[1], command[2])
+        elif command[0] == "global_rate":
+            downloader.set_global_rate(command[1])
+        elif command[0] == "stop":
+            break
+
+    for job_name in list(shard_segments):
+        downloader.cancel_job(job_name)
+    if shard_tasks:
+        await asyncio.gather(*shard_tasks, return_exceptions=True)
+    flush_task.cancel()
+    flush()
+    await downloader.close()
+
+
+class ShardedDownloader(Downloader):
+    """
+    Runs downloads in N worker processes, each with its own event loop and
+    aiohttp session, so TLS, parsing and event dispatch scale across cores.
+
+    Each job's pending segments are striped round-robin across the workers.
+    Workers report batched (job, index, status, size, checksum) tuples over a
+    multiprocessing queue; this process mirrors them into its own Job objects
+    and emits the usual DownloaderEvents, so callers see no difference.
+
+    Bandwidth caps are split evenly: each worker gets 1/N of the global rate
+    and each shard 1/(number of shards) of its job's rate.
+
+    Follow (live) jobs cannot be striped ahead of time; they run in this
+    process like on a plain Downloader.
+
+    Workers get this process's config when they start, saved or not; changes
+    made after that reach them only once the downloader is recreated.
+
+    A worker that dies (crash, OOM kill, failed startup) fails the segments
+    of its unfinished shards, so the job ends and can be resumed; a new
+    worker takes its place for the next job.
+    """
+    def __init__(self, segment_manager: SegmentManager, max_concurrent: Optional[int] = None,
+                 processes: int = 2, max_rate: Optional[int] = None):
+        super().__init__(segment_manager, max_concurrent=max_concurrent, max_rate=max_rate)
+        self.processes = max(1, processes)
+        self.workers: List[multiprocessing.Process] = []
+        self.commands: List[multiprocessing.Queue] = []
+        self.results: Optional[multiprocessing.Queue] = None
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # job_name -> worker_id -> segment indexes of the shards not done yet
+        self._shards_left: Dict[str, Dict[int, List[int]]] = {}
+        self._dead_workers: Set[int] = set()
+        self._watcher: Optional[asyncio.Task] = None
+        self._shards_done: Dict[str, asyncio.Future] = {}
+        self._shard_counts: Dict[str, int] = {}
+        # Follow and playback jobs run by the inherited single-loop engine
+        self._local_jobs: Set[str] = set()
+
+    def _ensure_workers(self):
+        if self.workers:
+            for worker_id in sorted(self._dead_workers):
+                self.workers[worker_id].join(0)
+                self._spawn_worker(worker_id)
+            return
+        self.results = multiprocessing.get_context("spawn").Queue()
+        self.workers = [None] * self.processes
+        self.commands = [None] * self.processes
+        for worker_id in range(self.processes):
+            self._spawn_worker(worker_id)
+
+        self._loop = asyncio.get_running_loop()
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+        self._watcher = asyncio.create_task(self._watch_workers())
+
+    def _spawn_worker(self, worker_id: int):
+        # spawn (not fork): the parent may host Qt and has running threads
+        ctx = multiprocessing.get_context("spawn")
+        config = ConfigManager().get_config()
+        total = self.max_concurrent or config.max_concurrent_downloads
+        commands = ctx.Queue()
+        process = ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.segment_manager.base_download_path, max(1, total // self.processes),
+                  _split_rate(self.global_limiter.rate, self.processes), dataclasses.asdict(config),
+                  commands, self.results),
+            daemon=True,
+        )
+        process.start()
+        self.workers[worker_id] = process
+        self.commands[worker_id] = commands
+        self._dead_workers.discard(worker_id)
+
+    async def _watch_workers(self):
+        """A worker that exits without reporting its shards done would leave their jobs running forever."""
+        while True:
+            await asyncio.sleep(WORKER_CHECK_INTERVAL)
+            for worker_id, process in enumerate(self.workers):
+                if worker_id not in self._dead_workers and not process.is_alive():
+                    self._worker_died(worker_id, f"exit code {process.exitcode}")
+
+    def _worker_died(self, worker_id: int, reason: str):
+        """Fails the unfinished segments of the worker's shards and ends those shards."""
+        self._dead_workers.add(worker_id)
+        print(f"Worker {worker_id} stopped ({reason})")
+        for job_name, shards in list(self._shards_left.items()):
+            indexes = shards.get(worker_id)
+            if indexes is None:
+                continue
+            job = self.active_jobs.get(job_name)
+            if job is not None:
+                for index in indexes:
+                    segment = job.segments[index - job.start_index]
+                    if segment.status != SegmentStatus.COMPLETED:
+                        segment.status = SegmentStatus.FAILED
+                        self.events.segment_status_changed.emit(job_name, index, "Failed")
+            self._shard_finished(job_name, worker_id)
+
+    def _shard_finished(self, job_name: str, worker_id: int):
+        shards = self._shards_left.get(job_name)
+        if shards is None or shards.pop(worker_id, None) is None:
+            return  # Already ended (e.g. "done" from a worker given up on)
+        if not shards:
+            future = self._shards_done.pop(job_name)
+            if not future.done():
+                future.set_result(None)
+
+    def _read_results(self):
+        """Blocks on the result queue in a thread and hands messages to the event loop."""
+        while True:
+            message = self.results.get()
+            if message is None:
+                break
+            self._loop.call_soon_threadsafe(self._handle_message, message)
+
+    def _handle_message(self, message):
+        kind, worker_id, payload = message
+        if kind == "segments":
+            for job_name, index, status, size, checksum in payload:
+                job = self.active_jobs.get(job_name)
+                if job is None:
+                    continue
+                segment = job.segments[index - job.start_index]
+                segment.status = SegmentStatus(status)
+                if segment.status == SegmentStatus.COMPLETED:
+                    segment.size = size
+                    segment.checksum = checksum
+                    self._record_checksum(job, segment)
+                    job.downloaded_segments += 1
+                self.events.segment_status_changed.emit(job_name, index, status)
+        elif kind == "done":
+            self._shard_finished(payload, worker_id)
+        elif kind == "error" and worker_id not in self._dead_workers:
+            self._worker_died(worker_id, payload)
+
+    async def start_job(self, job: Job):
+        if job.follow or job.playback:
+            self._local_jobs.add(job.name)
+            try:
+                return await super().start_job(job)
+            finally:
+                self._local_jobs.discard(job.name)
+        self._ensure_workers()
+        self.active_jobs[job.name] = job
+        job.status = JobStatus.RUNNING
+
+        self.segment_manager.initialize_job_cache(job)
+        self._load_manifest(job)
+        self._skip_consumed(job)
+
+        progress_task = asyncio.create_task(self.monitor_progress(job))
+        try:
+            while True:
+                await self._run_shards(job)
+                if (job.status == JobStatus.RUNNING and await self.validate_job(job)
+                        and job.status == JobStatus.RUNNING):
+                    continue  # Bad segments were reset; fetch them again
+                break
+        finally:
+            progress_task.cancel()
+            self._shards_left.pop(job.name, None)
+            self._shard_counts.pop(job.name, None)
+            await self._save_manifest(job)
+            self.finish_job(job)
+
+    async def _run_shards(self, job: Job):
+        """Stripes the job's pending segments over the workers and waits until every shard is done."""
+        if job.status != JobStatus.RUNNING:
+            return
+        self._ensure_workers()  # Replaces workers that died since the last pass
+        pending = [s for s in job.segments if s.status != SegmentStatus.COMPLETED]
+        shards = [pending[i::self.processes] for i in range(self.processes)]
+        shards = [(worker_id, segments) for worker_id, segments in enumerate(shards) if segments]
+        if not shards:
+            return
+
+        done = self._loop.create_future()
+        self._shards_left[job.name] = {worker_id: [s.index for s in segments] for worker_id, segments in shards}
+        self._shards_done[job.name] = done
+        self._shard_counts[job.name] = len(shards)
+        shard_rate = _split_rate(job.rate_limit, len(shards))
+        for worker_id, segments in shards:
+            shard = dataclasses.replace(job, segments=segments, rate_limit=shard_rate)
+            self.commands[worker_id].put(("start", shard))
+        await done
+
+    def _broadcast(self, *command):
+        for commands in self.commands:
+            commands.put(command)
+
+    def cancel_job(self, job_name: str):
+        self._broadcast("cancel", job_name)
+        super().cancel_job(job_name)
+
+    def pause_job(self, job_name: str):
+        self._broadcast("pause", job_name)
+        super().pause_job(job_name)
+
+    def resume_job(self, job_name: str):
+        if job_name in self._local_jobs:
+            return super().resume_job(job_name)
+        job = self.active_jobs.get(job_name)
+        if job is None or job.status != JobStatus.PAUSED:
+            return
+        self._broadcast("resume", job_name)
+        # The workers own the segment tasks; here only the mirrored status changes
+        job.status = JobStatus.RUNNING
+        self.events.job_resumed.emit(job_name)
+
+    def set_global_rate(self, rate: int):
+        super().set_global_rate(rate)
+        self._broadcast("global_rate", _split_rate(rate, self.processes))
+
+    def set_job_rate(self, job_name: str, rate: int):
+        super().set_job_rate(job_name, rate)
+        shards = self._shard_counts.get(job_name)
+        if shards:
+            self._broadcast("rate", job_name, _split_rate(rate, shards))
+
+    async def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        for commands in self.commands:
+            commands.put(("stop",))
+        loop = asyncio.get_running_loop()
+        for process in self.workers:
+            await loop.run_in_executor(None, process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        if self.results is not None:
+            self.results.put(None)
+        self.workers.clear()
+        self.commands.clear()
+        self._dead_workers.clear()
+        await super().close()
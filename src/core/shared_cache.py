@@ -0,0 +1,186 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+from src.core.segment_pack import PackedSegment
+
+# Default location inside the download folder (not a Cache_* folder, so Clear Cache keeps it)
+SHARED_CACHE_DIRNAME = "SharedCache"
+INDEX_FILENAME = "index.sqlite"
+# Entries dropped per eviction query
+EVICT_BATCH = 64
+
+
+@dataclass
+class CachedSegment:
+    url: str
+    path: str
+    size: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    checksum: Optional[str]
+    algorithm: Optional[str]
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Validators for a conditional GET; empty if the server sent none."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class SharedCache:
+    """
+    Segment cache shared by all jobs, keyed by URL, so a stream downloaded
+    again under another name (or overlapping another job) is served
+    locally. Bodies live under objects/ named by the URL's hash; an SQLite
+    index keeps their validators (ETag / Last-Modified), hashes and last
+    use. The total size is capped and the least recently used entries are
+    evicted first.
+
+    Job caches get hard links where possible, so a hit costs no copy.
+
+    The index methods block (another process may hold the write lock for
+    up to the connection timeout, and eviction deletes files); async
+    callers run them on `executor`, the one thread that uses the
+    connection.
+    """
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fastflux-cache")
+        # Several worker processes may share the index; WAL keeps readers and writers apart.
+        # Created here, then used only by the executor's thread
+        self.db = sqlite3.connect(os.path.join(root, INDEX_FILENAME), timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "url TEXT PRIMARY KEY, size INTEGER, etag TEXT, last_modified TEXT,"
+            "checksum TEXT, algorithm TEXT, last_used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used)")
+        self.db.commit()
+
+    def object_path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, "objects", key[:2], key)
+
+    def lookup(self, url: str) -> Optional[CachedSegment]:
+        """The entry for a URL, or None (also if the index cannot be read: the segment is fetched)."""
+        try:
+            row = self.db.execute(
+                "SELECT size, etag, last_modified, checksum, algorithm FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Shared cache: lookup failed ({e})")
+            return None
+        if row is None:
+            return None
+        path = self.object_path(url)
+        if not os.path.exists(path) or os.path.getsize(path) != row[0]:
+            self._delete(url)
+            return None
+        return CachedSegment(url, path, *row)
+
+    def touch(self, url: str):
+        self.db.execute("UPDATE entries SET last_used = ? WHERE url = ?", (time.time(), url))
+        self.db.commit()
+
+    def add(self, url: str, size: int, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            checksum: Optional[str] = None, algorithm: Optional[str] = None):
+        """Indexes a body placed by write_object() and evicts old entries beyond the size cap."""
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, size, etag, last_modified, checksum, algorithm, time.time()),
+        )
+        self.db.commit()
+        self.evict(keep=url)
+
+    def write_object(self, url: str, source: Union[str, bytes, PackedSegment]) -> int:
+        """
+        Places a body (a file, bytes, or a range of a pack) at its object
+        path, as a hard link when possible. Returns its size. Blocking; meant
+        for an I/O thread, unlike the index methods.
+        """
+        path = self.object_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per writer: another job or worker process may store the same URL
+        tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        if isinstance(source, str):
+            _link_or_copy(source, tmp_path)
+        elif isinstance(source, PackedSegment):
+            with open(source.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                src.seek(source.offset)
+                dst.write(src.read(source.size))
+        else:
+            with open(tmp_path, 'wb') as dst:
+                dst.write(source)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def total_size(self) -> int:
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self, keep: Optional[str] = None, max_bytes: Optional[int] = None) -> int:
+        """Drops least recently used entries until the cache fits. Returns the bytes freed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        excess = self.total_size() - limit
+        freed = 0
+        while excess > 0:
+            rows = self.db.execute(
+                "SELECT url, size FROM entries WHERE url != ? ORDER BY last_used LIMIT ?",
+                (keep or "", EVICT_BATCH),
+            ).fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                self._delete(url, commit=False)
+                freed += size
+                excess -= size
+                if excess <= 0:
+                    break
+            self.db.commit()
+        return freed
+
+    def remove(self, url: str):
+        """Forgets an entry, e.g. after its body failed validation."""
+        self._delete(url)
+
+    def _delete(self, url: str, commit: bool = True):
+        try:
+            os.remove(self.object_path(url))
+        except FileNotFoundError:
+            pass
+        self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+        if commit:
+            self.db.commit()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.db.close()
+
+
+def _link_or_copy(src: str, dst: str):
+    """Hard link (no copy, no extra space) or, across filesystems, a plain copy."""
+    try:
+        os.remove(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def materialize(cached: CachedSegment, dst: str):
+    """Puts a cached body at dst for a job (I/O thread)."""
+    _link_or_copy(cached.path, dst)
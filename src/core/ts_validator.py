@@ -0,0 +1,192 @@
+import asyncio
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    import numpy as np
+except ImportError:  # Optional: without NumPy only sync bytes and the PAT are checked
+    np = None
+
+TS_PACKET_SIZE = 188
+SYNC_BYTE = 0x47
+PAT_PID = 0x0000
+NULL_PID = 0x1FFF
+# Jobs smaller than this are validated on a thread; spawning a pool costs more
+POOL_THRESHOLD = 64 * 1024 * 1024
+# Segments handed to a pool worker per task, to keep IPC overhead down
+BATCH_SIZE = 16
+
+# (error, continuity_errors): error is "" for a structurally valid segment
+ValidationResult = Tuple[str, int]
+
+
+def is_ts_job(base_url: str) -> bool:
+    """Only segments requested as .ts are held to MPEG-TS rules (fMP4/AAC segments are not)."""
+    return urlparse(base_url.strip()).path.lower().endswith(".ts")
+
+
+def _segment_size(segment) -> int:
+    """Size of a segment file or of a PackedSegment range."""
+    return os.path.getsize(segment) if isinstance(segment, str) else segment.size
+
+
+def validate_segment(segment) -> ValidationResult:
+    """
+    Checks one segment (a file path or a PackedSegment range) for MPEG-TS
+    structure: whole 188-byte packets, 0x47 sync byte on every packet, a PAT
+    and the PMT(s) it points to, and per-PID continuity counters. Catches HTML
+    error pages, truncated bodies and garbage served with a 200 status.
+    """
+    path, start = (segment, 0) if isinstance(segment, str) else (segment.path, segment.offset)
+    try:
+        size = _segment_size(segment)
+        size_error = _check_size(size)
+        if size_error:
+            return size_error, 0
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if np is None:
+                return _validate_plain(mm if start == 0 and size == len(mm) else mm[start:start + size])
+            packets = np.frombuffer(mm, dtype=np.uint8, count=size, offset=start).reshape(-1, TS_PACKET_SIZE)
+            try:
+                return _validate_packets(packets)
+            finally:
+                # The view must be gone before the mmap can close
+                del packets
+    except (OSError, ValueError) as e:
+        return f"unreadable: {e}", 0
+
+
+def validate_buffer(data: bytes) -> ValidationResult:
+    """Same checks as validate_segment() for a body held in memory."""
+    size_error = _check_size(len(data))
+    if size_error:
+        return size_error, 0
+    if np is None:
+        return _validate_plain(data)
+    return _validate_packets(np.frombuffer(data, dtype=np.uint8).reshape(-1, TS_PACKET_SIZE))
+
+
+def _check_size(size: int) -> str:
+    if size == 0:
+        return "empty file"
+    if size % TS_PACKET_SIZE:
+        return f"size {size} is not a multiple of {TS_PACKET_SIZE}"
+    return ""
+
+
+def validate_segments(segments: list) -> List[ValidationResult]:
+    """Batch entry point for pool workers."""
+    return [validate_segment(s) for s in segments]
+
+
+def _validate_packets(packets) -> ValidationResult:
+    # Column views: one strided read per header byte instead of a Python loop
+    if not (packets[:, 0] == SYNC_BYTE).all():
+        bad = int(np.argmax(packets[:, 0] != SYNC_BYTE))
+        return f"lost sync at packet {bad}", 0
+
+    b1, b2, b3 = packets[:, 1], packets[:, 2], packets[:, 3]
+    pids = ((b1.astype(np.uint16) & 0x1F) << 8) | b2
+    has_payload = (b3 & 0x10) != 0
+    unit_start = (b1 & 0x40) != 0
+
+    pat_packets = np.flatnonzero((pids == PAT_PID) & unit_start & has_payload)
+    if pat_packets.size == 0:
+        return "no PAT", 0
+    pmt_pids = _parse_pat(bytes(packets[pat_packets[0]]))
+    if not pmt_pids:
+        return "PAT lists no programs", 0
+    if not np.isin(pmt_pids, pids).all():
+        return "PMT missing", 0
+
+    return "", _continuity_errors(packets, pids, has_payload)
+
+
+def _continuity_errors(packets, pids, has_payload) -> int:
+    """Counts continuity counter jumps per PID (duplicates and flagged discontinuities are allowed)."""
+    b3 = packets[:, 3]
+    selected = np.flatnonzero(has_payload & (pids != NULL_PID))
+    if selected.size < 2:
+        return 0
+    # Group packets by PID, keeping stream order inside each group
+    order = selected[np.argsort(pids[selected], kind="stable")]
+    same_pid = pids[order[1:]] == pids[order[:-1]]
+    step = (b3[order[1:]].astype(np.int16) - b3[order[:-1]]) & 0x0F
+
+    # discontinuity_indicator: adaptation field present, non-empty, flag bit set
+    current = order[1:]
+    has_adaptation = (b3[current] & 0x20) != 0
+    discontinuity = has_adaptation & (packets[current, 4] > 0) & ((packets[current, 5] & 0x80) != 0)
+
+    errors = same_pid & (step > 1) & ~discontinuity
+    return int(errors.sum())
+
+
+def _parse_pat(packet: bytes) -> List[int]:
+    """Returns the PMT PIDs listed in a PAT packet (network PID entries skipped)."""
+    offset = 4
+    if packet[3] & 0x20:
+        offset += 1 + packet[4]
+    if offset >= TS_PACKET_SIZE:
+        return []
+    offset += 1 + packet[offset]  # pointer_field
+    if offset + 8 > TS_PACKET_SIZE or packet[offset] != 0x00:
+        return []
+    section_length = ((packet[offset + 1] & 0x0F) << 8) | packet[offset + 2]
+    # Program loop runs from after the 8-byte header to before the CRC
+    end = min(offset + 3 + section_length - 4, TS_PACKET_SIZE)
+    pids = []
+    for i in range(offset + 8, end - 3, 4):
+        program_number = (packet[i] << 8) | packet[i + 1]
+        if program_number != 0:
+            pids.append(((packet[i + 2] & 0x1F) << 8) | packet[i + 3])
+    return pids
+
+
+def _validate_plain(mm) -> ValidationResult:
+    """Fallback without NumPy: sync bytes via a strided slice and a PAT scan."""
+    syncs = mm[0::TS_PACKET_SIZE]
+    if syncs.count(SYNC_BYTE) != len(syncs):
+        return f"lost sync at packet {next(i for i, b in enumerate(syncs) if b != SYNC_BYTE)}", 0
+    for start in range(0, len(mm), TS_PACKET_SIZE):
+        if ((mm[start + 1] & 0x1F) << 8 | mm[start + 2]) == PAT_PID and mm[start + 1] & 0x40:
+            return ("", 0) if _parse_pat(mm[start:start + TS_PACKET_SIZE]) else ("PAT lists no programs", 0)
+    return "no PAT", 0
+
+
+class SegmentValidator:
+    """
+    Validates the segments of a finished job before it is reported complete.
+    Large jobs are spread over a process pool (spawned lazily, kept for
+    later jobs); small ones run on a thread.
+    """
+    def __init__(self, processes: int = 0):
+        self.processes = processes or os.cpu_count() or 1
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            # spawn (not fork): the parent may host Qt and has running threads
+            self.pool = ProcessPoolExecutor(max_workers=self.processes,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return self.pool
+
+    async def validate(self, paths: list) -> List[ValidationResult]:
+        loop = asyncio.get_running_loop()
+        total = sum(_segment_size(p) for p in paths if not isinstance(p, str) or os.path.exists(p))
+        if total < POOL_THRESHOLD or self.processes == 1:
+            return await loop.run_in_executor(None, validate_segments, paths)
+
+        pool = self._get_pool()
+        batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+        results = await asyncio.gather(*(loop.run_in_executor(pool, validate_segments, b) for b in batches))
+        return [r for batch in results for r in batch]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
@@ -16,6 +16,9 @@ class Segment:
     file_path: Optional[str] = None
     size: int = 0
     retries: int = 0
+    checksum: Optional[str] = None  # Hex digest taken while downloading (see checksums.py)
+    key_url: Optional[str] = None  # AES-128 key of an encrypted HLS segment (see decryption.py)
+    key_iv: Optional[str] = None   # Its IV as hex
 
 class JobStatus(Enum):
     QUEUED = "Queued"
@@ -38,6 +41,11 @@ class Job:
     total_size: int = 0
     downloaded_segments: int = 0
     failed_segments: List[int] = field(default_factory=list)
+    padding: Optional[str] = None
+    rate_limit: int = 0  # Bytes/s for this job; 0 = unlimited
+    follow: bool = False  # Live stream: keep polling for new segments (see live.py)
+    playback: bool = False  # Watch while downloading: in-order scheduling (see playback.py)
+    priority: int = 0  # Daemon queue: higher starts first
 
     @property
     def total_segments(self) -> int:
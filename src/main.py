@@ -2,6 +2,7 @@ import sys
 import os
 import asyncio
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 from qasync import QEventLoop
 
 # Add project root to sys.path to allow running as script
@@ -18,6 +19,9 @@ def main():
     
     window = MainWindow()
     window.show()
+    # Paint the window first; the download engine (aiohttp, NumPy, ...) is created once the loop runs
+    app.processEvents()
+    QTimer.singleShot(0, window.start_engine)
     
     with loop:
         loop.run_forever()
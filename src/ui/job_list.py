@@ -0,0 +1,258 @@
+from typing import Callable, Dict, List, Optional, Set
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QListView,
+    QStyledItemDelegate, QStyle, QStyleOptionProgressBar, QApplication
+)
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QTimer
+from PyQt6.QtGui import QColor, QPen
+from src.core.types import Job
+from src.ui.widgets import SegmentMap
+
+# Changed rows are repainted at most this often (ms)
+REFRESH_INTERVAL = 200
+HEADER_HEIGHT = 52
+DETAIL_HEIGHT = 150
+
+_SEGMENT_CODES = {"Completed": 1, "Failed": 2}
+
+
+class JobRow:
+    """Display state of one job; its widgets exist only while the row is expanded."""
+    def __init__(self, job: Job):
+        self.job = job
+        self.progress = 0.0
+        self.status_text = "Waiting..."
+        self.active = True          # Cancel / Pause available
+        self.paused = False
+        self.stop_live = job.follow  # Stop Live available
+        self.merge_enabled = False  # Manual merge (after a failure)
+        self.retry_merge = False
+        self.segments = bytearray(job.total_segments)  # Per segment: 0 pending, 1 completed, 2 failed
+        self.detail: Optional["JobDetail"] = None
+
+    @property
+    def expanded(self) -> bool:
+        return self.detail is not None
+
+    def set_segment(self, index: int, status: str):
+        offset = index - self.job.start_index
+        if 0 <= offset < len(self.segments):
+            self.segments[offset] = _SEGMENT_CODES.get(status, 0)
+            if self.detail is not None:
+                self.detail.seg_map.update_segment(index, status)
+
+    def extend_to(self, end: int):
+        missing = end - self.job.start_index + 1 - len(self.segments)
+        if missing > 0:
+            self.segments.extend(bytes(missing))
+            if self.detail is not None:
+                self.detail.seg_map.extend_to(end)
+
+
+class JobDetail(QWidget):
+    """Segment map and job controls shown under an expanded row."""
+    def __init__(self, row: JobRow):
+        super().__init__()
+        job = row.job
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 0, 8, 6)
+
+        self.seg_map = SegmentMap(len(row.segments))
+        self.seg_map.set_range(job.start_index, job.start_index + len(row.segments) - 1)
+        self.seg_map.status_map = list(row.segments)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setStyleSheet("background-color: #ff6b6b; color: white;")
+        self.pause_btn = QPushButton("Pause")
+        # Stop Live (follow jobs): ends the recording, which is then merged
+        self.stop_live_btn = QPushButton("Stop Live")
+        self.stop_live_btn.setVisible(job.follow)
+        # Per-job speed limit, adjustable while the job runs
+        self.rate_input = QLineEdit(str(job.rate_limit // 1024) if job.rate_limit else "")
+        self.rate_input.setPlaceholderText("Limit KB/s")
+        self.rate_input.setFixedWidth(90)
+        self.clear_cache_btn = QPushButton("Clear Cache")
+        self.retry_merge_btn = QPushButton("Retry Merge")
+        self.retry_merge_btn.setStyleSheet("background-color: #ffaa00; color: white;")
+        self.merge_btn = QPushButton("Merge")
+
+        btn_row = QHBoxLayout()
+        btn_row.addWidget(self.cancel_btn)
+        btn_row.addWidget(self.pause_btn)
+        btn_row.addWidget(self.stop_live_btn)
+        btn_row.addWidget(self.rate_input)
+        btn_row.addWidget(self.clear_cache_btn)
+        btn_row.addStretch()
+        btn_row.addWidget(self.retry_merge_btn)
+        btn_row.addWidget(self.merge_btn)
+
+        layout.addWidget(self.seg_map)
+        layout.addLayout(btn_row)
+        self.sync(row)
+
+    def sync(self, row: JobRow):
+        self.cancel_btn.setEnabled(row.active)
+        self.pause_btn.setEnabled(row.active)
+        self.pause_btn.setText("Resume" if row.paused else "Pause")
+        self.stop_live_btn.setEnabled(row.stop_live)
+        self.retry_merge_btn.setVisible(row.retry_merge)
+        self.merge_btn.setEnabled(row.merge_enabled)
+
+
+class JobListModel(QAbstractListModel):
+    """
+    Jobs of the dashboard, newest first. Engine events change the rows
+    through update() / set_segment(); repaints are batched and issued at
+    most every REFRESH_INTERVAL ms, for the changed span only.
+    """
+    RowRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows: List[JobRow] = []
+        self.by_name: Dict[str, JobRow] = {}
+        self.dirty: Set[str] = set()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        row = self.rows[index.row()]
+        if role == self.RowRole:
+            return row
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row.job.name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return row.job.base_url
+        return None
+
+    def __contains__(self, job_name: str) -> bool:
+        return job_name in self.by_name
+
+    def get(self, job_name: str) -> Optional[JobRow]:
+        return self.by_name.get(job_name)
+
+    def index_of(self, job_name: str) -> QModelIndex:
+        row = self.by_name.get(job_name)
+        return self.index(self.rows.index(row)) if row is not None else QModelIndex()
+
+    def add(self, job: Job) -> JobRow:
+        row = JobRow(job)
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.rows.insert(0, row)
+        self.by_name[job.name] = row
+        self.endInsertRows()
+        return row
+
+    def remove(self, job_name: str):
+        row = self.by_name.pop(job_name, None)
+        if row is None:
+            return
+        position = self.rows.index(row)
+        self.beginRemoveRows(QModelIndex(), position, position)
+        self.rows.pop(position)
+        self.endRemoveRows()
+        row.detail = None  # The view deletes the index widget with the row
+        self.dirty.discard(job_name)
+
+    def update(self, job_name: str, **changes) -> Optional[JobRow]:
+        """Sets JobRow attributes and schedules a repaint; None if the job is not listed."""
+        row = self.by_name.get(job_name)
+        if row is not None:
+            for name, value in changes.items():
+                setattr(row, name, value)
+            self.changed(job_name)
+        return row
+
+    def set_segment(self, job_name: str, index: int, status: str):
+        row = self.by_name.get(job_name)
+        if row is not None:
+            row.set_segment(index, status)  # Collapsed rows do not show segments: no repaint
+
+    def changed(self, job_name: str):
+        self.dirty.add(job_name)
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def flush(self):
+        dirty, self.dirty = self.dirty, set()
+        positions = [i for i, row in enumerate(self.rows) if row.job.name in dirty]
+        for i in positions:
+            if self.rows[i].detail is not None:
+                self.rows[i].detail.sync(self.rows[i])
+        if positions:
+            self.dataChanged.emit(self.index(positions[0]), self.index(positions[-1]))
+
+
+class JobDelegate(QStyledItemDelegate):
+    """Paints a job's header (name, status, progress); an expanded row's JobDetail sits below it."""
+
+    def sizeHint(self, option, index) -> QSize:
+        row = index.data(JobListModel.RowRole)
+        return QSize(option.rect.width(), HEADER_HEIGHT + (DETAIL_HEIGHT if row.expanded else 0))
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect.adjusted(0, HEADER_HEIGHT, 0, -2))
+
+    def paint(self, painter, option, index):
+        row = index.data(JobListModel.RowRole)
+        style = option.widget.style() if option.widget else QApplication.style()
+        painter.save()
+        frame = option.rect.adjusted(3, 2, -3, -2)
+        painter.setPen(QPen(QColor("#ccc")))
+        painter.drawRoundedRect(frame, 5, 5)
+
+        area = QRect(frame.x() + 8, frame.y() + 4, frame.width() - 16, HEADER_HEIGHT - 12)
+        text_rect = QRect(area.x(), area.y(), area.width(), 18)
+        metrics = option.fontMetrics
+        painter.setPen(option.palette.color(option.palette.ColorRole.Text))
+        name = metrics.elidedText(f"{'▼' if row.expanded else '▶'} Job: {row.job.name}",
+                                  Qt.TextElideMode.ElideRight, area.width() // 2)
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, name)
+        status = metrics.elidedText(row.status_text, Qt.TextElideMode.ElideRight,
+                                    area.width() - metrics.horizontalAdvance(name) - 16)
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, status)
+
+        bar = QStyleOptionProgressBar()
+        bar.rect = QRect(area.x(), area.y() + 22, area.width(), area.height() - 22)
+        bar.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Horizontal
+        bar.minimum, bar.maximum = 0, 100
+        bar.progress = int(row.progress)
+        bar.text = f"{int(row.progress)}%"
+        bar.textVisible = True
+        style.drawControl(QStyle.ControlElement.CE_ProgressBar, bar, painter, option.widget)
+        painter.restore()
+
+
+class JobListView(QListView):
+    """
+    Virtualized job dashboard: only visible rows are painted, and a row's
+    segment map and buttons (JobDetail, built by detail_factory) exist only
+    while it is expanded. Clicking a row's header toggles it.
+    """
+    def __init__(self, model: JobListModel, detail_factory: Callable[[JobRow], JobDetail]):
+        super().__init__()
+        self.detail_factory = detail_factory
+        self.setModel(model)
+        self.setItemDelegate(JobDelegate(self))
+        self.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.clicked.connect(self.toggle)
+
+    def toggle(self, index: QModelIndex):
+        row = index.data(JobListModel.RowRole)
+        if row.detail is None:
+            row.detail = self.detail_factory(row)
+            self.setIndexWidget(index, row.detail)
+        else:
+            row.detail = None
+            self.setIndexWidget(index, None)  # Deletes the widget
+        self.itemDelegate().sizeHintChanged.emit(index)
@@ -2,19 +2,19 @@ import asyncio
 import os
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-    QLabel, QLineEdit, QPushButton, QGroupBox, QScrollArea,
+    QLabel, QLineEdit, QPushButton, QGroupBox,
     QMessageBox, QTextEdit, QFrame, QFileDialog, QDialog,
-    QFormLayout, QComboBox, QDialogButtonBox
+    QFormLayout, QComboBox, QDialogButtonBox, QCheckBox, QMenu
 )
 from PyQt6.QtCore import pyqtSlot
 from qasync import asyncSlot
 
-from src.core.downloader import Downloader
+# The engine (aiohttp, NumPy, the merger) is imported on first use, after the
+# window is up: see the downloader/merger properties and src/main.py
 from src.core.segment_manager import SegmentManager
-from src.core.merger import Merger
 from src.core.types import Job, Segment, SegmentStatus, JobStatus
 from src.config import ConfigManager
-from src.ui.widgets import SegmentMap, JobProgressBar
+from src.ui.job_list import JobListModel, JobListView, JobDetail, JobRow
 from src.ui.settings_dialog import SettingsDialog
 from src.utils.helpers import get_example_urls
 
@@ -24,24 +24,56 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Fast-Flux Turbo Downloader")
         self.resize(900, 700)
 
-        # Core Components
+        # Core Components (the engine and the merger are created on first use)
         self.config_manager = ConfigManager()
         self.segment_manager = SegmentManager(self.config_manager.get_config().download_folder)
-        self.downloader = Downloader(self.segment_manager)
-        self.merger = Merger()
+        self._merger = None
+        self._downloader = None
         
-        self.jobs = {} # Job Name -> UI Widget Ref
-        
-        # Connect Downloader Signals
-        self.downloader.signals.job_progress_updated.connect(self.on_progress_update)
-        self.downloader.signals.segment_status_changed.connect(self.on_segment_status)
-        self.downloader.signals.job_completed.connect(self.on_job_completed)
-        self.downloader.signals.job_failed.connect(self.on_job_failed)
-        self.downloader.signals.job_cancelled.connect(self.on_job_cancelled)
-        self.downloader.signals.connectivity_tested.connect(self.on_connectivity_tested)
+        self.job_model = JobListModel(self)  # Dashboard rows (job + display state)
 
         self.setup_ui()
 
+        if self.config_manager.get_config().use_daemon:
+            asyncio.ensure_future(self.attach_daemon())
+
+    @property
+    def downloader(self):
+        if self._downloader is None:
+            config = self.config_manager.get_config()
+            if config.use_daemon:
+                # Attach to a running daemon as a client instead of embedding the engine
+                from src.core.daemon_client import RemoteDownloader
+                self._downloader = RemoteDownloader(config.daemon_address)
+            else:
+                from src.core.sharding import create_downloader
+                self._downloader = create_downloader(self.segment_manager)
+
+            # Connect Downloader Events (called on the qasync loop thread)
+            events = self._downloader.events
+            events.job_progress_updated.connect(self.on_progress_update)
+            events.segment_status_changed.connect(self.on_segment_status)
+            events.job_completed.connect(self.on_job_completed)
+            events.job_failed.connect(self.on_job_failed)
+            events.job_cancelled.connect(self.on_job_cancelled)
+            events.job_paused.connect(self.on_job_paused)
+            events.job_resumed.connect(self.on_job_resumed)
+            events.job_extended.connect(self.on_job_extended)
+            events.job_merged.connect(self.on_job_merged)
+            events.connectivity_tested.connect(self.on_connectivity_tested)
+        return self._downloader
+
+    @property
+    def merger(self):
+        if self._merger is None:
+            from src.core.merger import Merger
+            self._merger = Merger()
+        return self._merger
+
+    def start_engine(self):
+        """Creates the engine ahead of the first job; src/main.py calls this once the window is painted."""
+        self.downloader
+
     def setup_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -75,7 +107,7 @@ class MainWindow(QMainWindow):
         url_layout = QHBoxLayout()
         url_layout.addWidget(QLabel("Base URL:"))
         self.url_input = QLineEdit()
-        self.url_input.setPlaceholderText("http://example.com/segment_[i or index].ts")
+        self.url_input.setPlaceholderText("http://example.com/segment_[i or index].ts or .../playlist.m3u8")
         url_layout.addWidget(self.url_input)
         input_layout.addLayout(url_layout)
 
@@ -94,6 +126,9 @@ class MainWindow(QMainWindow):
         idx_layout.addWidget(self.end_input)
         idx_layout.addWidget(QLabel("Filename:"))
         idx_layout.addWidget(self.filename_input)
+        self.follow_check = QCheckBox("Live")
+        self.follow_check.setToolTip("Keep fetching new segments of a live stream (End may be left empty)")
+        idx_layout.addWidget(self.follow_check)
         input_layout.addLayout(idx_layout)
 
         # URL Test Status Label
@@ -117,14 +152,9 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(input_group)
 
         # === Job Dashboard ===
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.jobs_container = QWidget()
-        self.jobs_layout = QVBoxLayout(self.jobs_container)
-        self.jobs_layout.addStretch() # Push items up
-        self.scroll_area.setWidget(self.jobs_container)
-        
-        main_layout.addWidget(self.scroll_area)
+        self.job_view = JobListView(self.job_model, self.create_job_detail)
+        self.job_view.customContextMenuRequested.connect(self.show_job_menu)
+        main_layout.addWidget(self.job_view)
 
     def open_settings(self):
         dlg = SettingsDialog(self)
@@ -132,20 +162,33 @@ class MainWindow(QMainWindow):
             # Update segment manager path if changed
             new_path = self.config_manager.get_config().download_folder
             self.segment_manager.base_download_path = new_path
+            # Speed limit applies to running downloads straight away
+            self.downloader.set_global_rate(self.config_manager.get_config().max_download_rate)
 
     @asyncSlot()
     async def test_url(self):
         """Async URL testing with HEAD/GET requests to first and last indices."""
+        import aiohttp
+        from src.core.hls import is_playlist_url
+        from src.core.jobs import resolve_playlist_job
         base_url = self.url_input.text().strip()
-        try:
-            start = int(self.start_input.text())
-            end = int(self.end_input.text())
-        except ValueError:
-            QMessageBox.warning(self, "Error", "Invalid indices")
-            return
+        if is_playlist_url(base_url):
+            try:
+                job = await resolve_playlist_job(base_url, "")
+            except (ValueError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                QMessageBox.warning(self, "Error", f"Cannot load playlist:\n{e}")
+                return
+            first_url, last_url = job.segments[0].url, job.segments[-1].url
+        else:
+            try:
+                start = int(self.start_input.text())
+                end = int(self.end_input.text())
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid indices")
+                return
 
-        padding = self.config_manager.get_config().global_padding
-        first_url, last_url = get_example_urls(base_url, start, end, padding)
+            padding = self.config_manager.get_config().global_padding
+            first_url, last_url = get_example_urls(base_url, start, end, padding)
         
         # Update UI to show testing
         self.url_status_label.setText("Testing connectivity...")
@@ -190,103 +233,146 @@ class MainWindow(QMainWindow):
 
     @asyncSlot()
     async def add_job(self):
+        import aiohttp
+        from src.core.hls import is_playlist_url
+        from src.core.jobs import build_job, resolve_playlist_job
+        follow = self.follow_check.isChecked()
+        if is_playlist_url(self.url_input.text()):
+            # HLS playlist: the segment list comes from the playlist, not from start/end
+            try:
+                job = await resolve_playlist_job(self.url_input.text(), self.filename_input.text(), follow=follow)
+            except (ValueError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                QMessageBox.warning(self, "Error", f"Cannot load playlist:\n{e}")
+                return
+            self.start_job(job)
+            return
+
         try:
             base_url = self.url_input.text()
             start = int(self.start_input.text())
-            end = int(self.end_input.text())
-            fname = self.filename_input.text().strip() or "output.mp4"
-            if not fname.endswith(('.mp4', '.ts')):
-                fname += ".mp4"
-                
+            # A live job may leave End empty and grow from Start
+            end = start - 1 if follow and not self.end_input.text().strip() else int(self.end_input.text())
             padding = self.config_manager.get_config().global_padding
         except ValueError:
             QMessageBox.warning(self, "Error", "Invalid indices")
             return
 
-        if start > end:
+        if start > end + (1 if follow else 0):
             QMessageBox.warning(self, "Error", "Start index must be <= End index")
             return
 
-        # Create Job Object
-        job_name = fname.replace(".", "_") # Simple unique ID logic
-        job = Job(job_name, base_url, start, end, fname)
-        
-        # Generate segments
-        for i in range(start, end + 1):
-            url = get_example_urls(base_url, i, i, padding)[0]
-            job.segments.append(Segment(i, url))
-
-        # Create UI
-        job_widget = QWidget()
-        job_layout = QVBoxLayout(job_widget)
-        
-        pbar = JobProgressBar(job_name)
-        seg_map = SegmentMap(job.total_segments)
-        seg_map.set_range(start, end)
-
-        # Button row
-        btn_row = QHBoxLayout()
-        
-        # Cancel Button
-        cancel_btn = QPushButton("Cancel")
-        cancel_btn.setStyleSheet("background-color: #ff6b6b; color: white;")
-        cancel_btn.clicked.connect(lambda: self.cancel_job(job_name))
-        
-        # Clear Cache Button
-        clear_cache_btn = QPushButton("Clear Cache")
-        clear_cache_btn.clicked.connect(lambda: self.clear_job_cache(job_name))
-        
-        # Retry Merge Button (initially hidden)
-        retry_merge_btn = QPushButton("Retry Merge")
-        retry_merge_btn.setStyleSheet("background-color: #ffaa00; color: white;")
-        retry_merge_btn.clicked.connect(lambda: asyncio.create_task(self.start_merge(job)))
-        retry_merge_btn.setVisible(False)
-        
-        # Merge Button (initially disabled)
-        merge_btn = QPushButton("Merge")
-        merge_btn.setEnabled(False)
-        merge_btn.clicked.connect(lambda: asyncio.create_task(self.start_merge(job)))
-
-        btn_row.addWidget(cancel_btn)
-        btn_row.addWidget(clear_cache_btn)
-        btn_row.addStretch()
-        btn_row.addWidget(retry_merge_btn)
-        btn_row.addWidget(merge_btn)
-
-        job_layout.addWidget(pbar)
-        job_layout.addWidget(seg_map)
-        job_layout.addLayout(btn_row)
-        
-        # Add frame styling
-        job_widget.setStyleSheet("border: 1px solid #ccc; margin: 5px; padding: 5px; border-radius: 5px;")
-        
-        self.jobs_layout.insertWidget(0, job_widget) # Add to top
-        self.jobs[job_name] = {
-            "job": job,
-            "pbar": pbar,
-            "map": seg_map,
-            "merge_btn": merge_btn,
-            "cancel_btn": cancel_btn,
-            "clear_cache_btn": clear_cache_btn,
-            "retry_merge_btn": retry_merge_btn,
-            "widget": job_widget
-        }
+        # Create Job Object (segments are generated from the URL template)
+        job = build_job(base_url, start, end, self.filename_input.text(), padding, follow)
+        self.start_job(job)
+
+    def start_job(self, job: Job):
+        row = self.job_model.get(job.name)
+        if row is not None and row.job.status in [JobStatus.RUNNING, JobStatus.PAUSED]:
+            QMessageBox.warning(self, "Error", f"A job named '{job.output_filename}' is already running")
+            return
+        if row is not None:
+            self.job_model.remove(job.name)
+
+        self.job_model.add(job)
 
         # Start Download
         asyncio.create_task(self.downloader.start_job(job))
 
+    def create_job_detail(self, row: JobRow) -> JobDetail:
+        """Builds the segment map and buttons of a row being expanded (see JobListView)."""
+        job = row.job
+        job_name = job.name
+        detail = JobDetail(row)
+        detail.cancel_btn.clicked.connect(lambda: self.cancel_job(job_name))
+        detail.pause_btn.clicked.connect(lambda: self.toggle_pause(job_name))
+        detail.stop_live_btn.clicked.connect(lambda: self.stop_following(job_name))
+        detail.rate_input.editingFinished.connect(lambda: self.set_job_rate(job_name))
+        detail.clear_cache_btn.clicked.connect(lambda: self.clear_job_cache(job_name))
+        detail.retry_merge_btn.clicked.connect(lambda: asyncio.create_task(self.start_merge(job)))
+        detail.merge_btn.clicked.connect(lambda: asyncio.create_task(self.start_merge(job)))
+        return detail
+
+    def show_job_menu(self, pos):
+        """Row context menu: the job actions without expanding it."""
+        index = self.job_view.indexAt(pos)
+        if not index.isValid():
+            return
+        row = index.data(JobListModel.RowRole)
+        job_name = row.job.name
+        menu = QMenu(self)
+        if row.active:
+            menu.addAction("Cancel", lambda: self.cancel_job(job_name))
+            menu.addAction("Resume" if row.paused else "Pause", lambda: self.toggle_pause(job_name))
+        if row.job.follow and row.stop_live:
+            menu.addAction("Stop Live", lambda: self.stop_following(job_name))
+        if row.merge_enabled or row.retry_merge:
+            menu.addAction("Merge", lambda: asyncio.create_task(self.start_merge(row.job)))
+        menu.addAction("Clear Cache", lambda: self.clear_job_cache(job_name))
+        menu.exec(self.job_view.viewport().mapToGlobal(pos))
+
+    async def attach_daemon(self):
+        """Shows the jobs the daemon already owns (with segment state) and follows its events."""
+        from src.core.daemon_client import DaemonError
+        from src.core.jobs import build_job
+        try:
+            snapshots = await self.downloader.attach()
+        except DaemonError as e:
+            QMessageBox.warning(self, "Daemon", f"Cannot attach to daemon:\n{e}")
+            return
+
+        codes = {"C": 1, "F": 2}
+        for snap in snapshots:
+            if snap["name"] in self.job_model:
+                continue
+            job = build_job(snap["base_url"], snap["start"], snap["end"], snap["filename"], snap["padding"],
+                            snap.get("follow", False))
+            job.status = JobStatus(snap["status"])
+            job.rate_limit = snap.get("rate_limit", 0)
+            row = self.job_model.add(job)
+            row.segments[:] = bytes(codes.get(code, 0) for code in snap.get("segments", ""))
+            if job.total_segments:
+                row.progress = 100.0 * row.segments.count(1) / job.total_segments
+            row.status_text = snap["status"]
+            row.paused = job.status == JobStatus.PAUSED
+
+    def stop_following(self, job_name: str):
+        """Ends a live recording; the job completes once its last segments are in."""
+        if job_name in self.job_model:
+            self.downloader.stop_following(job_name)
+            self.job_model.update(job_name, stop_live=False, status_text="Stopping live recording...")
+
     def cancel_job(self, job_name: str):
         """Cancel an active job."""
-        if job_name in self.jobs:
+        if job_name in self.job_model:
             self.downloader.cancel_job(job_name)
-            ui = self.jobs[job_name]
-            ui["cancel_btn"].setEnabled(False)
-            ui["pbar"].stats_label.setText("Cancelled")
+            self.job_model.update(job_name, active=False, status_text="Cancelled")
+
+    def toggle_pause(self, job_name: str):
+        """Pause frees the job's connections for other jobs; Resume fetches what is missing."""
+        row = self.job_model.get(job_name)
+        if row is not None:
+            if not row.paused:
+                self.downloader.pause_job(job_name)
+            else:
+                self.downloader.resume_job(job_name)
+
+    def set_job_rate(self, job_name: str):
+        """Applies the job's speed limit field (KB/s, empty or 0 = unlimited)."""
+        row = self.job_model.get(job_name)
+        if row is None or row.detail is None:
+            return
+        try:
+            rate = max(0, int(row.detail.rate_input.text() or 0)) * 1024
+        except ValueError:
+            row.detail.rate_input.setText(str(row.job.rate_limit // 1024) if row.job.rate_limit else "")
+            return
+        row.job.rate_limit = rate
+        self.downloader.set_job_rate(job_name, rate)
 
     def clear_job_cache(self, job_name: str):
         """Clear cache for a specific job."""
-        if job_name in self.jobs:
-            job = self.jobs[job_name]["job"]
+        if job_name in self.job_model:
+            job = self.job_model.get(job_name).job
             reply = QMessageBox.question(
                 self, 
                 "Clear Cache", 
@@ -307,100 +393,100 @@ class MainWindow(QMainWindow):
     def clear_history(self):
         """Remove completed jobs from the UI (does not delete files)."""
         jobs_to_remove = []
-        for job_name, ui in self.jobs.items():
-            job = ui["job"]
+        for row in self.job_model.rows:
+            job = row.job
             # Remove completed, cancelled, or failed jobs
             if job.status in ["Completed", "Cancelled", "Failed", "Merge Error",
                               JobStatus.COMPLETED, JobStatus.CANCELLED, JobStatus.FAILED, JobStatus.MERGE_ERROR]:
-                jobs_to_remove.append(job_name)
+                jobs_to_remove.append(job.name)
         
         for job_name in jobs_to_remove:
-            ui = self.jobs[job_name]
-            ui["widget"].setParent(None)
-            ui["widget"].deleteLater()
-            del self.jobs[job_name]
+            self.job_model.remove(job_name)
         
         if jobs_to_remove:
             QMessageBox.information(self, "History Cleared", f"Removed {len(jobs_to_remove)} job(s) from the list.")
 
     @pyqtSlot(str, float, str, str)
     def on_progress_update(self, job_name, progress, speed, eta):
-        if job_name in self.jobs:
-            self.jobs[job_name]["pbar"].update_progress(progress, speed, eta)
+        self.job_model.update(job_name, progress=progress, status_text=f"Speed: {speed} | ETA: {eta}")
 
     @pyqtSlot(str, int, str)
     def on_segment_status(self, job_name, index, status):
-        if job_name in self.jobs:
-            self.jobs[job_name]["map"].update_segment(index, status)
+        self.job_model.set_segment(job_name, index, status)
 
     @asyncSlot(str)
     async def on_job_completed(self, job_name):
-        if job_name in self.jobs:
-            ui = self.jobs[job_name]
-            ui["cancel_btn"].setEnabled(False)
-            ui["pbar"].stats_label.setText("Download Complete! Auto-merging...")
-            
-            # Auto-Merge
-            await self.start_merge(ui["job"])
+        row = self.job_model.update(job_name, active=False, stop_live=False,
+                                    status_text="Download Complete! Auto-merging...")
+        # Auto-Merge (unless the daemon merges on its own)
+        if row is not None and not getattr(self.downloader, "merges_remotely", False):
+            await self.start_merge(row.job)
 
     @pyqtSlot(str, str)
     def on_job_failed(self, job_name, error):
-        if job_name in self.jobs:
-            ui = self.jobs[job_name]
-            ui["pbar"].stats_label.setText(f"Failed: {error}")
-            ui["cancel_btn"].setEnabled(False)
-            ui["merge_btn"].setEnabled(True)  # Allow manual merge attempt
+        # Allow manual merge attempt
+        self.job_model.update(job_name, status_text=f"Failed: {error}", active=False, merge_enabled=True)
 
     @pyqtSlot(str)
     def on_job_cancelled(self, job_name):
-        if job_name in self.jobs:
-            ui = self.jobs[job_name]
-            ui["pbar"].stats_label.setText("Cancelled")
-            ui["cancel_btn"].setEnabled(False)
+        self.job_model.update(job_name, status_text="Cancelled", active=False, stop_live=False)
+
+    @pyqtSlot(str)
+    def on_job_paused(self, job_name):
+        self.job_model.update(job_name, status_text="Paused", paused=True)
+
+    @pyqtSlot(str, int)
+    def on_job_extended(self, job_name, end_index):
+        row = self.job_model.get(job_name)
+        if row is not None:
+            row.job.end_index = max(row.job.end_index, end_index)
+            row.extend_to(end_index)
+
+    @pyqtSlot(str)
+    def on_job_resumed(self, job_name):
+        self.job_model.update(job_name, status_text="Resuming...", paused=False)
+
+    def on_job_merged(self, job_name, success, valid, output_path):
+        """Merge result reported by the daemon."""
+        row = self.job_model.get(job_name)
+        if row is not None:
+            if success and valid:
+                row.job.status = JobStatus.COMPLETED
+                self.job_model.update(job_name, status_text=f"✓ Done! Saved to {output_path}")
+            else:
+                row.job.status = JobStatus.MERGE_ERROR
+                self.job_model.update(job_name, status_text="⚠ Merge by daemon failed or integrity check failed.")
 
     async def start_merge(self, job: Job):
-        ui = self.jobs[job.name]
-        ui["merge_btn"].setEnabled(False)
-        ui["retry_merge_btn"].setVisible(False)
-        ui["pbar"].stats_label.setText("Merging...")
-        
-        # Get all valid files from segment manager
-        files = self.segment_manager.get_all_segment_files(job)
-        output_path = f"{self.config_manager.get_config().download_folder}/{job.output_filename}"
-        
-        # Run in executor
-        loop = asyncio.get_event_loop()
-        success = await loop.run_in_executor(
-            self.merger.executor, 
-            self.merger.merge_segments, 
-            files, 
-            output_path
+        from src.core.jobs import merge_job
+        self.job_model.update(job.name, merge_enabled=False, retry_merge=False, status_text="Merging...")
+        
+        # Merge and verify on the merger's executor
+        success, valid, output_path = await merge_job(
+            self.segment_manager,
+            self.merger,
+            job,
+            self.config_manager.get_config().download_folder
         )
         
         if success:
-             # Integrity Check
-             valid = await loop.run_in_executor(
-                 self.merger.executor,
-                 self.merger.verify_integrity,
-                 files,
-                 output_path
-            )
-             
              if valid:
                  job.status = JobStatus.COMPLETED
-                 ui["pbar"].stats_label.setText(f"✓ Done! Saved to {output_path}")
+                 self.job_model.update(job.name, status_text=f"✓ Done! Saved to {output_path}")
              else:
                  job.status = JobStatus.MERGE_ERROR
-                 ui["pbar"].stats_label.setText("⚠ Merge finished but integrity check failed.")
-                 ui["retry_merge_btn"].setVisible(True)
+                 self.job_model.update(job.name, status_text="⚠ Merge finished but integrity check failed.",
+                                       retry_merge=True)
         else:
             job.status = JobStatus.MERGE_ERROR
-            ui["pbar"].stats_label.setText("❌ Merge Failed - Click 'Retry Merge' to try again")
-            ui["retry_merge_btn"].setVisible(True)
+            self.job_model.update(job.name, status_text="❌ Merge Failed - Click 'Retry Merge' to try again",
+                                  retry_merge=True)
 
     @asyncSlot()
     async def standalone_merge(self):
         """Open folder dialog and merge segments from a selected folder."""
+        from src.core.jobs import merge_files
+        from src.core.folder_merge import format_gaps, scan_folder, suggested_name
         # Select folder containing segments
         folder_path = QFileDialog.getExistingDirectory(
             self,
@@ -411,13 +497,14 @@ class MainWindow(QMainWindow):
         if not folder_path:
             return
         
-        # Scan for segment files (.ts)
-        segment_files = []
-        for filename in os.listdir(folder_path):
-            if filename.endswith('.ts'):
-                segment_files.append(os.path.join(folder_path, filename))
+        # Segment files (.ts) in natural order (2.ts before 10.ts), sizes from the same scan
+        try:
+            scan = scan_folder(folder_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Merge Failed", f"❌ Cannot read the folder:\n{e}")
+            return
         
-        if not segment_files:
+        if not scan.segments:
             QMessageBox.warning(
                 self, 
                 "No Segments Found", 
@@ -425,13 +512,19 @@ class MainWindow(QMainWindow):
             )
             return
         
-        # Sort segment files naturally (by numeric prefix if present)
-        segment_files.sort(key=lambda f: os.path.basename(f))
+        if scan.gaps:
+            reply = QMessageBox.question(
+                self,
+                "Missing Segments",
+                f"{scan.missing} segment(s) are missing from the numbering ({format_gaps(scan.gaps)}).\n"
+                f"Merge the {len(scan.segments)} present segments anyway?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
         
-        # Extract folder name and remove "Cache_" prefix if present
-        folder_name = os.path.basename(folder_path)
-        if folder_name.startswith("Cache_"):
-            folder_name = folder_name[6:]  # Remove "Cache_" prefix
+        # Folder name without the "Cache_" prefix of job caches
+        folder_name = suggested_name(folder_path)
         
         # Show merge dialog for filename/extension editing
         dialog = MergeDialog(self, folder_name)
@@ -448,31 +541,19 @@ class MainWindow(QMainWindow):
         QMessageBox.information(
             self, 
             "Merging", 
-            f"Merging {len(segment_files)} segments into {output_filename}..."
+            f"Merging {len(scan.segments)} segments into {output_filename}..."
         )
         
-        loop = asyncio.get_event_loop()
-        success = await loop.run_in_executor(
-            self.merger.executor,
-            self.merger.merge_segments,
-            segment_files,
-            output_path
-        )
+        algorithm = self.config_manager.get_config().checksum_algorithm
+        success, valid, checksum = await merge_files(self.merger, scan.segments, output_path,
+                                                     algorithm=algorithm)
         
         if success:
-            # Integrity check
-            valid = await loop.run_in_executor(
-                self.merger.executor,
-                self.merger.verify_integrity,
-                segment_files,
-                output_path
-            )
-            
             if valid:
                 QMessageBox.information(
                     self, 
                     "Merge Complete", 
-                    f"✓ Successfully merged to:\n{output_path}"
+                    f"✓ Successfully merged to:\n{output_path}\n{algorithm.upper()}: {checksum}"
                 )
             else:
                 QMessageBox.warning(
@@ -29,6 +29,11 @@ class SettingsDialog(QDialog):
         # Max Concurrent
         self.concurrent_input = QLineEdit(str(self.config.max_concurrent_downloads))
         form.addRow("Max Concurrent Downloads:", self.concurrent_input)
+
+        # Bandwidth cap (stored in bytes/s, edited in KB/s)
+        self.rate_input = QLineEdit(str(self.config.max_download_rate // 1024))
+        self.rate_input.setPlaceholderText("0 = unlimited")
+        form.addRow("Speed Limit (KB/s):", self.rate_input)
         
         # Global Padding
         self.padding_combo = QComboBox()
@@ -107,11 +112,16 @@ class SettingsDialog(QDialog):
             )
 
     def save(self):
-        # Folder and padding are auto-saved, just save concurrent
+        # Folder and padding are auto-saved, just save concurrent and speed limit
         try:
             concurrent = int(self.concurrent_input.text())
             self.config_manager.set_max_concurrent(concurrent)
         except ValueError:
             pass # Ignore invalid int
+        try:
+            rate_kb = int(self.rate_input.text() or 0)
+            self.config_manager.set_max_download_rate(max(0, rate_kb) * 1024)
+        except ValueError:
+            pass
         
         self.accept()
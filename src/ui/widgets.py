@@ -1,5 +1,4 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QProgressBar, QLabel, QHBoxLayout, QGridLayout
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtWidgets import QWidget
 from PyQt6.QtGui import QColor, QPainter, QBrush, QPen
 
 class SegmentMap(QWidget):
@@ -22,6 +21,14 @@ class SegmentMap(QWidget):
         self.status_map = [0] * self.total_segments
         self.update()
 
+    def extend_to(self, end: int):
+        """Grows the map for a live job that found new segments."""
+        missing = end - self.start_index + 1 - len(self.status_map)
+        if missing > 0:
+            self.status_map.extend([0] * missing)
+            self.total_segments = len(self.status_map)
+            self.update()
+
     def update_segment(self, real_index: int, status: str):
         local_idx = real_index - self.start_index
         if 0 <= local_idx < len(self.status_map):
@@ -68,26 +75,3 @@ class SegmentMap(QWidget):
                 color = QColor("lightgray")
 
             painter.fillRect(x, y, block_size, block_size, QBrush(color))
-
-class JobProgressBar(QWidget):
-    def __init__(self, job_name: str):
-        super().__init__()
-        self.job_name = job_name
-        self.layout = QVBoxLayout(self)
-        
-        self.info_layout = QHBoxLayout()
-        self.name_label = QLabel(f"Job: {job_name}")
-        self.stats_label = QLabel("Waiting...")
-        self.info_layout.addWidget(self.name_label)
-        self.info_layout.addStretch()
-        self.info_layout.addWidget(self.stats_label)
-        
-        self.bar = QProgressBar()
-        self.bar.setRange(0, 100)
-        
-        self.layout.addLayout(self.info_layout)
-        self.layout.addWidget(self.bar)
-
-    def update_progress(self, progress: float, speed: str, eta: str):
-        self.bar.setValue(int(progress))
-        self.stats_label.setText(f"Speed: {speed} | ETA: {eta}")
@@ -27,3 +27,50 @@ def get_example_urls(base_url: str, start: int, end: int, padding: str = None) -
     first = generate_url(base_url, start, padding)
     last = generate_url(base_url, end, padding)
     return first, last
+
+def parse_address(address: str) -> tuple:
+    """
+    Parses a daemon control address.
+    "unix:/run/fastflux.sock" -> ("unix", "/run/fastflux.sock")
+    "127.0.0.1:8765"         -> ("tcp", "127.0.0.1", 8765)
+
+    >>> parse_address("localhost:9000")
+    ('tcp', 'localhost', 9000)
+    """
+    address = address.strip()
+    if address.startswith("unix:"):
+        return "unix", address[5:]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid daemon address: {address!r}")
+    return "tcp", host, int(port)
+
+_RATE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+def parse_rate(value: str) -> int:
+    """
+    Parses a byte rate with an optional K/M/G suffix (binary units, like curl).
+    "0" means unlimited.
+
+    >>> parse_rate("500K")
+    512000
+    >>> parse_rate("2m")
+    2097152
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*', value, flags=re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid rate: {value!r}")
+    return int(float(match.group(1)) * _RATE_UNITS[match.group(2).upper()])
+
+def format_rate(rate: int) -> str:
+    """
+    >>> format_rate(0)
+    'unlimited'
+    >>> format_rate(1536 * 1024)
+    '1.5 MB/s'
+    """
+    if not rate:
+        return "unlimited"
+    if rate >= 1024 ** 2:
+        return f"{rate / 1024 ** 2:.1f} MB/s"
+    return f"{rate / 1024:.0f} KB/s"